@@ -2,32 +2,47 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from app.attack_unit.models import AttackUnit
 from app.common.controllers import verify_admin_access
-from typing import Optional, List
+from app.common.catalog_cache import get_catalog_cache, catalog_row, ATTACK_UNITS_CATALOG
+from typing import Optional, List, Dict, Any
 from fastapi import HTTPException
 
 
-# Controller to handle attack unit retrieval with pagination and filters
+# Controller to handle attack unit retrieval with pagination and filters, served from the catalog cache
 async def list_attack_units(
     db: AsyncSession,
     cursor: Optional[int] = None,
     limit: int = 10,
     type: Optional[str] = None,
     rarity: Optional[str] = None
-) -> List[AttackUnit]:
-    query = select(AttackUnit).order_by(AttackUnit.id).limit(limit)
+) -> List[Dict[str, Any]]:
+    async def load():
+        query = select(AttackUnit).order_by(AttackUnit.id).limit(limit)
 
-    # Apply cursor (pagination)
-    if cursor:
-        query = query.where(AttackUnit.id > cursor)
+        # Apply cursor (pagination)
+        if cursor:
+            query = query.where(AttackUnit.id > cursor)
 
-    # Apply filters
-    if type:
-        query = query.where(AttackUnit.type == type)
-    if rarity:
-        query = query.where(AttackUnit.rarity == rarity)
+        # Apply filters
+        if type:
+            query = query.where(AttackUnit.type == type)
+        if rarity:
+            query = query.where(AttackUnit.rarity == rarity)
 
-    result = await db.execute(query)
-    return result.scalars().all()
+        result = await db.execute(query)
+        return [catalog_row(unit) for unit in result.scalars().all()]
+
+    return await get_catalog_cache().get_or_load(ATTACK_UNITS_CATALOG, f"list:{cursor}:{limit}:{type}:{rarity}", load)
+
+
+# Controller to retrieve an attack unit, served from the catalog cache
+async def get_attack_unit(db: AsyncSession, id: int) -> Dict[str, Any]:
+    async def load():
+        unit = await db.get(AttackUnit, id)
+        if not unit:
+            raise HTTPException(status_code=404, detail="Attack Unit not found")
+        return catalog_row(unit)
+
+    return await get_catalog_cache().get_or_load(ATTACK_UNITS_CATALOG, f"detail:{id}", load)
 
 
 # Create a new attack unit (admin only)
@@ -36,6 +51,7 @@ async def create_attack_unit(token: str, db: AsyncSession, attack_unit_data: dic
     new_unit = AttackUnit(**attack_unit_data)
     db.add(new_unit)
     await db.commit()
+    await get_catalog_cache().invalidate(ATTACK_UNITS_CATALOG)
     await db.refresh(new_unit)
     return new_unit
 
@@ -49,6 +65,7 @@ async def update_attack_unit(token: str, db: AsyncSession, id: int, attack_unit_
     for key, value in attack_unit_data.items():
         setattr(unit, key, value)
     await db.commit()
+    await get_catalog_cache().invalidate(ATTACK_UNITS_CATALOG)
     await db.refresh(unit)
     return unit
 
@@ -61,4 +78,5 @@ async def delete_attack_unit(token: str, db: AsyncSession, id: int):
         raise HTTPException(status_code=404, detail="Attack unit not found")
     await db.delete(unit)
     await db.commit()
+    await get_catalog_cache().invalidate(ATTACK_UNITS_CATALOG)
     return {"detail": "Attack unit deleted"}
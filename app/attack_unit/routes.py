@@ -1,9 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.session import get_db
-from app.attack_unit.models import AttackUnit
 from app.attack_unit.schemas import AttackUnitCreate, AttackUnitUpdate, AttackUnitResponse
-from app.attack_unit.controllers import list_attack_units, create_attack_unit, update_attack_unit, delete_attack_unit
+from app.attack_unit.controllers import list_attack_units, get_attack_unit as get_attack_unit_detail, create_attack_unit, \
+    update_attack_unit, delete_attack_unit
 from typing import Optional
 from app.authentication.jwt import oauth2_scheme
 
@@ -24,10 +24,7 @@ async def get_attack_units(
 # GET attack unit by ID
 @router.get("/{id}", response_model=AttackUnitResponse)
 async def get_attack_unit(id: int, db: AsyncSession = Depends(get_db)):
-    attack_unit = await db.get(AttackUnit, id)
-    if not attack_unit:
-        raise HTTPException(status_code=404, detail="Attack Unit not found")
-    return attack_unit
+    return await get_attack_unit_detail(db, id)
 
 
 # POST create attack unit (admin access only)
@@ -1,11 +1,11 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.authentication.jwt import create_access_token, verify_access_token, create_email_verification_token, \
-    verify_email_verification_token, create_password_reset_token, verify_password_reset_token
+    verify_email_verification_token, create_password_reset_token, verify_password_reset_token, identity_cache
 from app.utils.email import send_email_verification, send_password_reset_email
 from app.authentication.models import User
 from app.hero.models import Hero
 from fastapi import HTTPException, BackgroundTasks, status
-from passlib.context import CryptContext
+from app.authentication.password_hashing import pwd_context, get_password_hasher
 from sqlalchemy import select, and_, desc, asc
 from typing import Optional, Dict
 import random
@@ -18,9 +18,6 @@ def generate_username(email: str) -> str:
     random_suffix = ''.join(random.choices(string.ascii_lowercase + string.digits, k=7))
     return f"{base_username}_{random_suffix}"
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-
 # Sign up user and send verification email
 async def sign_up_user(email: str, password: str, db: AsyncSession, background_tasks: BackgroundTasks):
     # Check if user exists
@@ -30,7 +27,7 @@ async def sign_up_user(email: str, password: str, db: AsyncSession, background_t
         raise HTTPException(status_code=400, detail="Email already registered")
     
     # Hash the password
-    hashed_password = pwd_context.hash(password)
+    hashed_password = await get_password_hasher().hash(password)
     username = generate_username(email)
 
     # Assign the default hero (Admiral Bubbles)
@@ -69,7 +66,7 @@ async def sign_up_user(email: str, password: str, db: AsyncSession, background_t
 async def authenticate_user(email: str, password: str, db: AsyncSession):
     result = await db.execute(select(User).where(User.email == email))
     user = result.scalars().first()
-    if not user or not pwd_context.verify(password, user.hashed_password):
+    if not user or not await get_password_hasher().verify(password, user.hashed_password):
         raise HTTPException(status_code=400, detail="Invalid credentials")
     
     access_token = create_access_token({"sub": user.email})
@@ -84,8 +81,11 @@ async def reset_password(token: str, new_password: str, db: AsyncSession):
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
-    user.hashed_password = pwd_context.hash(new_password)
+    user.hashed_password = await get_password_hasher().hash(new_password)
     await db.commit()
+
+    # Tokens issued before the change must be verified again
+    identity_cache.evict_user(user.id)
     return {"message": "Password updated successfully"}
 
 
@@ -96,16 +96,17 @@ async def change_password(user_id: int, current_password: str, new_password: str
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
 
     # Check if current password is correct
-    if not pwd_context.verify(current_password, user.hashed_password):
+    if not await get_password_hasher().verify(current_password, user.hashed_password):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Incorrect current password")
 
     # Hash and update new password
-    hashed_new_password = pwd_context.hash(new_password)
+    hashed_new_password = await get_password_hasher().hash(new_password)
     user.hashed_password = hashed_new_password
 
     # Commit changes to DB
     db.add(user)
     await db.commit()
+    identity_cache.evict_user(user.id)
 
     return {"message": "Password changed successfully"}
 
@@ -136,12 +137,12 @@ async def forgot_password(email: str, db: AsyncSession, background_tasks: Backgr
 
 
 def hash_password(password: str) -> str:
-    """Hashes a plaintext password using bcrypt."""
+    """Hashes a plaintext password using bcrypt, blocking. Async code uses get_password_hasher instead."""
     return pwd_context.hash(password)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verifies if a plaintext password matches a hashed password."""
+    """Verifies if a plaintext password matches a hashed password, blocking. Async code uses get_password_hasher."""
     return pwd_context.verify(plain_password, hashed_password)
 
 
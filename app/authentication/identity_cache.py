@@ -0,0 +1,89 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional, Set, Tuple
+
+
+@dataclass(frozen=True)
+class Identity:
+    """The user an access token was verified for, as needed by the access checks of the routes."""
+    user_id: int
+    is_admin: bool
+    is_active: bool
+
+
+def token_hash(token: str) -> str:
+    """Returns the SHA-256 of a token, so that cached tokens are never kept in memory."""
+    return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+
+class IdentityCache:
+    """
+    Bounded in-process LRU of the identities of verified access tokens, keyed by token hash.
+
+    Entries expire after ttl seconds, or when the token expires if sooner, so changes to users made by other
+    workers are seen within ttl. The worker changing a user evicts its identities at once with evict_user.
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl: float = 30.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: OrderedDict = OrderedDict()  # Token hash -> (identity, monotonic expiry time)
+        self._user_tokens: Dict[int, Set[str]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _remove(self, key: str):
+        """Removes an entry and its user index. Requires the lock."""
+        identity, _ = self._entries.pop(key)
+        tokens = self._user_tokens.get(identity.user_id)
+        if tokens is not None:
+            tokens.discard(key)
+            if not tokens:
+                del self._user_tokens[identity.user_id]
+
+    def get(self, key: str) -> Optional[Identity]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] <= time.monotonic():
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key: str, identity: Identity, token_expires_at: Optional[float] = None):
+        """Caches the identity of a token; token_expires_at is the exp claim of the token, in epoch seconds."""
+        ttl = self.ttl
+        if token_expires_at is not None:
+            ttl = min(ttl, token_expires_at - time.time())
+        if ttl <= 0:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (identity, time.monotonic() + ttl)
+            self._user_tokens.setdefault(identity.user_id, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def evict_user(self, user_id: int):
+        """Drops the cached identities of a user, e.g. after it was deactivated, demoted or changed password."""
+        with self._lock:
+            for key in list(self._user_tokens.get(user_id, ())):
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._user_tokens.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._entries)}
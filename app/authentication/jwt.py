@@ -2,9 +2,11 @@ from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
 from app.config import settings
-from fastapi import HTTPException, status
+from fastapi import HTTPException, status, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.authentication.models import User
+from app.authentication.identity_cache import Identity, IdentityCache, token_hash
+from app.db.session import get_db
 from sqlalchemy import select
 from fastapi.security import OAuth2PasswordBearer
 
@@ -15,6 +17,9 @@ ACCESS_TOKEN_EXPIRE_MINUTES = settings.ACCESS_TOKEN_EXPIRE_MINUTES
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")  # Use the correct login endpoint
 
+identity_cache = IdentityCache(max_entries=settings.IDENTITY_CACHE_MAX_ENTRIES,
+                               ttl=settings.IDENTITY_CACHE_TTL_SECONDS)
+
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
@@ -68,27 +73,57 @@ def verify_password_reset_token(token: str):
         raise HTTPException(status_code=401, detail="Invalid or expired token")
 
 
-async def verify_user_access(token: str, db: AsyncSession) -> int:
+async def get_identity(token: str, db: AsyncSession) -> Identity:
+    """
+    Returns the identity of the user of an access token.
+
+    Verified tokens are served from identity_cache, skipping both the JWT decoding and the user query. Tokens
+    of other purposes (email verification, password reset) are rejected, and so are inactive users.
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
 
-    try:
-        # Decode the JWT token to extract user information
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: int = payload.get("sub")
-        if user_id is None:
+    key = token_hash(token)
+    identity = identity_cache.get(key)
+    if identity is None:
+        try:
+            # Decode the JWT token to extract user information
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+            user_email: str = payload.get("sub")
+            if user_email is None or payload.get("purpose") is not None:
+                raise credentials_exception
+        except JWTError:
             raise credentials_exception
-    except JWTError:
-        raise credentials_exception
 
-    # Fetch the user from the database
-    query = await db.execute(select(User).filter(User.id == user_id))
-    user = query.scalar_one_or_none()
-    
-    if user is None:
-        raise credentials_exception
+        # Fetch the user from the database, the subject of access tokens is the email
+        query = await db.execute(select(User.id, User.is_admin, User.is_active).where(User.email == user_email))
+        user = query.first()
+        if user is None:
+            raise credentials_exception
+
+        identity = Identity(user_id=user.id, is_admin=bool(user.is_admin), is_active=user.is_active is not False)
+        identity_cache.set(key, identity, payload.get("exp"))
+
+    if not identity.is_active:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Inactive user account")
+    return identity
+
+
+async def verify_user_access(token: str, db: AsyncSession) -> int:
+    identity = await get_identity(token, db)
+    return identity.user_id
+
+
+async def get_current_identity(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)) -> Identity:
+    """Dependency returning the identity of the access token of the request, see get_identity."""
+    return await get_identity(token, db)
+
 
-    return user_id
+async def get_admin_identity(identity: Identity = Depends(get_current_identity)) -> Identity:
+    """Dependency returning the identity of the access token of the request, which must belong to an admin."""
+    if not identity.is_admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin privileges required")
+    return identity
@@ -0,0 +1,182 @@
+import asyncio
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+class PasswordHasher:
+    """
+    Thread pool hashing and verifying passwords away from the event loop. bcrypt releases the GIL while it
+    works, so the threads run in parallel.
+
+    At most max_workers passwords are hashed at once and at most max_queued more wait for a thread; beyond that
+    requests are rejected with 503 and a Retry-After header, so that a burst of logins cannot take every CPU.
+    stats returns the queue metrics.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, max_queued: int = 32, retry_after: int = 1,
+                 context: CryptContext = pwd_context):
+        self.max_workers = max_workers or min(4, os.cpu_count() or 1)
+        self.max_queued = max_queued
+        self.retry_after = retry_after
+        self.context = context
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.max_workers + max_queued)
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='password-hasher')
+        self.pending = 0  # Queued or running
+        self.running = 0
+        self.completed = 0
+        self.rejected = 0
+        self.wait_seconds = 0.0
+        self.hash_seconds = 0.0
+
+    def _timed(self, fn: Callable, submitted_at: float):
+        started_at = time.perf_counter()
+        with self._lock:
+            self.running += 1
+            self.wait_seconds += started_at - submitted_at
+        try:
+            return fn()
+        finally:
+            with self._lock:
+                self.running -= 1
+                self.completed += 1
+                self.hash_seconds += time.perf_counter() - started_at
+
+    def _release(self, future):
+        """Frees the slot of a job once done, including jobs cancelled while queued, which never run."""
+        with self._lock:
+            self.pending -= 1
+        self._slots.release()
+
+    async def run(self, fn: Callable):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                                detail="Too many password checks in progress, try again later.",
+                                headers={'Retry-After': str(self.retry_after)})
+        with self._lock:
+            self.pending += 1
+        try:
+            future = self._pool.submit(self._timed, fn, time.perf_counter())
+        except BaseException:
+            with self._lock:
+                self.pending -= 1
+            self._slots.release()
+            raise
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    async def hash(self, password: str) -> str:
+        return await self.run(lambda: self.context.hash(password))
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        return await self.run(lambda: self.context.verify(password, hashed_password))
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                'queued': self.pending - self.running,
+                'running': self.running,
+                'completed': self.completed,
+                'rejected': self.rejected,
+                'wait_seconds': self.wait_seconds,
+                'hash_seconds': self.hash_seconds,
+            }
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+class LoginRateLimiter:
+    """
+    Token buckets limiting login attempts per key, e.g. per client address and per email, in this worker.
+
+    Each key may make attempts logins at once, then one more every window / attempts seconds. The least
+    recently used buckets beyond max_keys are dropped, so the limiter stays bounded under a flood of keys.
+    """
+
+    def __init__(self, attempts: int = 10, window: float = 60.0, max_keys: int = 100000):
+        self.attempts = attempts
+        self.window = window
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._buckets: OrderedDict = OrderedDict()  # Key -> (tokens, monotonic time of the last update)
+        self.limited = 0
+
+    def _refill(self, key: str, now: float) -> float:
+        """Returns the tokens of a key at now, marking it as recently used. Requires the lock."""
+        tokens, updated_at = self._buckets.pop(key, (self.attempts, now))
+        tokens = min(self.attempts, tokens + (now - updated_at) * self.attempts / self.window)
+        self._buckets[key] = (tokens, now)
+        return tokens
+
+    def check(self, *keys: str):
+        """
+        Counts a login attempt for every key, raising 429 with a Retry-After header when one is exhausted.
+        Rejected attempts take no token, so exhausting one key does not drain the others.
+        """
+        now = time.monotonic()
+        with self._lock:
+            tokens = {key: self._refill(key, now) for key in keys}
+            wait = max((1 - available) * self.window / self.attempts for available in tokens.values())
+            if wait > 0:
+                self.limited += 1
+            else:
+                for key, available in tokens.items():
+                    self._buckets[key] = (available - 1, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        if wait > 0:
+            raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                                detail="Too many login attempts, try again later.",
+                                headers={'Retry-After': str(math.ceil(wait))})
+
+
+_password_hasher: Optional[PasswordHasher] = None
+_login_rate_limiter: Optional[LoginRateLimiter] = None
+_lock = threading.Lock()
+
+
+def get_password_hasher() -> PasswordHasher:
+    """Returns the password hasher of the process, configured from the settings on first use."""
+    global _password_hasher
+    with _lock:
+        if _password_hasher is None:
+            from app.config import settings
+            _password_hasher = PasswordHasher(
+                max_workers=settings.PASSWORD_HASH_WORKERS or None,
+                max_queued=settings.PASSWORD_HASH_MAX_QUEUED,
+                retry_after=settings.PASSWORD_HASH_RETRY_AFTER_SECONDS
+            )
+        return _password_hasher
+
+
+def get_login_rate_limiter() -> LoginRateLimiter:
+    """Returns the login rate limiter of the process, configured from the settings on first use."""
+    global _login_rate_limiter
+    with _lock:
+        if _login_rate_limiter is None:
+            from app.config import settings
+            _login_rate_limiter = LoginRateLimiter(
+                attempts=settings.LOGIN_RATE_LIMIT_ATTEMPTS,
+                window=settings.LOGIN_RATE_LIMIT_WINDOW_SECONDS
+            )
+        return _login_rate_limiter
+
+
+def shutdown_password_hasher():
+    global _password_hasher
+    with _lock:
+        if _password_hasher is not None:
+            _password_hasher.shutdown()
+            _password_hasher = None
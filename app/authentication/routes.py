@@ -1,10 +1,11 @@
-from fastapi import APIRouter, Depends, BackgroundTasks, HTTPException, Query
+from fastapi import APIRouter, Depends, BackgroundTasks, HTTPException, Query, Request
 from app.authentication.controllers import sign_up_user, authenticate_user, forgot_password as forgot_password_controller, reset_password, verify_email_token
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.session import get_db
 from app.authentication.jwt import verify_access_token, oauth2_scheme
 from app.authentication.controllers import get_user_by_email, change_password, list_users
 from app.authentication.schemas import UserListResponse, UserCreate, UserLogin, UserResponse
+from app.authentication.password_hashing import get_login_rate_limiter
 from typing import Optional, List
 
 router = APIRouter(tags=["Authentication & Users"])
@@ -15,7 +16,10 @@ async def sign_up(user: UserCreate, background_tasks: BackgroundTasks, db: Async
 
 
 @router.post("/login")
-async def login(user: UserLogin, db: AsyncSession = Depends(get_db)):
+async def login(user: UserLogin, request: Request, db: AsyncSession = Depends(get_db)):
+    # Rejected before any password is hashed, per client address and per targeted account
+    client_host = request.client.host if request.client else "unknown"
+    get_login_rate_limiter().check(f"address:{client_host}", f"email:{user.email.lower()}")
     return await authenticate_user(user.email, user.password, db)
 
 
@@ -1,26 +1,42 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from app.building.models import DefensiveBuilding, GenerativeBuilding
-from typing import Optional, List
+from typing import Optional, List, Dict, Any
 from fastapi import HTTPException
 from app.common.controllers import verify_admin_access
+from app.common.catalog_cache import get_catalog_cache, catalog_row, DEFENSIVE_BUILDINGS_CATALOG, \
+    GENERATIVE_BUILDINGS_CATALOG
 from app.building.schemas import DefensiveBuildingResponse, GenerativeBuildingResponse
 
 # --------------------------------- Defensive Building Controller --------------------------------- #
 
-# Controller for defensive buildings
+# Controller for defensive buildings, served from the catalog cache
 async def list_defensive_buildings(
     db: AsyncSession,
     cursor: Optional[int] = None,
     limit: int = 10
-) -> List[DefensiveBuilding]:
-    query = select(DefensiveBuilding).order_by(DefensiveBuilding.id).limit(limit)
+) -> List[Dict[str, Any]]:
+    async def load():
+        query = select(DefensiveBuilding).order_by(DefensiveBuilding.id).limit(limit)
 
-    if cursor:
-        query = query.where(DefensiveBuilding.id > cursor)
+        if cursor:
+            query = query.where(DefensiveBuilding.id > cursor)
 
-    result = await db.execute(query)
-    return result.scalars().all()
+        result = await db.execute(query)
+        return [catalog_row(building) for building in result.scalars().all()]
+
+    return await get_catalog_cache().get_or_load(DEFENSIVE_BUILDINGS_CATALOG, f"list:{cursor}:{limit}", load)
+
+
+# Controller to retrieve a defensive building, served from the catalog cache
+async def get_defensive_building(db: AsyncSession, id: int) -> Dict[str, Any]:
+    async def load():
+        building = await db.get(DefensiveBuilding, id)
+        if not building:
+            raise HTTPException(status_code=404, detail="Defensive Building not found")
+        return catalog_row(building)
+
+    return await get_catalog_cache().get_or_load(DEFENSIVE_BUILDINGS_CATALOG, f"detail:{id}", load)
 
 
 # Create a new defensive building (admin only)
@@ -29,6 +45,7 @@ async def create_defensive_building(token: str, db: AsyncSession, building_data:
     new_building = DefensiveBuilding(**building_data)
     db.add(new_building)
     await db.commit()
+    await get_catalog_cache().invalidate(DEFENSIVE_BUILDINGS_CATALOG)
     await db.refresh(new_building)
     return DefensiveBuildingResponse.from_orm(new_building)
 
@@ -42,6 +59,7 @@ async def update_defensive_building(token: str, db: AsyncSession, id: int, build
     for key, value in building_data.items():
         setattr(building, key, value)
     await db.commit()
+    await get_catalog_cache().invalidate(DEFENSIVE_BUILDINGS_CATALOG)
     await db.refresh(building)
     return DefensiveBuildingResponse.from_orm(building)
 
@@ -54,23 +72,38 @@ async def delete_defensive_building(token: str, db: AsyncSession, id: int):
         raise HTTPException(status_code=404, detail="Defensive building not found")
     await db.delete(building)
     await db.commit()
+    await get_catalog_cache().invalidate(DEFENSIVE_BUILDINGS_CATALOG)
     return {"detail": "Defensive building deleted"}
 
 # --------------------------------- Generative Building Controller --------------------------------- #
 
-# Controller for generative buildings
+# Controller for generative buildings, served from the catalog cache
 async def list_generative_buildings(
     db: AsyncSession,
     cursor: Optional[int] = None,
     limit: int = 10
-) -> List[GenerativeBuilding]:
-    query = select(GenerativeBuilding).order_by(GenerativeBuilding.id).limit(limit)
+) -> List[Dict[str, Any]]:
+    async def load():
+        query = select(GenerativeBuilding).order_by(GenerativeBuilding.id).limit(limit)
+
+        if cursor:
+            query = query.where(GenerativeBuilding.id > cursor)
+
+        result = await db.execute(query)
+        return [catalog_row(building) for building in result.scalars().all()]
+
+    return await get_catalog_cache().get_or_load(GENERATIVE_BUILDINGS_CATALOG, f"list:{cursor}:{limit}", load)
+
 
-    if cursor:
-        query = query.where(GenerativeBuilding.id > cursor)
+# Controller to retrieve a generative building, served from the catalog cache
+async def get_generative_building(db: AsyncSession, id: int) -> Dict[str, Any]:
+    async def load():
+        building = await db.get(GenerativeBuilding, id)
+        if not building:
+            raise HTTPException(status_code=404, detail="Generative Building not found")
+        return catalog_row(building)
 
-    result = await db.execute(query)
-    return result.scalars().all()
+    return await get_catalog_cache().get_or_load(GENERATIVE_BUILDINGS_CATALOG, f"detail:{id}", load)
 
 
 # Create a new generative building (admin only)
@@ -79,6 +112,7 @@ async def create_generative_building(token: str, db: AsyncSession, building_data
     new_building = GenerativeBuilding(**building_data)
     db.add(new_building)
     await db.commit()
+    await get_catalog_cache().invalidate(GENERATIVE_BUILDINGS_CATALOG)
     await db.refresh(new_building)
     return GenerativeBuildingResponse.from_orm(new_building)
 
@@ -92,6 +126,7 @@ async def update_generative_building(token: str, db: AsyncSession, id: int, buil
     for key, value in building_data.items():
         setattr(building, key, value)
     await db.commit()
+    await get_catalog_cache().invalidate(GENERATIVE_BUILDINGS_CATALOG)
     await db.refresh(building)
     return GenerativeBuildingResponse.from_orm(building)
 
@@ -104,4 +139,5 @@ async def delete_generative_building(token: str, db: AsyncSession, id: int):
         raise HTTPException(status_code=404, detail="Generative building not found")
     await db.delete(building)
     await db.commit()
+    await get_catalog_cache().invalidate(GENERATIVE_BUILDINGS_CATALOG)
     return {"detail": "Generative building deleted"}
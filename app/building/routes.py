@@ -5,6 +5,7 @@ from app.building.models import DefensiveBuilding, GenerativeBuilding
 from app.building.schemas import DefensiveBuildingCreate, DefensiveBuildingResponse, DefensiveBuildingUpdate, \
   GenerativeBuildingCreate, GenerativeBuildingUpdate, GenerativeBuildingResponse, BuildingListResponse
 from app.building.controllers import list_defensive_buildings, list_generative_buildings, create_defensive_building, \
+  get_defensive_building as get_defensive_building_detail, get_generative_building as get_generative_building_detail, \
   update_defensive_building, delete_defensive_building, create_generative_building, \
   update_generative_building, delete_generative_building
 from sqlalchemy import select
@@ -28,10 +29,7 @@ async def get_defensive_buildings(
 # GET defensive building by ID (DetailView) - full details with all fields
 @router.get("/defensive-buildings/{id}", response_model=DefensiveBuildingResponse)
 async def get_defensive_building(id: int, db: AsyncSession = Depends(get_db)):
-    defensive_building = await db.get(DefensiveBuilding, id)
-    if not defensive_building:
-        raise HTTPException(status_code=404, detail="Defensive Building not found")
-    return defensive_building
+    return await get_defensive_building_detail(db, id)
 
 
 # POST create defensive building (admin access only)
@@ -79,10 +77,7 @@ async def get_generative_buildings(
 # GET generative building by ID (DetailView) - full details with all fields
 @router.get("/generative-buildings/{id}", response_model=GenerativeBuildingResponse)
 async def get_generative_building(id: int, db: AsyncSession = Depends(get_db)):
-    generative_building = await db.get(GenerativeBuilding, id)
-    if not generative_building:
-        raise HTTPException(status_code=404, detail="Generative Building not found")
-    return generative_building
+    return await get_generative_building_detail(db, id)
 
 
 # POST create generative building (admin access only)
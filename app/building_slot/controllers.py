@@ -1,25 +1,23 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import delete
 from fastapi import HTTPException, status
 from app.building_slot.models import BuildingSlot
 from app.building_slot.schemas import BuildingSlotUpdate
 from app.authentication.jwt import verify_user_access
-from app.game_territory.models import GameTerritory
+from app.game.templates import MapGameTemplate
+from app.common.controllers import bulk_insert
+from typing import Dict
 
 
-async def create_building_slots_for_game(db: AsyncSession, game_id: int, map_data):
-    building_slots = []
-    for territory in map_data['territories']:
-        for slot_location in territory['building_slots']:
-            building_slot = BuildingSlot(
-                territory_id=territory['id'],
-                location=slot_location
-            )
-            db.add(building_slot)
-            building_slots.append(building_slot)
-    await db.commit()
-    return building_slots
+async def create_building_slots_for_game(db: AsyncSession, game_territory_ids: Dict[int, int],
+                                         template: MapGameTemplate):
+    """
+    Insert the building slots of a new game from the map's template in one multi-row INSERT, without committing.
+    Slots belong to the game territories, matched through the map territory IDs of game_territory_ids.
+    """
+    building_slots = [{**slot, 'territory_id': game_territory_ids[territory['territory_id']]}
+                      for territory, slots in zip(template.territories, template.building_slots) for slot in slots]
+    await bulk_insert(db, BuildingSlot, building_slots)
 
 
 async def get_building_slots_by_territory(db: AsyncSession, territory_id: int):
@@ -37,10 +35,3 @@ async def update_building_slot(db: AsyncSession, slot_id: int, slot_data: Buildi
     await db.commit()
     await db.refresh(slot)
     return slot
-
-
-async def delete_building_slots_by_game(db: AsyncSession, game_id: int):
-    await db.execute(delete(BuildingSlot).where(BuildingSlot.territory_id.in_(
-        select(GameTerritory.id).where(GameTerritory.game_id == game_id)
-    )))
-    await db.commit()
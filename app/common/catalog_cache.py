@@ -0,0 +1,183 @@
+import json
+import threading
+import time
+import redis
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+
+ATTACK_UNITS_CATALOG = 'attack_units'
+DEFENSIVE_BUILDINGS_CATALOG = 'defensive_buildings'
+GENERATIVE_BUILDINGS_CATALOG = 'generative_buildings'
+HEROES_CATALOG = 'heroes'
+MAPS_CATALOG = 'maps'
+
+
+def catalog_row(instance) -> Dict[str, Any]:
+    """Returns the column values of a catalog model instance, as cached and sent by the catalog routes."""
+    return {column.key: getattr(instance, column.key) for column in instance.__table__.columns}
+
+
+class CatalogCache:
+    """
+    Two-tier read-through cache of the admin-edited reference data: attack units, buildings, heroes and maps.
+
+    Every catalog has a version, which is part of the keys of its entries and is bumped by invalidate, so the
+    entries of older versions are never read again. The first tier is an in-process LRU of decoded values, the
+    optional second tier is a Redis client shared by all workers holding the JSON of the entries and the
+    versions. Workers check the version of a catalog in Redis at most every version_check_interval seconds, so
+    hot reads touch neither the database nor Redis, and the blocking Redis calls run on the threadpool. A load
+    racing an invalidation stores its result under the version it started with, which is no longer read.
+
+    Cached values are shared between requests and must not be modified.
+    """
+
+    def __init__(self,
+                 max_entries: int = 1024,
+                 redis_client=None,
+                 redis_ttl: int = 3600,
+                 version_check_interval: float = 1.0,
+                 key_prefix: str = 'catalog:'):
+        self.max_entries = max_entries
+        self.redis_client = redis_client
+        self.redis_ttl = redis_ttl
+        self.version_check_interval = version_check_interval
+        self.key_prefix = key_prefix
+        self._lock = threading.Lock()
+        self._entries: OrderedDict = OrderedDict()
+        self._versions: Dict[str, Tuple[int, float]] = {}  # Catalog -> (version, monotonic time of the check)
+        self.hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+        self.redis_errors = 0
+
+    def _version_key(self, catalog: str) -> str:
+        return f'{self.key_prefix}version:{catalog}'
+
+    async def version(self, catalog: str) -> int:
+        """Returns the current version of a catalog, read from Redis when the last check is too old."""
+        now = time.monotonic()
+        with self._lock:
+            cached = self._versions.get(catalog)
+            if self.redis_client is None or (cached is not None and now - cached[1] < self.version_check_interval):
+                return cached[0] if cached else 0
+
+        try:
+            value = await run_in_threadpool(self.redis_client.get, self._version_key(catalog))
+        except redis.RedisError:
+            with self._lock:
+                self.redis_errors += 1
+            return cached[0] if cached else 0
+        version = int(value) if value is not None else 0
+        with self._lock:
+            self._versions[catalog] = (version, now)
+        return version
+
+    async def _get(self, key: str):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, self._entries[key]
+
+        if self.redis_client is not None:
+            try:
+                encoded = await run_in_threadpool(self.redis_client.get, self.key_prefix + key)
+            except redis.RedisError:
+                encoded = None
+                with self._lock:
+                    self.redis_errors += 1
+            if encoded is not None:
+                value = json.loads(encoded)
+                with self._lock:
+                    self._store_local(key, value)
+                    self.hits += 1
+                    self.redis_hits += 1
+                return True, value
+
+        with self._lock:
+            self.misses += 1
+        return False, None
+
+    def _store_local(self, key: str, value):
+        """Adds an entry to the LRU tier, evicting the least recently used ones. Requires the lock."""
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get_or_load(self, catalog: str, key: str, load: Callable[[], Awaitable[Any]]):
+        """
+        Returns the cached value of a key of a catalog, e.g. a page of a list, awaiting load and caching its
+        JSON-compatible result on a miss in both tiers. Exceptions of load, e.g. 404s, are not cached.
+        """
+        entry_key = f'{catalog}:{await self.version(catalog)}:{key}'
+        found, value = await self._get(entry_key)
+        if found:
+            return value
+
+        value = jsonable_encoder(await load())
+        with self._lock:
+            self._store_local(entry_key, value)
+        if self.redis_client is not None:
+            try:
+                await run_in_threadpool(self.redis_client.set, self.key_prefix + entry_key,
+                                        json.dumps(value, separators=(',', ':')), ex=self.redis_ttl)
+            except redis.RedisError:
+                with self._lock:
+                    self.redis_errors += 1
+        return value
+
+    async def invalidate(self, catalog: str):
+        """Bumps the version of a catalog after it was changed, for this worker and, through Redis, all others."""
+        now = time.monotonic()
+        with self._lock:
+            version = self._versions.get(catalog, (0, now))[0] + 1
+            self._versions[catalog] = (version, now)
+            for key in [key for key in self._entries if key.startswith(catalog + ':')]:
+                del self._entries[key]
+        if self.redis_client is not None:
+            try:
+                version = await run_in_threadpool(self.redis_client.incr, self._version_key(catalog))
+            except redis.RedisError:
+                with self._lock:
+                    self.redis_errors += 1
+                return
+            with self._lock:
+                self._versions[catalog] = (version, now)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._versions.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'redis_hits': self.redis_hits,
+                'misses': self.misses,
+                'redis_errors': self.redis_errors,
+                'entries': len(self._entries),
+            }
+
+
+_catalog_cache: Optional[CatalogCache] = None
+_catalog_cache_lock = threading.Lock()
+
+
+def get_catalog_cache() -> CatalogCache:
+    """Returns the catalog cache of the process, configured from the settings on first use."""
+    global _catalog_cache
+    with _catalog_cache_lock:
+        if _catalog_cache is None:
+            from app.config import settings
+            from app.common.redis_client import get_redis_client
+            _catalog_cache = CatalogCache(
+                max_entries=settings.CATALOG_CACHE_MAX_ENTRIES,
+                redis_client=get_redis_client() if settings.CATALOG_CACHE_USE_REDIS else None,
+                redis_ttl=settings.CATALOG_CACHE_TTL_SECONDS,
+                version_check_interval=settings.CATALOG_CACHE_VERSION_CHECK_SECONDS
+            )
+        return _catalog_cache
@@ -0,0 +1,79 @@
+import threading
+import time
+import redis
+from typing import Optional, Dict, Tuple
+
+_redis_client: Optional[redis.Redis] = None
+_redis_client_lock = threading.Lock()
+
+
+def get_redis_client() -> redis.Redis:
+    """Returns the shared Redis client of the process, created from settings.REDIS_URL on first use."""
+    global _redis_client
+    with _redis_client_lock:
+        if _redis_client is None:
+            from app.config import settings
+            _redis_client = redis.Redis.from_url(settings.REDIS_URL)
+        return _redis_client
+
+
+class InMemoryRedis:
+    """
+    Minimal in-process stand-in for the Redis client, implementing the commands used by the app's caches and
+    stores: get, set (with ex), delete, incr and ttl. Used in tests and when Redis is not configured.
+    Expired entries are dropped when read, and swept every purge_interval writes.
+    """
+
+    def __init__(self, purge_interval: int = 1000):
+        self._lock = threading.Lock()
+        self._data: Dict[str, Tuple[bytes, Optional[float]]] = {}
+        self.purge_interval = purge_interval
+        self._writes = 0
+
+    def _purge_expired(self):
+        now = time.monotonic()
+        expired = [key for key, (_, expires_at) in self._data.items() if expires_at is not None and expires_at <= now]
+        for key in expired:
+            del self._data[key]
+
+    def _get_entry(self, key: str):
+        entry = self._data.get(key)
+        if entry is not None and entry[1] is not None and entry[1] <= time.monotonic():
+            del self._data[key]
+            return None
+        return entry
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._get_entry(key)
+            return entry[0] if entry else None
+
+    def set(self, key: str, value, ex: Optional[int] = None) -> bool:
+        if isinstance(value, str):
+            value = value.encode('utf-8')
+        elif isinstance(value, int):
+            value = str(value).encode('utf-8')
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ex if ex else None)
+            self._writes += 1
+            if self._writes % self.purge_interval == 0:
+                self._purge_expired()
+        return True
+
+    def delete(self, *keys: str) -> int:
+        with self._lock:
+            return sum(self._data.pop(key, None) is not None for key in keys)
+
+    def incr(self, key: str, amount: int = 1) -> int:
+        with self._lock:
+            entry = self._get_entry(key)
+            value = int(entry[0]) + amount if entry else amount
+            self._data[key] = (str(value).encode('utf-8'), entry[1] if entry else None)
+            return value
+
+    def ttl(self, key: str) -> int:
+        with self._lock:
+            entry = self._get_entry(key)
+            if entry is None:
+                return -2
+            return -1 if entry[1] is None else int(entry[1] - time.monotonic())
@@ -22,10 +22,53 @@ class Settings(BaseSettings):
     SECRET_KEY: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int
 
+    # Identities of verified access tokens, cached per worker
+    IDENTITY_CACHE_MAX_ENTRIES: int = 10000
+    IDENTITY_CACHE_TTL_SECONDS: float = 30
+
+    # Password hashing threads (0 for up to 4), hashes allowed to wait for a thread, and login attempts allowed
+    # per client address and per email within the window
+    PASSWORD_HASH_WORKERS: int = 0
+    PASSWORD_HASH_MAX_QUEUED: int = 32
+    PASSWORD_HASH_RETRY_AFTER_SECONDS: int = 1
+    LOGIN_RATE_LIMIT_ATTEMPTS: int = 10
+    LOGIN_RATE_LIMIT_WINDOW_SECONDS: float = 60
+
     # Redis Configuration
     REDIS_PORT: int
     REDIS_URL: str
 
+    # Simulation result cache, the Redis tier is shared between workers
+    SIMULATION_CACHE_MAX_ENTRIES: int = 256
+    SIMULATION_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    SIMULATION_CACHE_USE_REDIS: bool = False
+    SIMULATION_CACHE_TTL_SECONDS: int = 3600
+
+    # Catalog cache of attack units, buildings, heroes and maps; workers check the catalog versions in Redis at
+    # most every CATALOG_CACHE_VERSION_CHECK_SECONDS
+    CATALOG_CACHE_MAX_ENTRIES: int = 1024
+    CATALOG_CACHE_USE_REDIS: bool = False
+    CATALOG_CACHE_TTL_SECONDS: int = 3600
+    CATALOG_CACHE_VERSION_CHECK_SECONDS: float = 1.0
+
+    # Simulation worker processes (0 for one per CPU), jobs allowed to wait for a worker, and per-job timeout
+    SIMULATION_WORKERS: int = 0
+    SIMULATION_MAX_QUEUED_JOBS: int = 16
+    SIMULATION_JOB_TIMEOUT_SECONDS: float = 120
+    SIMULATION_RETRY_AFTER_SECONDS: int = 5
+
+    # Processes of a batch, started by the simulation worker running it; 1 runs the replicas in that worker
+    SIMULATION_BATCH_WORKERS: int = 1
+
+    # Asynchronous simulation jobs, kept in Redis when shared between workers
+    SIMULATION_JOBS_USE_REDIS: bool = False
+    SIMULATION_JOB_TTL_SECONDS: int = 3600
+    SIMULATION_JOB_MAX_ACTIVE: int = 32
+    SIMULATION_JOB_MAX_SECONDS: float = 1800
+
+    # Debug flag allowing clients to request per-phase simulation profiles with ?profile=true
+    SIMULATION_PROFILING_ENABLED: bool = False
+
     # pgAdmin Configuration (if using pgAdmin)
     PGADMIN_DEFAULT_EMAIL: str
     PGADMIN_DEFAULT_PASSWORD: str
@@ -1,5 +1,5 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, delete, or_
 from fastapi import HTTPException, status
 from app.game.models import Game
 from app.common.controllers import paginate_cursor
@@ -12,11 +12,18 @@ from app.game.schemas import (
 )
 from datetime import datetime
 from app.game_territory.models import GameTerritory
-from app.game_territory.controllers import create_game_territories, delete_game_territories_on_game_end
+from app.game_territory.controllers import create_game_territories
+from app.game_city.models import GameCity
+from app.game_outpost.models import GameOutpost
+from app.game_defensive_building.models import GameDefensiveBuilding
+from app.game_generative_building.models import GameGenerativeBuilding
+from app.building_slot.models import BuildingSlot
+from app.unit_deployment.models import UnitDeployment
+from app.game_log.controllers import archive_game
 from app.map.models import Map
-from app.map.schemas import MapDetail
+from app.game.templates import get_map_game_template
 from app.game.models import Game
-from app.building_slot.controllers import create_building_slots_for_game, delete_building_slots_by_game
+from app.building_slot.controllers import create_building_slots_for_game
 
 
 async def list_games(cursor, limit, lowest_rank, highest_rank, game_mode, db: AsyncSession):
@@ -40,41 +47,31 @@ async def list_games(cursor, limit, lowest_rank, highest_rank, game_mode, db: As
 
 
 async def create_game(game_data: GameCreate, user_id: int, db: AsyncSession) -> GameViewOpenLobby:
-    """Create a game and automatically generate GameTerritory instances from the map data."""
-    game = Game(**game_data.dict(), host_id=user_id)
-    db.add(game)
-    await db.commit()
-    await db.refresh(game)
+    """
+    Create a game with its territories, cities and building slots in a single transaction.
 
+    The rows come from the cached template of the map, see MapGameTemplate, and are written with one multi-row
+    INSERT per table, so the number of round trips does not grow with the size of the map.
+    """
     # Fetch map details for territory creation
-    map_data = await db.get(Map, game.map_id)
+    map_data = await db.get(Map, game_data.map_id)
     if not map_data:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Map not found.")
 
-    # Automatically create GameTerritory instances based on map's territories
-    await create_game_territories(game.id, MapDetail.from_orm(map_data), db)
-
-    # # Automatically create GameTerritory instances based on map's territories
-    # territories = [[
-    #     GameTerritory(
-    #         game_id=game.id,
-    #         map_id=map_data.id,
-    #         territory_id=territory_data["id"],
-    #         adjacent_territories=territory_data["adjacent_territories"],
-    #         continent_id=territory_data.get("continent_id"),
-    #         money_per_turn=territory_data.get("money_per_turn", 100),
-    #         location=territory_data.get("location", [0.0, 0.0])  # Default to [0.0, 0.0] if not specified
-    #     )
-    #     for territory_data in continent.territories] for continent in map_data.continents
-    # ]
-
-    # db.add_all(territories)
-    # await db.commit()
-
-    # Automatically create GameTerritory instances based on map's territories
-    await create_building_slots_for_game(db, game.id, map_data)
-    
-    return GameViewOpenLobby.from_orm(game)
+    # Territories and building slots come from the compiled map bundle when present, the map JSON otherwise
+    template = get_map_game_template(map_data.id, map_data.continents)
+
+    game = Game(**game_data.dict(), host_id=user_id)
+    db.add(game)
+    await db.flush()  # INSERT ... RETURNING the game ID
+
+    game_territory_ids = await create_game_territories(game.id, template, db)
+    await create_building_slots_for_game(db, game_territory_ids, template)
+
+    # Read before the commit expires the game attributes
+    game_view = GameViewOpenLobby.from_orm(game)
+    await db.commit()
+    return game_view
 
 
 async def get_game(game_id: int, db: AsyncSession):
@@ -104,19 +101,46 @@ async def delete_game(game_id: int, db: AsyncSession):
     return GameViewFinished.from_orm(game)
 
 
-async def end_game(game_id: int, db: AsyncSession):
-    """End a game, and clean up associated GameTerritories if not replayable."""
+async def delete_game_state(game_id: int, db: AsyncSession, delete_territories: bool = True):
+    """
+    Delete the per-game rows of a game with one set-based DELETE per table, without committing.
+
+    Building slots are always deleted. With delete_territories, the unit deployments, game buildings, outposts,
+    cities and the territories themselves are deleted too, children before the territories they reference.
+    """
+    territory_ids = select(GameTerritory.id).where(GameTerritory.game_id == game_id)
+    statements = [delete(BuildingSlot).where(BuildingSlot.territory_id.in_(territory_ids))]
+    if delete_territories:
+        statements += [
+            delete(UnitDeployment).where(UnitDeployment.game_id == game_id),
+            delete(GameDefensiveBuilding).where(GameDefensiveBuilding.territory_id.in_(territory_ids)),
+            delete(GameGenerativeBuilding).where(GameGenerativeBuilding.territory_id.in_(territory_ids)),
+            delete(GameOutpost).where(or_(GameOutpost.territory1_id.in_(territory_ids),
+                                          GameOutpost.territory2_id.in_(territory_ids))),
+            delete(GameCity).where(GameCity.territory_id.in_(territory_ids)),
+            delete(GameTerritory).where(GameTerritory.game_id == game_id),
+        ]
+    for statement in statements:
+        await db.execute(statement)
+
+
+async def end_game(game_id: int, db: AsyncSession, archive: bool = False):
+    """
+    End a game and clean up its per-game rows in a single transaction. Territories, cities, outposts, their unit
+    deployments and game buildings are kept for replayable games, building slots are always deleted.
+
+    With archive, the final state of the game is first copied to a GameLog, see archive_game.
+    """
     game = await db.get(Game, game_id)
     if not game:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Game not found.")
 
     # Perform end-game operations
     game.finished_at = datetime.utcnow()
+    if archive:
+        game.game_log_id = await archive_game(game_id, db)
 
-    # Delete GameTerritories if the game is not replayable
-    if not game.replayable:
-        await delete_game_territories_on_game_end(game_id, db)
-    await delete_building_slots_by_game(db, game_id)
+    await delete_game_state(game_id, db, delete_territories=not game.replayable)
     await db.commit()
     return {"detail": "Game ended and territories cleaned up if necessary."}
 
@@ -57,8 +57,10 @@ async def delete_game_endpoint(game_id: int, token: str = Depends(oauth2_scheme)
 @router.patch("/end/{game_id}")
 async def end_existing_game(
     game_id: int,
+    archive: bool = Query(False),  # Copy the final state of the game to a game log before the cleanup
     token: str = Depends(oauth2_scheme),
     db: AsyncSession = Depends(get_db)
 ):
     user_id = await verify_user_access(token, db)
-    return await end_game(game_id, user_id, db)
\ No newline at end of file
+    await verify_host_access(user_id, game_id, db)
+    return await end_game(game_id, db, archive)
\ No newline at end of file
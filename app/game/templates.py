@@ -0,0 +1,123 @@
+import hashlib
+import json
+import os
+import threading
+from dataclasses import dataclass
+from typing import List, Dict, Any, Optional, Tuple
+from app.map.assets import map_json_path, map_bundle_path, get_map_territories
+from app.simulation_scenarios.path_cache import get_map_targeting
+from app.simulation_scenarios.targeting import MapTargetingTable
+
+CITY_MAX_HEALTH_POINTS = 100
+CITY_REPAIR_COST = 10
+
+
+@dataclass(frozen=True)
+class MapGameTemplate:
+    """
+    Rows every new game on a map starts with, in map territory order and without the IDs of the game: one
+    territory row, one city row and the building slot rows of every territory of the map. The game
+    controllers fill in game_id and territory_id and insert them in bulk, see create_game.
+    """
+    map_id: int
+    territories: Tuple[Dict[str, Any], ...]
+    cities: Tuple[Dict[str, Any], ...]  # One per territory
+    building_slots: Tuple[Tuple[Dict[str, Any], ...], ...]  # Per territory
+
+
+def build_map_game_template(map_id: int, map_territories: List[Dict[str, Any]],
+                            targeting: Optional[MapTargetingTable] = None) -> MapGameTemplate:
+    """
+    Builds the template rows of a map.
+
+    Parameters:
+    - map_id: The ID of the map.
+    - map_territories: Territories of the map, as returned by get_map_territories.
+    - targeting: Targeting table of the map, giving the positions along the paths targeted by every building
+      slot. The positions stored in the map are kept when None.
+
+    Returns:
+    - MapGameTemplate of the map.
+    """
+    territories, cities, building_slots = [], [], []
+    for territory_data in map_territories:
+        territories.append({
+            'map_id': map_id,
+            'name': territory_data["name"],
+            'territory_id': territory_data["id"],
+            'adjacent_territories': territory_data["adjacent_territories"],
+            'continent_id': territory_data.get("continent_id"),
+            'money_per_turn': territory_data.get("money_per_turn", 100),
+            'city_location': territory_data.get("location") or [0.0, 0.0],  # Default to [0.0, 0.0] if not specified
+            'num_building_slots': len(territory_data["building_slots"]),
+        })
+        cities.append({
+            'name': "City of " + territory_data["name"],
+            'max_health_points': CITY_MAX_HEALTH_POINTS,
+            'health_points': CITY_MAX_HEALTH_POINTS,
+            'repair_cost': CITY_REPAIR_COST,
+            'is_capital': False,
+        })
+
+        slots = []
+        for slot in territory_data['building_slots']:
+            # The map lists the paths a slot targets, the positions along them come from the targeting table
+            targeting_paths = slot['targeting_path_ids']
+            if targeting is not None:
+                targeting_paths = targeting.targeting_paths(slot['location'], list(targeting_paths))
+            slots.append({'location': slot['location'], 'targeting_paths': targeting_paths})
+        building_slots.append(tuple(slots))
+
+    return MapGameTemplate(map_id=map_id, territories=tuple(territories), cities=tuple(cities),
+                           building_slots=tuple(building_slots))
+
+
+class MapGameTemplateCache:
+    """
+    Process-wide cache of the game templates of the maps.
+
+    A template is rebuilt when the map files change, or when the continents stored in the database change for
+    maps without a compiled bundle, since get_map_territories reads them in that case.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._templates: Dict[int, Tuple[tuple, MapGameTemplate]] = {}
+
+    def _source(self, map_id: int, continents: Optional[Dict[str, Any]]) -> tuple:
+        bundle_path = map_bundle_path(map_id)
+        files = tuple((path, os.path.getmtime(path))
+                      for path in (bundle_path, map_json_path(map_id)) if os.path.exists(path))
+        if os.path.exists(bundle_path) or continents is None:
+            return files, None
+        return files, hashlib.sha1(json.dumps(continents, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def get(self, map_id: int, continents: Optional[Dict[str, Any]] = None) -> MapGameTemplate:
+        source = self._source(map_id, continents)
+        with self._lock:
+            cached = self._templates.get(map_id)
+            if cached is not None and cached[0] == source:
+                return cached[1]
+
+        map_territories = get_map_territories(map_id, continents)
+        # Maps stored only in the database have no paths to build a targeting table from
+        try:
+            targeting = get_map_targeting(map_id)
+        except FileNotFoundError:
+            targeting = None
+        template = build_map_game_template(map_id, map_territories, targeting)
+        with self._lock:
+            self._templates[map_id] = (source, template)
+        return template
+
+    def clear(self):
+        with self._lock:
+            self._templates.clear()
+
+
+map_game_template_cache = MapGameTemplateCache()
+
+
+def get_map_game_template(map_id: int, continents: Optional[Dict[str, Any]] = None) -> MapGameTemplate:
+    """Returns the cached game template of a map, see MapGameTemplate."""
+    return map_game_template_cache.get(map_id, continents)
@@ -7,7 +7,7 @@ from app.game_city.schemas import GameCityDetail, GameCityRepair, GameCityBase
 from typing import List, Optional
 from app.game_city.models import GameCity
 from app.attack_unit.models import AttackUnit
-from app.common.controllers import get_source_unit_count, update_unit_count
+from app.unit_deployment.controllers import update_unit_count
 
 # List cities with filters
 async def list_cities(game_id: int, player_id: int, game_territory_id: int, db: AsyncSession) -> List[GameCityBase]:
@@ -107,6 +107,8 @@ async def deploy_units_training_city(
 
     player.money -= total_cost
     await update_unit_count(city_id=city_id, player_id=player_id, attack_unit_id=attack_unit_id, count_delta=count, db=db)
+    await db.commit()
+    await db.refresh(city)
     return city
 
 # Redeploy units at city
@@ -119,15 +121,11 @@ async def deploy_units_redeployment_city(
     count: int,
     db: AsyncSession
 ):
-    """Redeploy units from another city or outpost to a city."""
-    # Validate source location and decrement source unit count
-    source_unit_count = await get_source_unit_count(player_id, attack_unit_id, source_city_id, source_outpost_id, db)
-    if source_unit_count < count:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Insufficient units at source")
-
-    # Decrement source and increment destination
+    """Redeploy units from another city or outpost to a city, both counts changing in one transaction."""
+    # Decrement source, which fails when it has too few units, and increment destination
     await update_unit_count(source_city_id, source_outpost_id, player_id, attack_unit_id, -count, db)
     await update_unit_count(city_id, None, player_id, attack_unit_id, count, db)
+    await db.commit()
 
     # Fetch updated city data
     city = await db.get(GameCity, city_id)
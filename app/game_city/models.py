@@ -1,12 +1,13 @@
 from sqlalchemy import Column, Integer, String, ForeignKey, Boolean, JSON
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, column_property
 from app.db.base_class import Base
+from app.unit_deployment.models import CITY_LOCATION, location_unit_deployment
 
 class GameCity(Base):
     __tablename__ = "game_cities"
     
     id = Column(Integer, primary_key=True, index=True)
-    game_id = Column(Integer, ForeignKey("game.id"), nullable=False)
+    game_id = Column(Integer, ForeignKey("games.id"), nullable=False)
     territory_id = Column(Integer, ForeignKey("game_territories.id"), nullable=False)
     name = Column(String, nullable=False)
     owner_id = Column(Integer, ForeignKey("players.id"), nullable=True)
@@ -14,7 +15,8 @@ class GameCity(Base):
     max_health_points = Column(Integer, nullable=False)
     is_capital = Column(Boolean, default=False)
     repair_cost = Column(Integer, nullable=False)
-    unit_deployment = Column(JSON, nullable=True, default=None)  # {player_id: {attack_unit_id: count}}
+    # {player_id: {attack_unit_id: count}}, read from unit_deployments
+    unit_deployment = column_property(location_unit_deployment(CITY_LOCATION, id))
 
     # Relationships
     territory = relationship("GameTerritory", back_populates="city")
@@ -85,9 +85,12 @@ async def create_game_defensive_building(
     player.money -= defensive_building_data.cost
 
     # Create GameDefensiveBuilding
+    # The building takes the location and the targeting paths of its slot, not the client's
     game_defensive_building = GameDefensiveBuilding(
         territory_id=game_territory.id,
-        **defensive_building_data.dict(),
+        **defensive_building_data.dict(exclude={'location', 'targeting_paths'}),
+        location=[int(coordinate) for coordinate in building_slot.location],
+        targeting_paths=building_slot.targeting_paths,
     )
     db.add(game_defensive_building)
 
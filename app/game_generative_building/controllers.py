@@ -39,9 +39,12 @@ async def create_game_generative_building(
         raise HTTPException(status_code=400, detail="Insufficient Funds")
 
     # Create GameGenerativeBuilding and update slot
+    # The building takes the location and the targeting paths of its slot, not the client's
     new_building = GameGenerativeBuilding(
         territory_id=slot.territory_id,
-        **create_data.dict(),
+        **create_data.dict(exclude={'location', 'targeting_paths'}),
+        location=[int(coordinate) for coordinate in slot.location],
+        targeting_paths=slot.targeting_paths,
     )
 
     db.add(new_building)
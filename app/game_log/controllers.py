@@ -0,0 +1,47 @@
+from datetime import datetime
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, insert, func, literal, literal_column, text, or_
+from app.game_log.models import GameLog
+from app.game_territory.models import GameTerritory
+from app.game_city.models import GameCity
+from app.building_slot.models import BuildingSlot
+from app.game_defensive_building.models import GameDefensiveBuilding
+from app.game_generative_building.models import GameGenerativeBuilding
+from app.game_outpost.models import GameOutpost
+from app.unit_deployment.models import UnitDeployment
+
+
+def game_rows_json(model, condition):
+    """Scalar subquery aggregating the rows of a table matching condition into a JSON array."""
+    return (select(func.coalesce(func.json_agg(literal_column(model.__tablename__)), text("'[]'::json")))
+            .select_from(model).where(condition).scalar_subquery())
+
+
+def game_snapshot(game_id: int):
+    """JSON object with the rows of every table holding the state of a game, built by the database."""
+    territory_ids = select(GameTerritory.id).where(GameTerritory.game_id == game_id)
+    return func.json_build_object(
+        'territories', game_rows_json(GameTerritory, GameTerritory.game_id == game_id),
+        'cities', game_rows_json(GameCity, GameCity.territory_id.in_(territory_ids)),
+        'building_slots', game_rows_json(BuildingSlot, BuildingSlot.territory_id.in_(territory_ids)),
+        'defensive_buildings', game_rows_json(GameDefensiveBuilding,
+                                              GameDefensiveBuilding.territory_id.in_(territory_ids)),
+        'generative_buildings', game_rows_json(GameGenerativeBuilding,
+                                               GameGenerativeBuilding.territory_id.in_(territory_ids)),
+        'outposts', game_rows_json(GameOutpost, or_(GameOutpost.territory1_id.in_(territory_ids),
+                                                    GameOutpost.territory2_id.in_(territory_ids))),
+        'unit_deployments', game_rows_json(UnitDeployment, UnitDeployment.game_id == game_id),
+    )
+
+
+async def archive_game(game_id: int, db: AsyncSession) -> int:
+    """
+    Archive the final state of a game into a new GameLog with a single INSERT ... SELECT, without committing.
+    The rows never leave the database. Returns the ID of the game log.
+    """
+    statement = insert(GameLog).from_select(
+        ['game_id', 'created_at', 'snapshot'],
+        select(literal(game_id), literal(datetime.utcnow()), game_snapshot(game_id))
+    ).returning(GameLog.id)
+    result = await db.execute(statement)
+    return result.scalar_one()
@@ -0,0 +1,11 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, JSON
+from app.db.base_class import Base
+
+class GameLog(Base):
+    __tablename__ = "game_logs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    game_id = Column(Integer, ForeignKey("games.id"), nullable=False, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    snapshot = Column(JSON, nullable=False)  # Final rows of the game, by table: {"territories": [...], ...}
@@ -5,7 +5,7 @@ from app.player.models import Player
 from app.game_outpost.schemas import GameOutpostBase
 from app.game.models import Game
 from fastapi import HTTPException, status
-from app.common.controllers import get_source_unit_count, update_unit_count
+from app.unit_deployment.controllers import update_unit_count
 from typing import List, Optional
 from app.attack_unit.models import AttackUnit
 
@@ -70,12 +70,9 @@ async def deploy_units_to_outpost(player_id: int, outpost_id: int, attack_unit_i
     await verify_outpost_deployment_access(player_id, outpost, db)
 
     # Deploy units
-    deployment = outpost.unit_deployment.get(str(player_id), {})
-    deployment[attack_unit_id] = deployment.get(attack_unit_id, 0) + count
-    outpost.unit_deployment[str(player_id)] = deployment
-
-    db.add(outpost)
+    await update_unit_count(outpost_id=outpost_id, player_id=player_id, attack_unit_id=attack_unit_id, count_delta=count, db=db)
     await db.commit()
+    await db.refresh(outpost)
     return outpost
 
 async def deploy_units_training_outpost(
@@ -101,6 +98,8 @@ async def deploy_units_training_outpost(
 
     player.money -= total_cost
     await update_unit_count(outpost_id=outpost_id, player_id=player_id, attack_unit_id=attack_unit_id, count_delta=count, db=db)
+    await db.commit()
+    await db.refresh(outpost)
     return outpost
 
 async def deploy_units_redeployment_outpost(
@@ -112,15 +111,11 @@ async def deploy_units_redeployment_outpost(
     count: int,
     db: AsyncSession
 ) -> GameOutpostBase:
-    """Redeploy units from another city or outpost to an outpost."""
-    # Validate source location and decrement source unit count
-    source_unit_count = await get_source_unit_count(player_id, attack_unit_id, source_city_id, source_outpost_id, db)
-    if source_unit_count < count:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Insufficient units at source")
-
-    # Decrement source and increment destination
+    """Redeploy units from another city or outpost to an outpost, both counts changing in one transaction."""
+    # Decrement source, which fails when it has too few units, and increment destination
     await update_unit_count(source_city_id, source_outpost_id, player_id, attack_unit_id, -count, db)
     await update_unit_count(None, outpost_id, player_id, attack_unit_id, count, db)
+    await db.commit()
 
     # Fetch updated outpost data
     outpost = await db.get(GameOutpost, outpost_id)
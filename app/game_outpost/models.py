@@ -1,6 +1,7 @@
 from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, JSON, ARRAY, Float
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, column_property
 from app.db.base_class import Base
+from app.unit_deployment.models import OUTPOST_LOCATION, location_unit_deployment
 
 class GameOutpost(Base):
     __tablename__ = "game_outposts"
@@ -14,7 +15,7 @@ class GameOutpost(Base):
     owner1_id = Column(Integer, ForeignKey("player.id"))
     owner2_id = Column(Integer, ForeignKey("player.id"))
     name = Column(String, nullable=False)
-    unit_deployment = Column(JSON)  # Player-specific troop counts
+    unit_deployment = column_property(location_unit_deployment(OUTPOST_LOCATION, id))  # Player-specific troop counts
     location = Column(ARRAY(Float))
     is_air = Column(Boolean, default=False)
     is_sea = Column(Boolean, default=False)
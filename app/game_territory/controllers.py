@@ -1,37 +1,28 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import delete
 from fastapi import HTTPException, status
 from app.game_territory.models import GameTerritory
-from app.game.models import Game
 from app.game_territory.schemas import GameTerritoryDetail, GameTerritoryBase
-from app.map.schemas import MapDetail
-from app.game_city.controllers import create_city, delete_city
-from typing import List
+from app.game_city.models import GameCity
+from app.game.templates import MapGameTemplate
+from app.common.controllers import bulk_insert
+from typing import List, Dict, Any
 
 
-async def create_game_territories(game_id: int, map_data: MapDetail, db: AsyncSession) -> List[GameTerritoryBase]:
-    # Create GameTerritory instances based on map's territories
-    territories = [
-        GameTerritory(
-            game_id=game_id,
-            map_id=map_data.id,
-            territory_id=territory_data["id"],
-            adjacent_territories=territory_data["adjacent_territories"],
-            continent_id=territory_data.get("continent_id"),
-            money_per_turn=territory_data.get("money_per_turn", 100),
-            location=territory_data.get("location", [0.0, 0.0])  # Default to [0.0, 0.0] if not specified
-        )
-        for continent in map_data.continents for territory_data in continent.territories
-    ]
+async def create_game_territories(game_id: int, template: MapGameTemplate, db: AsyncSession) -> Dict[int, int]:
+    """
+    Insert the territories of a new game and their cities from the map's template, with one multi-row INSERT
+    each, without committing. Returns the game territory IDs indexed by map territory ID.
+    """
+    territories = [{**territory, 'game_id': game_id} for territory in template.territories]
+    game_territory_ids = dict(await bulk_insert(db, GameTerritory, territories,
+                                                returning=(GameTerritory.territory_id, GameTerritory.id)))
 
-    db.add_all(territories)
-    await db.commit()
-
-    # Create cities for each territory
-    for territory in territories:
-        await create_city(territory_id=territory.id, name="City of " + territory.name,
-                          max_health_points=100, repair_cost=10, db=db)
+    # One city per territory
+    cities = [{**city, 'game_id': game_id, 'territory_id': game_territory_ids[territory['territory_id']]}
+              for territory, city in zip(template.territories, template.cities)]
+    await bulk_insert(db, GameCity, cities)
+    return game_territory_ids
 
 
 async def get_game_territories(game_id: int, db: AsyncSession) -> List[GameTerritoryDetail]:
@@ -62,21 +53,3 @@ async def set_territory_as_capital(territory_id: int, user_id: int, db: AsyncSes
     territory.is_capital = True
     await db.commit()
     return {"detail": f"Territory {territory_id} set as capital."}
-
-
-async def delete_game_territories_on_game_end(game_id: int, db: AsyncSession):
-    """Delete GameTerritories when a non-replayable game ends."""
-    result = await db.execute(select(Game).filter(Game.id == game_id))
-    game = result.scalar_one_or_none()
-
-    if not game or not game.replayable:
-        # Delete cities before deleting territories
-        territories = await db.execute(select(GameTerritory).where(GameTerritory.game_id == game_id))
-        territories = territories.scalars().all()
-        
-        for territory in territories:
-            await delete_city(territory.city.id, db)
-        
-        await db.execute(delete(GameTerritory).where(GameTerritory.game_id == game_id))
-        await db.commit()
-
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, ARRAY
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, ARRAY, Float
 from sqlalchemy.orm import relationship
 from app.db.base_class import Base
 
@@ -16,7 +16,7 @@ class GameTerritory(Base):
     is_alien_tech = Column(Boolean, default=False)
     is_scorched_earth = Column(Boolean, default=False)
     money_per_turn = Column(Integer, default=100)
-    city_location = Column(ARRAY(float)) 
+    city_location = Column(ARRAY(Float))
     adjacent_territories = Column(ARRAY(Integer))
     defensive_buildings = Column(ARRAY(Integer))
     num_building_slots = Column(Integer, default=0)
@@ -1,10 +1,11 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from app.hero.models import Hero
-from typing import Optional, List
+from typing import Optional, List, Dict, Any
 from fastapi import HTTPException
 from app.hero.models import Hero
 from app.common.controllers import verify_admin_access
+from app.common.catalog_cache import get_catalog_cache, catalog_row, HEROES_CATALOG
 from app.hero.schemas import HeroResponse
 
 
@@ -14,6 +15,7 @@ async def create_hero(token: str, db: AsyncSession, hero_data: dict):
     new_hero = Hero(**hero_data)
     db.add(new_hero)
     await db.commit()
+    await get_catalog_cache().invalidate(HEROES_CATALOG)
     await db.refresh(new_hero)
     return HeroResponse.from_orm(new_hero)
 
@@ -27,6 +29,7 @@ async def update_hero(token: str, db: AsyncSession, id: int, hero_data: dict):
     for key, value in hero_data.items():
         setattr(hero, key, value)
     await db.commit()
+    await get_catalog_cache().invalidate(HEROES_CATALOG)
     await db.refresh(hero)
     return HeroResponse.from_orm(hero)
 
@@ -39,25 +42,40 @@ async def delete_hero(token: str, db: AsyncSession, id: int):
         raise HTTPException(status_code=404, detail="Hero not found")
     await db.delete(hero)
     await db.commit()
+    await get_catalog_cache().invalidate(HEROES_CATALOG)
     return {"detail": "Hero deleted successfully!"}
 
 
-# Controller to handle hero retrieval with pagination and filters
+# Controller to handle hero retrieval with pagination and filters, served from the catalog cache
 async def list_heroes(
     db: AsyncSession,
     cursor: Optional[int] = None,
     limit: int = 10,
     rarity: Optional[str] = None
-) -> List[Hero]:
-    query = select(Hero).order_by(Hero.id).limit(limit)
+) -> List[Dict[str, Any]]:
+    async def load():
+        query = select(Hero).order_by(Hero.id).limit(limit)
 
-    # Apply cursor (pagination)
-    if cursor:
-        query = query.where(Hero.id > cursor)
+        # Apply cursor (pagination)
+        if cursor:
+            query = query.where(Hero.id > cursor)
 
-    # Apply filters
-    if rarity:
-        query = query.where(Hero.rarity == rarity)
+        # Apply filters
+        if rarity:
+            query = query.where(Hero.rarity == rarity)
 
-    result = await db.execute(query)
-    return result.scalars().all()
+        result = await db.execute(query)
+        return [catalog_row(hero) for hero in result.scalars().all()]
+
+    return await get_catalog_cache().get_or_load(HEROES_CATALOG, f"list:{cursor}:{limit}:{rarity}", load)
+
+
+# Controller to retrieve a hero, served from the catalog cache
+async def get_hero(db: AsyncSession, id: int) -> Dict[str, Any]:
+    async def load():
+        hero = await db.get(Hero, id)
+        if not hero:
+            raise HTTPException(status_code=404, detail="Hero not found")
+        return catalog_row(hero)
+
+    return await get_catalog_cache().get_or_load(HEROES_CATALOG, f"detail:{id}", load)
@@ -1,9 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.session import get_db
-from app.hero.models import Hero
 from app.hero.schemas import HeroCreate, HeroUpdate, HeroResponse
-from app.hero.controllers import list_heroes, create_hero, update_hero, delete_hero
+from app.hero.controllers import list_heroes, get_hero as get_hero_detail, create_hero, update_hero, delete_hero
 from typing import Optional
 from fastapi.security import OAuth2PasswordBearer
 
@@ -26,10 +25,7 @@ async def get_heroes(
 # GET hero by ID
 @router.get("/{id}", response_model=HeroResponse)
 async def get_hero(id: int, db: AsyncSession = Depends(get_db)):
-    hero = await db.get(Hero, id)
-    if not hero:
-        raise HTTPException(status_code=404, detail="Hero not found")
-    return hero
+    return await get_hero_detail(db, id)
 
 
 # POST create hero (admin access only)
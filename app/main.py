@@ -11,6 +11,8 @@ from app.init_data.generative_buildings import load_generative_buildings
 from app.init_data.attack_units import load_attack_units
 from app.init_data.users import load_users
 from app.init_data.maps import load_maps
+from app.simulation_scenarios.executor import shutdown_simulation_executor
+from app.authentication.password_hashing import shutdown_password_hasher
 
 app = FastAPI(
     title="Conqueria Caps Backend",
@@ -90,6 +92,12 @@ app.openapi = custom_openapi
 #         await load_maps(db)
 
 
+@app.on_event("shutdown")
+def shutdown_event():
+    shutdown_simulation_executor()
+    shutdown_password_hasher()
+
+
 @app.get("/")
 def read_root():
     return {"message": "Welcome to the Strategy Board Game!"}
@@ -0,0 +1,281 @@
+import argparse
+import json
+import os
+import threading
+import numpy as np
+from typing import List, Dict, Any, Optional
+
+MAPS_DIRECTORY = os.path.join('assets', 'maps')
+BUNDLE_MAGIC = b'CQMAP\x00\x02\x00'  # Version 2 stores the positions as float64
+BUNDLE_ALIGNMENT = 64
+
+
+def map_json_path(map_id: int, maps_directory: str = MAPS_DIRECTORY) -> str:
+    return os.path.join(maps_directory, f'map{map_id}.json')
+
+
+def map_bundle_path(map_id: int, maps_directory: str = MAPS_DIRECTORY) -> str:
+    return os.path.join(maps_directory, f'map{map_id}.bundle')
+
+
+def iter_map_territories(continents: Dict[str, Any]):
+    """Yields (continent_id, territory_id, territory_info) for every territory of a map's continents JSON."""
+    for continent_id, continent_info in continents.items():
+        for territory_id, territory_info in continent_info.get('continent_territories', {}).items():
+            yield int(continent_id), int(territory_id), territory_info
+
+
+def compile_map_bundle(json_path: str, bundle_path: Optional[str] = None) -> str:
+    """
+    Compiles a map JSON file into a binary map bundle.
+
+    The bundle starts with a magic number and the length of a small JSON header holding the map metadata and
+    the layout of the arrays, followed by the arrays themselves, each aligned to 64 bytes:
+    - path_ids, path_offsets, path_points: float64 (x, y, angle) table of every path, rows grouped by path.
+    - territory_ids, adjacency_offsets, adjacency: territory adjacency lists.
+    - slot_ids, slot_territory_ids, slot_locations: float64 building-slot locations.
+    - targeting_offsets, targeting_path_ids, targeting_lengths: targeting_path_ids of every building slot.
+    - table_*: the targeting table of the map, see MapTargetingTable.
+
+    Positions keep the float64 precision of the JSON, so seeded simulations give the same results whether the
+    map is loaded from its bundle or its JSON file, and cached results do not depend on it.
+
+    Parameters:
+    - json_path: Path of the map JSON file.
+    - bundle_path: Path of the bundle to write, next to the JSON file by default.
+
+    Returns:
+    - The path of the written bundle.
+    """
+    if bundle_path is None:
+        bundle_path = os.path.splitext(json_path)[0] + '.bundle'
+
+    with open(json_path, 'r') as f:
+        map_data = json.load(f)
+
+    territories, paths = [], []
+    path_ids, path_offsets, path_points = [], [0], []
+    territory_ids, adjacency_offsets, adjacency = [], [0], []
+    slot_ids, slot_territory_ids, slot_locations = [], [], []
+    targeting_offsets, targeting_path_ids, targeting_lengths = [0], [], []
+
+    for continent_id, territory_id, territory_info in iter_map_territories(map_data.get('continents', {})):
+        territories.append({
+            'id': territory_id,
+            'continent_id': continent_id,
+            'name': territory_info.get('name'),
+            'location': territory_info.get('location'),
+            'is_alien': territory_info.get('is_alien', False),
+        })
+        territory_ids.append(territory_id)
+        adjacency.extend(territory_info.get('adjacent_territories', []))
+        adjacency_offsets.append(len(adjacency))
+
+        for slot_id, slot_info in territory_info.get('building_slots', {}).items():
+            slot_ids.append(int(slot_id))
+            slot_territory_ids.append(territory_id)
+            slot_locations.append(slot_info['location'])
+            for path_id, target_length in slot_info.get('targeting_path_ids', {}).items():
+                targeting_path_ids.append(int(path_id))
+                targeting_lengths.append(target_length)
+            targeting_offsets.append(len(targeting_path_ids))
+
+        for path_id, path_info in territory_info.get('paths', {}).items():
+            paths.append({key: value for key, value in path_info.items() if key != 'points'})
+            paths[-1].update(path_id=int(path_id), territory_id=territory_id)
+            path_ids.append(int(path_id))
+            path_points.extend([point['x'], point['y'], point.get('angle', 0)] for point in path_info['points'])
+            path_offsets.append(len(path_points))
+
+    arrays = {
+        'path_ids': np.array(path_ids, dtype=np.int32),
+        'path_offsets': np.array(path_offsets, dtype=np.int64),
+        'path_points': np.array(path_points, dtype=np.float64).reshape(-1, 3),
+        'territory_ids': np.array(territory_ids, dtype=np.int32),
+        'adjacency_offsets': np.array(adjacency_offsets, dtype=np.int64),
+        'adjacency': np.array(adjacency, dtype=np.int32),
+        'slot_ids': np.array(slot_ids, dtype=np.int32),
+        'slot_territory_ids': np.array(slot_territory_ids, dtype=np.int32),
+        'slot_locations': np.array(slot_locations, dtype=np.float64).reshape(-1, 2),
+        'targeting_offsets': np.array(targeting_offsets, dtype=np.int64),
+        'targeting_path_ids': np.array(targeting_path_ids, dtype=np.int32),
+        'targeting_lengths': np.array(targeting_lengths, dtype=np.float64),
+    }
+
+    # Imported here, the simulation path cache imports this module
+    from app.simulation_scenarios.targeting import compute_map_targeting_table
+    rows = np.split(arrays['path_points'][:, :2], arrays['path_offsets'][1:-1])
+    targeting = compute_map_targeting_table(arrays['slot_ids'], arrays['slot_locations'],
+                                            dict(zip(path_ids, rows)))
+    arrays.update(targeting.arrays())
+
+    # Array offsets are relative to the start of the data section, which follows the aligned header
+    layout, offset = {}, 0
+    for name, array in arrays.items():
+        layout[name] = {'offset': offset, 'dtype': array.dtype.str, 'shape': list(array.shape)}
+        offset += -(-array.nbytes // BUNDLE_ALIGNMENT) * BUNDLE_ALIGNMENT
+
+    header = {
+        'map': {key: value for key, value in map_data.items() if key != 'continents'},
+        'territories': territories,
+        'paths': paths,
+        'arrays': layout,
+    }
+    header_bytes = json.dumps(header).encode('utf-8')
+    data_start = -(-(len(BUNDLE_MAGIC) + 8 + len(header_bytes)) // BUNDLE_ALIGNMENT) * BUNDLE_ALIGNMENT
+
+    # Write to a temporary file first, so servers never map a partially written bundle
+    temporary_path = bundle_path + '.tmp'
+    with open(temporary_path, 'wb') as f:
+        f.write(BUNDLE_MAGIC)
+        f.write(len(header_bytes).to_bytes(8, 'little'))
+        f.write(header_bytes)
+        for name, array in arrays.items():
+            f.seek(data_start + layout[name]['offset'])
+            f.write(np.ascontiguousarray(array).tobytes())
+        f.truncate(data_start + offset)
+    os.replace(temporary_path, bundle_path)
+    return bundle_path
+
+
+class MapBundle:
+    """
+    Read-only view of a compiled map bundle.
+
+    The file is memory-mapped, so every worker process shares the same page-cache copy of the path tables.
+    All arrays are views into the mapping.
+    """
+
+    def __init__(self, bundle_path: str):
+        self.bundle_path = bundle_path
+        self._mapping = np.memmap(bundle_path, dtype=np.uint8, mode='r')
+        if bytes(self._mapping[:len(BUNDLE_MAGIC)]) != BUNDLE_MAGIC:
+            raise ValueError(f"{bundle_path} is not a map bundle of this version, recompile it.")
+
+        header_start = len(BUNDLE_MAGIC) + 8
+        header_length = int.from_bytes(bytes(self._mapping[len(BUNDLE_MAGIC):header_start]), 'little')
+        header = json.loads(bytes(self._mapping[header_start:header_start + header_length]).decode('utf-8'))
+        data_start = -(-(header_start + header_length) // BUNDLE_ALIGNMENT) * BUNDLE_ALIGNMENT
+
+        self.map_info: Dict[str, Any] = header['map']
+        self.territories: List[Dict[str, Any]] = header['territories']
+        self.paths: List[Dict[str, Any]] = header['paths']
+        self.arrays: Dict[str, np.ndarray] = {}
+        for name, spec in header['arrays'].items():
+            dtype = np.dtype(spec['dtype'])
+            start = data_start + spec['offset']
+            size = int(np.prod(spec['shape'])) * dtype.itemsize
+            self.arrays[name] = self._mapping[start:start + size].view(dtype).reshape(spec['shape'])
+
+        self._path_rows = {int(path_id): row for row, path_id in enumerate(self.arrays['path_ids'])}
+
+    @property
+    def path_ids(self) -> List[int]:
+        return list(self._path_rows)
+
+    def path_points(self, path_id: int) -> np.ndarray:
+        """Returns the float64 (x, y, angle) rows of a path."""
+        row = self._path_rows[path_id]
+        offsets = self.arrays['path_offsets']
+        return self.arrays['path_points'][offsets[row]:offsets[row + 1]]
+
+    def map_territories(self) -> List[Dict[str, Any]]:
+        """Returns the territories of the map in the same layout as map_territories_from_json."""
+        adjacency_offsets = self.arrays['adjacency_offsets']
+        adjacency = self.arrays['adjacency']
+        slot_territory_ids = self.arrays['slot_territory_ids']
+        targeting_offsets = self.arrays['targeting_offsets']
+
+        territories = []
+        for row, territory in enumerate(self.territories):
+            building_slots = []
+            for slot_row in np.flatnonzero(slot_territory_ids == territory['id']):
+                start, end = targeting_offsets[slot_row], targeting_offsets[slot_row + 1]
+                building_slots.append({
+                    'id': int(self.arrays['slot_ids'][slot_row]),
+                    'location': self.arrays['slot_locations'][slot_row].tolist(),
+                    'targeting_path_ids': dict(zip(self.arrays['targeting_path_ids'][start:end].tolist(),
+                                                   self.arrays['targeting_lengths'][start:end].tolist())),
+                })
+            territories.append({
+                **territory,
+                'adjacent_territories': adjacency[adjacency_offsets[row]:adjacency_offsets[row + 1]].tolist(),
+                'building_slots': building_slots,
+            })
+        return territories
+
+
+_bundles: Dict[str, tuple] = {}
+_bundles_lock = threading.Lock()
+
+
+def load_map_bundle(map_id: int, maps_directory: str = MAPS_DIRECTORY) -> Optional[MapBundle]:
+    """
+    Returns the memory-mapped bundle of a map, or None when the map has not been compiled.
+
+    Bundles are opened once per process and reopened when the file is replaced.
+    """
+    bundle_path = map_bundle_path(map_id, maps_directory)
+    try:
+        mtime = os.path.getmtime(bundle_path)
+    except FileNotFoundError:
+        return None
+
+    with _bundles_lock:
+        cached = _bundles.get(bundle_path)
+        if cached is None or cached[0] != mtime:
+            cached = (mtime, MapBundle(bundle_path))
+            _bundles[bundle_path] = cached
+        return cached[1]
+
+
+def map_territories_from_json(continents: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Flattens the continents JSON of a map into a list of territories.
+
+    Each territory holds its id, continent_id, name, location, is_alien, adjacent_territories and a list of
+    building slots with their id, location and targeting_path_ids.
+    """
+    territories = []
+    for continent_id, territory_id, territory_info in iter_map_territories(continents):
+        territories.append({
+            'id': territory_id,
+            'continent_id': continent_id,
+            'name': territory_info.get('name'),
+            'location': territory_info.get('location'),
+            'is_alien': territory_info.get('is_alien', False),
+            'adjacent_territories': territory_info.get('adjacent_territories', []),
+            'building_slots': [
+                {
+                    'id': int(slot_id),
+                    'location': slot_info['location'],
+                    'targeting_path_ids': {int(path_id): target_length for path_id, target_length
+                                           in slot_info.get('targeting_path_ids', {}).items()},
+                }
+                for slot_id, slot_info in territory_info.get('building_slots', {}).items()
+            ],
+        })
+    return territories
+
+
+def get_map_territories(map_id: int, continents: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """
+    Returns the territories of a map, from its compiled bundle when it exists.
+
+    Falls back to the given continents JSON, or to the map JSON file when no continents are given.
+    """
+    bundle = load_map_bundle(map_id)
+    if bundle is not None:
+        return bundle.map_territories()
+    if continents is None:
+        with open(map_json_path(map_id), 'r') as f:
+            continents = json.load(f).get('continents', {})
+    return map_territories_from_json(continents)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compile map JSON files into memory-mappable map bundles.")
+    parser.add_argument('json_paths', nargs='+', help="Map JSON files, e.g. assets/maps/map1.json")
+    for json_path in parser.parse_args().json_paths:
+        bundle_path = compile_map_bundle(json_path)
+        print(f"{json_path} -> {bundle_path} ({os.path.getsize(bundle_path)} bytes)")
@@ -2,6 +2,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from fastapi import HTTPException, status
 from app.common.controllers import paginate_cursor
+from app.common.catalog_cache import get_catalog_cache, MAPS_CATALOG
 from app.map.models import Map
 from app.map.schemas import (
     MapCreate, 
@@ -29,14 +30,19 @@ async def create_map(map_data: MapCreate, db: AsyncSession):
     new_map = Map(**map_data.dict())
     db.add(new_map)
     await db.commit()
+    await get_catalog_cache().invalidate(MAPS_CATALOG)
     await db.refresh(new_map)
     return MapDetail.from_orm(new_map)
 
 async def get_map(map_id: int, db: AsyncSession):
-    map = await db.get(Map, map_id)
-    if not map:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Map not found")
-    return MapDetail.from_orm(map)
+    async def load():
+        map = await db.get(Map, map_id)
+        if not map:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Map not found")
+        return MapDetail.from_orm(map)
+
+    # Served from the catalog cache, invalidated by the map controllers below
+    return await get_catalog_cache().get_or_load(MAPS_CATALOG, f"detail:{map_id}", load)
 
 async def update_map(map_id: int, map_data: MapUpdate, db: AsyncSession):
     map = await db.get(Map, map_id)
@@ -45,6 +51,7 @@ async def update_map(map_id: int, map_data: MapUpdate, db: AsyncSession):
     for field, value in map_data:
         setattr(map, field, value)
     await db.commit()
+    await get_catalog_cache().invalidate(MAPS_CATALOG)
     await db.refresh(map)
     return MapDetail.from_orm(map)
 
@@ -54,4 +61,5 @@ async def delete_map(map_id: int, db: AsyncSession):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Map not found")
     await db.delete(map)
     await db.commit()
+    await get_catalog_cache().invalidate(MAPS_CATALOG)
     return MapDetail.from_orm(map)
@@ -0,0 +1,136 @@
+import copy
+import os
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from fastapi import HTTPException
+from typing import List, Dict, Any, Optional
+from ..simulation_scenarios.schemas import (
+    SimulationBatchResult,
+    DistributionSummary,
+    TurretOutcome,
+    GenerativeBuildingOutcome,
+)
+from ..simulation_scenarios.controllers import resolve_seed
+from ..simulation_scenarios.engines import SIMULATION_ENGINES, get_simulation_engine
+
+MAX_BATCH_RUNS = 10000
+REPLICA_CHUNKS_PER_WORKER = 4  # Chunks per worker, to balance uneven replica durations
+QUANTILES = (5, 25, 50, 75, 95)
+
+
+def run_replicas(engine: str, simulation_input: Dict[str, Any], seeds: List[int]) -> List[Dict[str, Any]]:
+    """
+    Runs one replica of the attack simulation per seed, without recording events.
+
+    Returns the final state of every replica: troops_at_end, the hp of every turret and the hp of every
+    generative building.
+    """
+    outcomes = []
+    for seed in seeds:
+        simulation_data = SIMULATION_ENGINES[engine](**copy.deepcopy(simulation_input), seed=seed,
+                                                     event_format='none')
+        outcomes.append({
+            'troops_at_end': simulation_data.troops_at_end,
+            'turrets': {turret['id']: (turret['defensive_building_id'], turret['hp'])
+                        for turret in simulation_data.turret_info},
+            'generative_buildings': {str(building_id): float(building['hp']) for building_id, building
+                                     in simulation_data.buildings_data.get('generative_buildings', {}).items()},
+        })
+    return outcomes
+
+
+def summarize_distribution(values: List[float]) -> DistributionSummary:
+    values = np.asarray(values, dtype=np.float64)
+    quantiles = np.percentile(values, QUANTILES)
+    return DistributionSummary(
+        mean=values.mean(),
+        std=values.std(),
+        min=values.min(),
+        max=values.max(),
+        **{f'p{q}': value for q, value in zip(QUANTILES, quantiles)}
+    )
+
+
+def summarize_replicas(engine: str, seed: int, outcomes: List[Dict[str, Any]]) -> SimulationBatchResult:
+    """Aggregates the final states of the replicas into outcome distributions."""
+    troops_at_end = {
+        territory_id: {
+            attack_unit_id: summarize_distribution([outcome['troops_at_end'][territory_id][attack_unit_id]
+                                                    for outcome in outcomes])
+            for attack_unit_id in units
+        }
+        for territory_id, units in outcomes[0]['troops_at_end'].items()
+    }
+
+    turrets = {}
+    for turret_id, (defensive_building_id, _) in outcomes[0]['turrets'].items():
+        hp = np.array([outcome['turrets'][turret_id][1] for outcome in outcomes], dtype=np.float64)
+        turrets[turret_id] = TurretOutcome(
+            defensive_building_id=defensive_building_id,
+            survival_probability=float(np.mean(hp > 0)),
+            hp=summarize_distribution(hp)
+        )
+
+    generative_buildings = {}
+    for building_id in outcomes[0]['generative_buildings']:
+        hp = np.array([outcome['generative_buildings'][building_id] for outcome in outcomes], dtype=np.float64)
+        generative_buildings[building_id] = GenerativeBuildingOutcome(
+            destroyed_probability=float(np.mean(hp <= 0)),
+            hp=summarize_distribution(hp)
+        )
+
+    return SimulationBatchResult(
+        engine=engine,
+        runs=len(outcomes),
+        seed=seed,
+        troops_at_end=troops_at_end,
+        turrets=turrets,
+        generative_buildings=generative_buildings
+    )
+
+
+def validate_batch(engine: str, runs: int):
+    """Raises a 400 HTTPException for an unknown engine or a number of runs out of range."""
+    get_simulation_engine(engine)
+    if not 0 < runs <= MAX_BATCH_RUNS:
+        raise HTTPException(status_code=400, detail=f"runs must be between 1 and {MAX_BATCH_RUNS}.")
+
+
+def simulate_attack_batch(engine: str,
+                          simulation_input: Dict[str, Any],
+                          runs: int,
+                          seed: Optional[int] = None,
+                          max_workers: Optional[int] = None) -> SimulationBatchResult:
+    """
+    Runs a Monte Carlo batch of the attack simulation and returns the outcome distributions.
+
+    Parameters:
+    - engine: Name of the simulation engine, see SIMULATION_ENGINES.
+    - simulation_input: Keyword arguments of the simulation function (game_defensive_buildings, attacks,
+      attack_unit_types, buildings_data, map_id).
+    - runs: Number of replicas.
+    - seed: Seed of the first replica, replica i runs with seed + i. A random seed is drawn if None.
+    - max_workers: Number of worker processes, all cores by default. Replicas run in-process with 1 worker.
+
+    Returns:
+    - SimulationBatchResult with the distributions of troops_at_end, turret survival and generative
+      building hp.
+    """
+    validate_batch(engine, runs)
+    seed = resolve_seed(seed)
+    seeds = [seed + i for i in range(runs)]
+
+    max_workers = max(1, min(max_workers or os.cpu_count() or 1, runs))
+    if max_workers == 1:
+        outcomes = run_replicas(engine, simulation_input, seeds)
+    else:
+        n_chunks = min(runs, max_workers * REPLICA_CHUNKS_PER_WORKER)
+        chunks = [seeds[i::n_chunks] for i in range(n_chunks)]
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            chunk_outcomes = list(executor.map(run_replicas, [engine] * n_chunks, [simulation_input] * n_chunks, chunks))
+        # Put the replicas back in seed order
+        outcomes = [None] * runs
+        for i, chunk in enumerate(chunk_outcomes):
+            outcomes[i::n_chunks] = chunk
+
+    return summarize_replicas(engine, seed, outcomes)
@@ -0,0 +1,355 @@
+import argparse
+import copy
+import json
+import math
+import multiprocessing
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+from dataclasses import dataclass, field, asdict
+from typing import List, Dict, Any, Optional
+from ..simulation_scenarios.controllers import (
+    simulate_flamethrower_scenario,
+    simulate_gunner_scenario,
+    get_map_paths_data,
+)
+from ..simulation_scenarios.engines import SIMULATION_ENGINES, SIMULATION_ENGINE_VERSION
+from ..simulation_scenarios.path_cache import map_path_cache, get_map_paths, get_map_targeting
+from ..game_defensive_building.schemas import GameDefensiveBuildingBase
+from ..attack_unit.schemas import AttackUnitSimResponse
+
+SAMPLE_INPUTS_PATH = os.path.join('app', 'simulation_scenarios', 'sample_inputs.json')
+BENCHMARK_HISTORY_PATH = os.path.join('benchmarks', 'simulation_history.json')
+BENCHMARK_SEED = 0
+SYNTHETIC_MAP_ID = 0
+SYNTHETIC_PATH_LENGTH = 3000  # Map units from the outposts to the city
+DEFAULT_CASE_TIMEOUT = 300  # Wall seconds before a case is reported as timed out
+
+# Sweeps of every preset: troop counts at 10 turrets on 4 paths, turret counts at 1000 troops on 4 paths and
+# path counts at 1000 troops and 20 turrets
+BENCHMARK_PRESETS = {
+    'quick': {'troops': (10, 100, 1000), 'turrets': (1, 10, 50), 'paths': (1, 4)},
+    'full': {'troops': (10, 100, 1000, 10000, 50000), 'turrets': (1, 10, 50, 200), 'paths': (1, 4, 16)},
+}
+
+
+@dataclass
+class BenchmarkCase:
+    name: str
+    kind: str  # 'attack', 'flamethrower', 'gunner' or 'map_paths'
+    engine: Optional[str] = None
+    params: Dict[str, Any] = field(default_factory=dict)
+
+
+def synthetic_map(n_paths: int, n_slots: int) -> Dict[str, Any]:
+    """
+    Returns a map JSON with n_paths wavy paths running from the outposts on the left to the city on the right,
+    and n_slots building slots spread along them, alternately above and below the paths.
+    """
+    x = np.linspace(0, SYNTHETIC_PATH_LENGTH, 20)
+    paths = {}
+    for p in range(n_paths):
+        y = 400 + 500 * p + 80 * np.sin(x / 300 + p)
+        paths[str(p + 1)] = {'points': [{'x': float(px), 'y': float(py), 'angle': 0} for px, py in zip(x, y)]}
+
+    building_slots = {}
+    slots_per_path = math.ceil(n_slots / n_paths)
+    for k in range(n_slots):
+        p, i = k % n_paths, k // n_paths
+        slot_x = int(SYNTHETIC_PATH_LENGTH * (i + 1) / (slots_per_path + 1))
+        slot_y = int(400 + 500 * p + (150 if i % 2 else -150))
+        building_slots[str(k + 1)] = {'location': [slot_x, slot_y], 'targeting_path_ids': {str(p + 1): 0}}
+
+    return {'continents': {'1': {'continent_territories': {'1': {
+        'name': 'Synthetic', 'location': [0, 0], 'adjacent_territories': [],
+        'building_slots': building_slots, 'paths': paths,
+    }}}}}
+
+
+def load_sample_inputs() -> Dict[str, Any]:
+    with open(SAMPLE_INPUTS_PATH, 'r') as f:
+        return json.load(f)['simulation_generalized'][0]
+
+
+def sample_attack() -> Dict[str, Any]:
+    """Returns the generalized sample attack parsed like the /simulate/attack_generalized route does."""
+    sample = load_sample_inputs()
+    return {
+        'game_defensive_buildings': [GameDefensiveBuildingBase(**b) for b in sample['game_defensive_buildings']],
+        'attacks': sample['attacks'],
+        'attack_unit_types': [AttackUnitSimResponse(**u) for u in sample['attack_unit_types']],
+        'buildings_data': {key: {int(k): v for k, v in data.items()} for key, data in sample['buildings_data'].items()},
+        'map_id': 1,
+    }
+
+
+def synthetic_attack(map_data: Dict[str, Any], n_troops: int) -> Dict[str, Any]:
+    """
+    Returns an attack on a synthetic map with a turret on every building slot, single-target and flamethrower
+    turrets taken from the sample, and n_troops sample troops split over the paths. Troops attack the city or the
+    first turret next to their path.
+    """
+    sample = load_sample_inputs()
+    territory = map_data['continents']['1']['continent_territories']['1']
+    templates = sample['game_defensive_buildings']
+
+    game_defensive_buildings, first_turret_by_path = [], {}
+    for slot_id, slot_info in territory['building_slots'].items():
+        turret_id = int(slot_id)
+        template = templates[1] if turret_id % 5 == 0 else templates[0]  # Every fifth turret is a flamethrower
+        game_defensive_buildings.append(GameDefensiveBuildingBase(**{**template, 'id': turret_id,
+                                                                     'location': slot_info['location']}))
+        first_turret_by_path.setdefault(int(next(iter(slot_info['targeting_path_ids']))), turret_id)
+
+    path_ids = sorted(int(path_id) for path_id in territory['paths'])
+    attacks = []
+    for p, path_id in enumerate(path_ids):
+        count = n_troops // len(path_ids) + (1 if p < n_troops % len(path_ids) else 0)
+        if count == 0:
+            continue
+        targets = {'1': {'type': 1, 'id': 1}}
+        if path_id in first_turret_by_path:
+            targets = {'0.6': {'type': 1, 'id': 1}, '0.4': {'type': 2, 'id': first_turret_by_path[path_id]}}
+        attacks.append({'path_id': path_id, 'territory_id': 1, 'outpost_id': p + 1, 'attack_units': {
+            str(p % 4 + 1): {'count': count, 'overall_delay': 0, 'unit_delay': 0.1, 'targets': targets},
+        }})
+
+    return {
+        'game_defensive_buildings': game_defensive_buildings,
+        'attacks': attacks,
+        'attack_unit_types': [AttackUnitSimResponse(**u) for u in sample['attack_unit_types']],
+        'buildings_data': {
+            'cities': {1: {'hp': '400', 'max_hp': '400'}},
+            'generative_buildings': {},
+            'defensive_buildings': {b.id: {'hp': str(b.health_points), 'max_hp': str(b.max_health_points)}
+                                    for b in game_defensive_buildings},
+        },
+        'map_id': SYNTHETIC_MAP_ID,
+    }
+
+
+def benchmark_cases(preset: str = 'quick', engines: Optional[List[str]] = None) -> List[BenchmarkCase]:
+    """Returns the cases of a preset: the sample attack and the sweeps for every engine, then the scenarios."""
+    sweeps = BENCHMARK_PRESETS[preset]
+    cases = []
+    for engine in engines or list(SIMULATION_ENGINES):
+        cases.append(BenchmarkCase(f'sample/{engine}', 'attack', engine, {'sample': True}))
+        for n_troops in sweeps['troops']:
+            cases.append(BenchmarkCase(f'troops={n_troops}/{engine}', 'attack', engine,
+                                       {'troops': n_troops, 'turrets': 10, 'paths': 4}))
+        for n_turrets in sweeps['turrets']:
+            cases.append(BenchmarkCase(f'turrets={n_turrets}/{engine}', 'attack', engine,
+                                       {'troops': 1000, 'turrets': n_turrets, 'paths': 4}))
+        for n_paths in sweeps['paths']:
+            cases.append(BenchmarkCase(f'paths={n_paths}/{engine}', 'attack', engine,
+                                       {'troops': 1000, 'turrets': 20, 'paths': n_paths}))
+    cases.append(BenchmarkCase('flamethrower', 'flamethrower'))
+    cases.append(BenchmarkCase('gunner', 'gunner'))
+    cases.append(BenchmarkCase('map_paths/cold', 'map_paths', params={'map_id': 1, 'warm': False}))
+    cases.append(BenchmarkCase('map_paths/warm', 'map_paths', params={'map_id': 1, 'warm': True}))
+    return cases
+
+
+def count_events(result) -> int:
+    return sum(len(value) for name, value in result if name.endswith('_events') and isinstance(value, list))
+
+
+def run_case(case: BenchmarkCase, trace_allocations: bool = True) -> Dict[str, Any]:
+    """
+    Runs a case in the current process and returns its measurements:
+    - wall_time: seconds of the timed run. Map paths and targeting tables are loaded beforehand, except for the
+      cold map_paths case.
+    - events, events_per_second: events recorded by the run.
+    - peak_rss_kb, rss_growth_kb: peak resident set size of the process after the run, and its growth during it.
+    - alloc_peak_bytes: peak of the Python allocations traced over a second, untimed run.
+    """
+    maps_directory = map_path_cache.maps_directory
+    temporary_directory = None
+    try:
+        if case.kind == 'attack' and not case.params.get('sample'):
+            temporary_directory = tempfile.mkdtemp(prefix='conqueria-benchmark-')
+            map_data = synthetic_map(case.params['paths'], case.params['turrets'])
+            with open(os.path.join(temporary_directory, f'map{SYNTHETIC_MAP_ID}.json'), 'w') as f:
+                json.dump(map_data, f)
+            map_path_cache.maps_directory = temporary_directory
+            attack = synthetic_attack(map_data, case.params['troops'])
+        elif case.kind == 'attack':
+            attack = sample_attack()
+
+        if case.kind == 'attack':
+            get_map_paths(attack['map_id'], num_points=1000)
+            get_map_targeting(attack['map_id'])
+            simulate_attack = SIMULATION_ENGINES[case.engine]
+            run = lambda: simulate_attack(**copy.deepcopy(attack), seed=BENCHMARK_SEED)
+        elif case.kind == 'flamethrower':
+            run = lambda: simulate_flamethrower_scenario(seed=BENCHMARK_SEED)
+        elif case.kind == 'gunner':
+            run = lambda: simulate_gunner_scenario(seed=BENCHMARK_SEED)
+        elif case.kind == 'map_paths':
+            map_path_cache.clear()
+            if case.params['warm']:
+                get_map_paths_data(case.params['map_id'])
+            run = lambda: get_map_paths_data(case.params['map_id'])
+        else:
+            raise ValueError(f"Unknown benchmark case kind {case.kind}.")
+
+        rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        start = time.perf_counter()
+        result = run()
+        wall_time = time.perf_counter() - start
+        peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+        alloc_peak = None
+        if trace_allocations:
+            if case.kind == 'map_paths' and not case.params['warm']:
+                map_path_cache.clear()
+            tracemalloc.start()
+            run()
+            alloc_peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+        events = count_events(result) if case.kind != 'map_paths' else 0
+        return {
+            'status': 'ok',
+            'wall_time': wall_time,
+            'events': events,
+            'events_per_second': events / wall_time if wall_time > 0 else None,
+            'peak_rss_kb': peak_rss,
+            'rss_growth_kb': peak_rss - rss_before,
+            'alloc_peak_bytes': alloc_peak,
+        }
+    finally:
+        map_path_cache.maps_directory = maps_directory
+        if temporary_directory is not None:
+            map_path_cache.clear()
+            shutil.rmtree(temporary_directory, ignore_errors=True)
+
+
+def _run_case_worker(case: BenchmarkCase, trace_allocations: bool, connection):
+    try:
+        connection.send(run_case(case, trace_allocations))
+    except Exception as e:
+        connection.send({'status': 'error', 'error': f"{type(e).__name__}: {e}"})
+    finally:
+        connection.close()
+
+
+def run_case_isolated(case: BenchmarkCase, timeout: float = DEFAULT_CASE_TIMEOUT,
+                      trace_allocations: bool = True) -> Dict[str, Any]:
+    """
+    Runs a case in a freshly spawned process, so that its peak RSS and its caches are its own, and terminates it
+    after timeout seconds.
+    """
+    context = multiprocessing.get_context('spawn')
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(target=_run_case_worker, args=(case, trace_allocations, sender))
+    process.start()
+    sender.close()
+    if receiver.poll(timeout):
+        measurement = receiver.recv()
+    else:
+        measurement = {'status': 'timeout'}
+        process.terminate()
+    process.join()
+    return measurement
+
+
+def host_info() -> Dict[str, Any]:
+    return {
+        'hostname': platform.node(),
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load_history(history_path: str) -> List[Dict[str, Any]]:
+    if not os.path.exists(history_path):
+        return []
+    with open(history_path, 'r') as f:
+        return json.load(f)
+
+
+def append_history(history_path: str, run: Dict[str, Any]):
+    """Appends a benchmark run to the JSON history, a list of runs in chronological order."""
+    history = load_history(history_path)
+    history.append(run)
+    os.makedirs(os.path.dirname(history_path) or '.', exist_ok=True)
+    temporary_path = history_path + '.tmp'
+    with open(temporary_path, 'w') as f:
+        json.dump(history, f, indent=2)
+    os.replace(temporary_path, history_path)
+
+
+def compare_runs(previous: Dict[str, Any], current: Dict[str, Any]) -> List[str]:
+    """Returns one line per case of the current run with its wall time relative to the previous run."""
+    previous_results = {result['name']: result for result in previous['results']}
+    lines = []
+    for result in current['results']:
+        before = previous_results.get(result['name'])
+        if result['status'] != 'ok' or before is None or before['status'] != 'ok':
+            change = ''
+        else:
+            change = f" ({result['wall_time'] / before['wall_time']:.2f}x of {before['wall_time']:.3f}s)"
+        wall_time = f"{result['wall_time']:.3f}s" if result['status'] == 'ok' else result['status']
+        lines.append(f"{result['name']:<32} {wall_time}{change}")
+    return lines
+
+
+def run_benchmarks(cases: List[BenchmarkCase], timeout: float = DEFAULT_CASE_TIMEOUT,
+                   trace_allocations: bool = True) -> Dict[str, Any]:
+    """Runs every case in its own process and returns the benchmark run, as stored in the history."""
+    results = []
+    for case in cases:
+        measurement = run_case_isolated(case, timeout, trace_allocations)
+        results.append({**asdict(case), **measurement})
+        print(f"{case.name:<32} {measurement.get('wall_time', measurement['status'])}", flush=True)
+    return {
+        'timestamp': time.time(),
+        'git_commit': git_commit(),
+        'engine_version': SIMULATION_ENGINE_VERSION,
+        'host': host_info(),
+        'results': results,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the simulation engines and append the results to a "
+                                                 "JSON history.")
+    parser.add_argument('--preset', choices=list(BENCHMARK_PRESETS), default='quick')
+    parser.add_argument('--engines', nargs='+', choices=list(SIMULATION_ENGINES), help="All engines by default.")
+    parser.add_argument('--cases', nargs='+', help="Only run the cases whose name starts with one of these.")
+    parser.add_argument('--timeout', type=float, default=DEFAULT_CASE_TIMEOUT, help="Wall seconds per case.")
+    parser.add_argument('--no-allocations', action='store_true', help="Skip the traced allocation runs.")
+    parser.add_argument('--history', default=BENCHMARK_HISTORY_PATH)
+    args = parser.parse_args()
+
+    cases = benchmark_cases(args.preset, args.engines)
+    if args.cases:
+        cases = [case for case in cases if case.name.startswith(tuple(args.cases))]
+
+    history = load_history(args.history)
+    run = run_benchmarks(cases, args.timeout, not args.no_allocations)
+    append_history(args.history, run)
+
+    # Compare with the latest run of the same host, the only meaningful baseline for wall times
+    previous = next((past for past in reversed(history) if past['host'] == run['host']), None)
+    if previous is not None:
+        print(f"\nCompared with {previous['git_commit']} (engine version {previous['engine_version']}):")
+        print('\n'.join(compare_runs(previous, run)))
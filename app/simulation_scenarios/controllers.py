@@ -1,14 +1,17 @@
 import numpy as np
 from fastapi import HTTPException
 from scipy.interpolate import CubicSpline
-import random
+import secrets
 import math
+import time
 import json
 import os
-from typing import List, Dict, Any, Optional
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Union, Callable
 # from app.simulation_scenarios.schemas import (
 from ..simulation_scenarios.schemas import (
     SimulationDataGeneralized,
+    SimulationDataColumnar,
     SimulationData,
     TroopEvent,
     TurretEvent,
@@ -17,15 +20,23 @@ from ..simulation_scenarios.schemas import (
     PathData,
     PathPoint,
     MapData,
+    SimulationProfile,
 )
 # from app.game_defensive_building.schemas import GameDefensiveBuildingBase
+from ..simulation_scenarios.path_cache import SmoothedPath, smooth_path, get_map_paths, get_map_targeting
+from ..simulation_scenarios.targeting import MapTargetingTable, TURRET_RANGE_MODIFIER
+from ..simulation_scenarios.spatial_index import TurretRangeIndex
+from ..simulation_scenarios.events import ColumnarEvents, new_event_log
+from ..simulation_scenarios.profiling import SimulationProfiler, EVENT_LOG_NAMES
 from ..game_defensive_building.schemas import GameDefensiveBuildingBase
 # from app.game_generative_building.schemas import GameGenerativeBuildingBase
 # from app.attack_unit.schemas import AttackUnitSimResponse
 from ..attack_unit.schemas import AttackUnitSimResponse
 
 
-def simulate_flamethrower_scenario():
+def simulate_flamethrower_scenario(seed: Optional[int] = None):
+    seed = resolve_seed(seed)
+    rng = np.random.default_rng(seed)
 
     # Parameters (same as provided)
     n_troops = 20
@@ -46,9 +57,9 @@ def simulate_flamethrower_scenario():
     path_id = 2  # Assuming we're using path with ID 1
     num_points = 1000  # Use a high number for smooth simulation
 
-    path_data = get_path_data(path_id, num_points)
-    x_smooth = [point.x for point in path_data.points]
-    y_smooth = [point.y for point in path_data.points]
+    path = get_scenario_path(path_id, num_points)
+    x_smooth = path.x.tolist()
+    y_smooth = path.y.tolist()
 
     # Create time parameter based on number of points
     t_smooth = np.linspace(0, 1, len(x_smooth))
@@ -148,7 +159,7 @@ def simulate_flamethrower_scenario():
 
             # Apply damage
             for troop in target_troops:
-                if random.random() < turret_accuracy:
+                if rng.random() < turret_accuracy:
                     troop['hp'] -= turret_damage
                     troop_events.append(TroopEvent(
                         timestamp=simulation_time,
@@ -194,13 +205,16 @@ def simulate_flamethrower_scenario():
         troop_delay=t_i,
         troops_at_end=troops_at_end,
         troop_events=troop_events,
-        turret_events=turret_events
+        turret_events=turret_events,
+        seed=seed
     )
 
     return simulation_data
 
 
-def simulate_gunner_scenario():
+def simulate_gunner_scenario(seed: Optional[int] = None):
+    seed = resolve_seed(seed)
+    rng = np.random.default_rng(seed)
     # Parameters specific to the gunner turret
     n_troops = 20
     troop_hp = 100
@@ -221,9 +235,9 @@ def simulate_gunner_scenario():
     num_points = 1000  # Number of points for smooth path
 
     # Simulate getting path data
-    path_data = get_path_data(path_id, num_points)  # Implement get_path_data accordingly
-    x_smooth = [point.x for point in path_data.points]
-    y_smooth = [point.y for point in path_data.points]
+    path = get_scenario_path(path_id, num_points)
+    x_smooth = path.x.tolist()
+    y_smooth = path.y.tolist()
 
     # Create time parameter based on number of points
     t_smooth = np.linspace(0, 1, len(x_smooth))
@@ -307,7 +321,7 @@ def simulate_gunner_scenario():
                 ))
 
                 # Apply damage to the closest troop
-                if random.random() < turret_accuracy:
+                if rng.random() < turret_accuracy:
                     closest_troop['hp'] -= turret_damage
                     troop_events.append(TroopEvent(
                         timestamp=simulation_time,
@@ -352,130 +366,72 @@ def simulate_gunner_scenario():
         troop_delay=t_i,
         troops_at_end=troops_at_end,
         troop_events=troop_events,
-        turret_events=turret_events
+        turret_events=turret_events,
+        seed=seed
     )
 
     return simulation_data
 
 
-def get_path_data(path_id: int, num_points: int = 100) -> PathData:
-    
+SCENARIO_PATHS = {
+    # Define your paths here. For this example, we'll use the same 'curve2' path.
+    2: np.array([
+        [500, 1100],
+        [300, 1306.25],
+        [700, 1512.5],
+        [300, 1718.75],
+        [500, 1925]
+    ])
+    # You can add more paths with different IDs here.
+}
+
+
+@lru_cache(maxsize=None)
+def get_scenario_path(path_id: int, num_points: int = 100) -> SmoothedPath:
     """
-    Generates (x, y, angle) data points for a given path.
+    Returns the cached smoothed path used by the flamethrower and gunner scenarios.
 
     Parameters:
     - path_id: Identifier for the path.
     - num_points: Number of data points to generate along the path.
 
     Returns:
-    - PathData object containing the path points.
+    - SmoothedPath with the path coordinates, angles and cumulative length.
     """
-
-    # Define your paths here. For this example, we'll use the same 'curve2' path.
-    paths = {
-        2: np.array([
-            [500, 1100],
-            [300, 1306.25],
-            [700, 1512.5],
-            [300, 1718.75],
-            [500, 1925]
-        ])
-        # You can add more paths with different IDs here.
-    }
-
-    if path_id not in paths:
+    if path_id not in SCENARIO_PATHS:
         raise ValueError(f"Path with ID {path_id} not found.")
+    return smooth_path(path_id, SCENARIO_PATHS[path_id], num_points)
 
-    path_points = paths[path_id]
-    t = np.linspace(0, 1, len(path_points))
-    spline_x = CubicSpline(t, path_points[:, 0])
-    spline_y = CubicSpline(t, path_points[:, 1])
-
-    t_smooth = np.linspace(0, 1, num_points)
-    x_smooth = spline_x(t_smooth)
-    y_smooth = spline_y(t_smooth)
-
-    # Calculate angles between consecutive points
-    points = []
-    for i in range(len(x_smooth) - 1):
-        x_current, y_current = x_smooth[i], y_smooth[i]
-        x_next, y_next = x_smooth[i + 1], y_smooth[i + 1]
-
-        dx = x_next - x_current
-        dy = y_next - y_current
-        angle = math.degrees(math.atan2(dy, dx))
-
-        points.append(PathPoint(x=x_current, y=y_current, angle=angle))
+def get_path_data(path_id: int, num_points: int = 100) -> PathData:
+    
+    """
+    Generates (x, y, angle) data points for a given path.
 
-    # Append the last point with the same angle as the previous one
-    points.append(PathPoint(x=x_smooth[-1], y=y_smooth[-1], angle=points[-1].angle))
-    path_length = calculate_path_length(points)
+    Parameters:
+    - path_id: Identifier for the path.
+    - num_points: Number of data points to generate along the path.
 
-    return PathData(path_id=path_id, length=path_length, points=points)
+    Returns:
+    - PathData object containing the path points.
+    """
+    return get_scenario_path(path_id, num_points).to_path_data()
 
-def get_map_paths_data(map_id: int, path_ids: List[int], num_points: int = 1000) -> Dict[int, PathData]:
+def get_map_paths_data(map_id: int, path_ids: Optional[List[int]] = None, num_points: int = 1000) -> Dict[int, PathData]:
     """
     Reads path data from the map JSON file for the specified map_id and path_ids.
 
+    The smoothed paths are served from the process-wide map path cache, the map file is only parsed again
+    after it changes.
+
     Parameters:
     - map_id: Identifier for the map.
-    - path_ids: List of path IDs to retrieve.
+    - path_ids: List of path IDs to retrieve, all paths of the map if None.
     - num_points: Number of data points to generate along each path.
 
     Returns:
     - Dictionary of PathData objects indexed by path_id.
     """
-    # Path to the JSON file
-    json_file_path = os.path.join('assets', 'maps', f'map{map_id}.json')
-
-    # Load the JSON data
-    with open(json_file_path, 'r') as f:
-        map_data = json.load(f)
-
-    # Extract the paths
-    continents = map_data.get('continents', {})
-    paths_data = {}
-
-    for continent_id, continent_info in continents.items():
-        territories = continent_info.get(f'continent_territories', {})
-        for territory_id, territory_info in territories.items():
-            territory_paths = territory_info.get('paths', {})
-            for path_id_str, path_info in territory_paths.items():
-                path_id = int(path_id_str)
-                if path_id in path_ids:
-                    # Retrieve the points
-                    points_list = path_info['points']
-                    # Convert points to numpy arrays
-                    path_points = np.array([[point['x'], point['y']] for point in points_list])
-
-                    # Create splines
-                    t = np.linspace(0, 1, len(path_points))
-                    spline_x = CubicSpline(t, path_points[:, 0])
-                    spline_y = CubicSpline(t, path_points[:, 1])
-
-                    t_smooth = np.linspace(0, 1, num_points)
-                    x_smooth = spline_x(t_smooth)
-                    y_smooth = spline_y(t_smooth)
-
-                    # Calculate angles between consecutive points
-                    path_points_list = []
-                    for i in range(len(x_smooth) - 1):
-                        x_current, y_current = x_smooth[i], y_smooth[i]
-                        x_next, y_next = x_smooth[i + 1], y_smooth[i + 1]
-
-                        dx = x_next - x_current
-                        dy = y_next - y_current
-                        angle = math.degrees(math.atan2(dy, dx))
-
-                        path_points_list.append(PathPoint(x=x_current, y=y_current, angle=angle))
-
-                    # Append the last point with the same angle as the previous one
-                    path_points_list.append(PathPoint(x=x_smooth[-1], y=y_smooth[-1], angle=path_points_list[-1].angle))
-                    path_length = calculate_path_length(path_points_list)
-
-                    paths_data[path_id] = PathData(path_id=path_id, length=path_length, points=path_points_list)
-
-    return paths_data
+    return {path_id: path.to_path_data() for path_id, path in get_map_paths(map_id, path_ids, num_points).items()}
 
 def calculate_path_length(points: List[PathPoint]) -> float:
     length = 0
@@ -486,50 +442,42 @@ def calculate_path_length(points: List[PathPoint]) -> float:
         length += segment_length
     return length
 
-def simulate_attack_generalized(game_defensive_buildings: List[GameDefensiveBuildingBase],
-                                # game_generative_buildings: List[GameGenerativeBuildingBase],
-                                attacks: List[Dict[str, Any]],
-                                attack_unit_types: List[AttackUnitSimResponse],
-                                buildings_data: Dict[str, Dict[int, Dict[str, Any]]],
-                                map_id: int) -> SimulationDataGeneralized:
-    """
-    Simulates the attack scenario based on the provided defensive buildings and attack units.
+SIMULATION_STEP = 0.1  # Time step in seconds
+MAX_SIMULATION_DURATION = 2500  # Max simulation time in seconds
+PROGRESS_REPORT_INTERVAL = 0.02 * MAX_SIMULATION_DURATION  # Simulated seconds between progress reports
 
-    Parameters:
-    - game_defensive_buildings: List of GameDefensiveBuilding objects.
-    - attacks: List of attack waves configurations.
-    - attack_unit_types: List of AttackUnitSimResponse objects.
-    - buildings_data: Dictionary containing data of cities, defensive buildings, and generative buildings.
-    - map_id: The ID of the map to retrieve paths from.
 
-    Returns:
-    - SimulationDataGeneralized object containing the simulation results.
+@lru_cache(maxsize=None)
+def simulation_ticks(simulation_step: float = SIMULATION_STEP,
+                     max_simulation_duration: float = MAX_SIMULATION_DURATION) -> np.ndarray:
     """
-    # First, collect all path_ids from attacks
-    path_ids = set()
-    for attack in attacks:
-        path_ids.add(attack['path_id'])
+    Returns every simulation time visited by the fixed-step loop.
 
-    # Get paths data
-    paths_data = get_map_paths_data(map_id, list(path_ids), num_points=1000)
+    The times are accumulated exactly like the fixed-step loop does (simulation_time += simulation_step),
+    so the event-driven engine wakes on the very same floating point timestamps.
+    """
+    ticks = []
+    simulation_time = 0
+    while simulation_time < max_simulation_duration:
+        ticks.append(simulation_time)
+        simulation_time += simulation_step
+    ticks = np.array(ticks, dtype=np.float64)
+    ticks.setflags(write=False)
+    return ticks
+TROOP_SPEED_MODIFIER = 25
 
-    # Initialize data structures
-    troops = []
-    turrets = {}
-    troops_at_end = {}
-    troop_events: List[TroopEvent] = []
-    turret_events: List[TurretEvent] = []
-    generative_building_events: List[GenerativeBuildingEvent] = []
-    city_events: List[CityEvent] = []
 
-    # Map attack_unit_id to attack unit stats
-    attack_unit_stats = {unit.id: unit for unit in attack_unit_types}
+def initialize_turrets(game_defensive_buildings: List[GameDefensiveBuildingBase]) -> Dict[int, Dict[str, Any]]:
+    """
+    Builds the simulation state of every defensive building, indexed by its ID.
 
-    
-    troop_speed_modifier = 25
-    turret_range_modifier = 100
+    Parameters:
+    - game_defensive_buildings: List of GameDefensiveBuilding objects.
 
-    # Initialize turrets
+    Returns:
+    - Dictionary of turret dictionaries indexed by turret ID.
+    """
+    turrets = {}
     for turret in game_defensive_buildings:
         turrets[turret.id] = {
             'id': turret.id,
@@ -539,7 +487,7 @@ def simulate_attack_generalized(game_defensive_buildings: List[GameDefensiveBuil
             'position': {'x': turret.location[0], 'y': turret.location[1]},
             'stats': {
                 'damage': turret.damage,
-                'range': turret.range * turret_range_modifier,
+                'range': turret.range * TURRET_RANGE_MODIFIER,
                 'firerate': turret.firerate,
                 'accuracy': turret.accuracy/100,
                 'cone_angle': turret.cone_angle,
@@ -550,17 +498,37 @@ def simulate_attack_generalized(game_defensive_buildings: List[GameDefensiveBuil
             'angle': 0,
             'last_fire_time': -1 / turret.firerate,
         }
+    return turrets
 
-    # # Initialize game generative buildings
-    # for gen_building in game_generative_buildings:
-    #     gen_buildings[gen_building.id] = {
-    #         'id': gen_building.id,
-    #         'generative_building_id': gen_building.generative_building_id,
-    #         'position': {'x': gen_building.location[0], 'y': gen_building.location[1]},
-    #         'hp': gen_building.health_points,
-    #         'max_hp': gen_building.max_health_points,
-    #         'alive': True
-    #     }
+
+def initialize_troops(attacks: List[Dict[str, Any]],
+                      attack_unit_types: List[AttackUnitSimResponse],
+                      buildings_data: Dict[str, Dict[int, Dict[str, Any]]],
+                      turrets: Dict[int, Dict[str, Any]],
+                      rng: np.random.Generator,
+                      targeting: MapTargetingTable):
+    """
+    Builds the simulation state of every troop of every attack wave, selecting each troop's initial target.
+
+    The position where troops stop to attack a building is looked up in the map's targeting table from the
+    building's location, the targeting_path_ids sent in buildings_data are not used.
+
+    Parameters:
+    - attacks: List of attack waves configurations.
+    - attack_unit_types: List of AttackUnitSimResponse objects.
+    - buildings_data: Dictionary containing data of cities, defensive buildings, and generative buildings.
+    - turrets: Dictionary of turrets as returned by initialize_turrets.
+    - rng: Random generator of the simulation run, used for target selection.
+    - targeting: Targeting table of the map, see get_map_targeting.
+
+    Returns:
+    - Tuple of the list of troop dictionaries and the zeroed troops_at_end counters.
+    """
+    troops = []
+    troops_at_end = {}
+
+    # Map attack_unit_id to attack unit stats
+    attack_unit_stats = {unit.id: unit for unit in attack_unit_types}
 
     # Initialize troops
     troop_id_counter = 0
@@ -593,11 +561,14 @@ def simulate_attack_generalized(game_defensive_buildings: List[GameDefensiveBuil
                 if target_type == 1:
                     target_length = 1
                 elif target_type == 2:
-                    target_length = buildings_data["defensive_buildings"][target_id]["targeting_path_ids"][str(path_id)]
+                    turret = turrets[target_id]
+                    target_length = targeting.target_length((turret['position']['x'], turret['position']['y']), path_id)
                 elif target_type == 3:
-                    target_length = buildings_data["generative_buildings"][str(target_id)]["targeting_path_ids"][str(path_id)]
+                    target_length = targeting.target_length(buildings_data["generative_buildings"][str(target_id)]["location"], path_id)
                 else:
                     raise HTTPException(status_code=400, detail="Invalid target types")
+                if target_length is None:
+                    raise HTTPException(status_code=400, detail=f"Target {target_id} is not on a building slot of the map")
                 target_priorities.append({
                     'priority': priority,
                     'type': target_type,
@@ -623,33 +594,203 @@ def simulate_attack_generalized(game_defensive_buildings: List[GameDefensiveBuil
                     'alive': True,
                     'hp': attack_unit_stats[attack_unit_id].health_points,
                     'max_hp': attack_unit_stats[attack_unit_id].health_points,
-                    'speed': attack_unit_stats[attack_unit_id].speed * troop_speed_modifier,
+                    'speed': attack_unit_stats[attack_unit_id].speed * TROOP_SPEED_MODIFIER,
                     'damage': attack_unit_stats[attack_unit_id].damage,
                     'accuracy': attack_unit_stats[attack_unit_id].accuracy / 100,
                     'is_air': attack_unit_stats[attack_unit_id].is_air,
                     'pos': None,
                     'target_priorities': target_priorities,  # Store target priorities
-                    'target': select_target(target_priorities, turrets, buildings_data),  # Select alive target
+                    'target': select_target(target_priorities, turrets, buildings_data, rng),  # Select alive target
                     'target_reached': False,
                 }
                 troops.append(troop)
                 troop_id_counter += 1
         overall_delay += unit_overall_delay
 
-    # Simulation parameters
-    simulation_time = 0
-    simulation_step = 0.1  # Time step in seconds
-    max_simulation_duration = 2500  # Max simulation time in seconds
+    return troops, troops_at_end
+
+
+def build_turret_info(turrets: Dict[int, Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Returns the output description of the turrets in their current state."""
+    turret_info = []
+    for turret in turrets.values():
+        turret_info.append({
+            'id': turret['id'],
+            'defensive_building_id': turret['defensive_building_id'],
+            'in_game_picture': turret['in_game_picture'],
+            'position': turret['position'],
+            'stats': turret['stats'],
+            'hp': turret['hp'],
+            'max_hp': turret['max_hp'],
+        })
+    return turret_info
 
-    #DEBUG
-    last_simulation_time_output = 0
+
+def build_troop_info(attack_unit_types: List[AttackUnitSimResponse]) -> List[Dict[str, Any]]:
+    """Returns the output description of the attack unit types."""
+    troop_info = []
+    for attack_unit in attack_unit_types:
+        troop_info.append({
+            'id': attack_unit.id,
+            'type': attack_unit.type,
+            'in_game_picture': attack_unit.in_game_picture,
+            'health_points': attack_unit.health_points,
+            'damage': attack_unit.damage,
+            'speed': attack_unit.speed,
+            'accuracy': attack_unit.accuracy,
+            'is_air': attack_unit.is_air,
+        })
+    return troop_info
+
+
+def build_simulation_data_generalized(turrets: Dict[int, Dict[str, Any]],
+                                      attack_unit_types: List[AttackUnitSimResponse],
+                                      troops_at_end: Dict,
+                                      buildings_data: Dict[str, Dict[int, Dict[str, Any]]],
+                                      troop_events: List[TroopEvent],
+                                      turret_events: List[TurretEvent],
+                                      generative_building_events: List[GenerativeBuildingEvent],
+                                      city_events: List[CityEvent],
+                                      seed: Optional[int] = None,
+                                      profile: Optional[SimulationProfile] = None
+                                      ) -> Union[SimulationDataGeneralized, SimulationDataColumnar]:
+    """
+    Assembles the SimulationDataGeneralized response from the final simulation state and the recorded events,
+    or SimulationDataColumnar when the events were recorded as ColumnarEvents.
+    """
+    turret_info = build_turret_info(turrets)
+    troop_info = build_troop_info(attack_unit_types)
+
+    if isinstance(troop_events, ColumnarEvents):
+        return SimulationDataColumnar(
+            turret_info=turret_info,
+            troop_info=troop_info,
+            troops_at_end=troops_at_end,
+            buildings_data=buildings_data,
+            timestamp_step=SIMULATION_STEP,
+            troop_events=troop_events.to_event_columns(SIMULATION_STEP),
+            turret_events=turret_events.to_event_columns(SIMULATION_STEP),
+            generative_building_events=generative_building_events.to_event_columns(SIMULATION_STEP),
+            city_events=city_events.to_event_columns(SIMULATION_STEP),
+            seed=seed,
+            profile=profile
+        )
+
+    # Create SimulationData object
+    return SimulationDataGeneralized(
+        turret_info=turret_info,
+        troop_info=troop_info,
+        troops_at_end=troops_at_end,
+        buildings_data=buildings_data,
+        troop_events=troop_events,
+        turret_events=turret_events,
+        generative_building_events=generative_building_events,
+        city_events=city_events,
+        seed=seed,
+        profile=profile
+    )
+
+
+def simulate_attack_generalized(game_defensive_buildings: List[GameDefensiveBuildingBase],
+                                # game_generative_buildings: List[GameGenerativeBuildingBase],
+                                attacks: List[Dict[str, Any]],
+                                attack_unit_types: List[AttackUnitSimResponse],
+                                buildings_data: Dict[str, Dict[int, Dict[str, Any]]],
+                                map_id: int,
+                                seed: Optional[int] = None,
+                                event_format: str = 'objects',
+                                progress_callback: Optional[Callable[[float], None]] = None,
+                                fast_forward: bool = False,
+                                profile: bool = False) -> SimulationDataGeneralized:
+    """
+    Simulates the attack scenario based on the provided defensive buildings and attack units.
+
+    Parameters:
+    - game_defensive_buildings: List of GameDefensiveBuilding objects.
+    - attacks: List of attack waves configurations.
+    - attack_unit_types: List of AttackUnitSimResponse objects.
+    - buildings_data: Dictionary containing data of cities, defensive buildings, and generative buildings.
+    - map_id: The ID of the map to retrieve paths from.
+    - seed: Seed of the run's random generator, drawn at random if None and echoed in the output.
+    - event_format: Format of the recorded events, 'objects' (event models), 'columnar' (see ColumnarEvents)
+      or 'none' (no events).
+    - progress_callback: Called with the simulation time as the simulation advances, about every
+      PROGRESS_REPORT_INTERVAL simulated seconds.
+    - fast_forward: Whether to skip the ticks without turret interaction, see next_interaction_tick. The
+      events and the final state are the same either way.
+    - profile: Whether to measure the simulation phases and return them in the profile section of the output,
+      see SimulationProfiler.
+
+    Returns:
+    - SimulationDataGeneralized object containing the simulation results, SimulationDataColumnar with the
+      'columnar' event format.
+    """
+    # First, collect all path_ids from attacks
+    path_ids = set()
+    for attack in attacks:
+        path_ids.add(attack['path_id'])
+
+    # Get paths data
+    paths_data = get_map_paths(map_id, list(path_ids), num_points=1000)
+
+    # Initialize data structures
+    seed = resolve_seed(seed)
+    rng = np.random.default_rng(seed)
+    turrets = initialize_turrets(game_defensive_buildings)
+    troops, troops_at_end = initialize_troops(attacks, attack_unit_types, buildings_data, turrets, rng,
+                                              get_map_targeting(map_id))
+
+    # Range queries only visit the troops walking the paths that cross a turret's range
+    range_index = TurretRangeIndex(turrets, paths_data)
+    troops_by_path: Dict[int, List[Dict[str, Any]]] = {}
+    for troop in troops:
+        troops_by_path.setdefault(troop['path_id'], []).append(troop)
+    troop_events: List[TroopEvent] = new_event_log(TroopEvent, event_format)
+    turret_events: List[TurretEvent] = new_event_log(TurretEvent, event_format)
+    generative_building_events: List[GenerativeBuildingEvent] = new_event_log(GenerativeBuildingEvent, event_format)
+    city_events: List[CityEvent] = new_event_log(CityEvent, event_format)
+
+    # The loop calls these through local names, bound to timed wrappers when profiling
+    troops_in_range_of = range_index.troops_in_range
+    retarget = select_target
+    apply_damage = apply_damage_to_target
+    skip_ticks = next_interaction_tick
+    profiler = SimulationProfiler() if profile else None
+    if profiler:
+        troops_in_range_of = profiler.timed('range_queries', troops_in_range_of)
+        retarget = profiler.timed('target_selection', retarget)
+        apply_damage = profiler.timed('building_damage', apply_damage)
+        skip_ticks = profiler.timed('fast_forward', skip_ticks)
+        for name, event_log in zip(EVENT_LOG_NAMES, (troop_events, turret_events, generative_building_events,
+                                                     city_events)):
+            profiler.instrument_event_log(name, event_log)
+
+    # # Initialize game generative buildings
+    # for gen_building in game_generative_buildings:
+    #     gen_buildings[gen_building.id] = {
+    #         'id': gen_building.id,
+    #         'generative_building_id': gen_building.generative_building_id,
+    #         'position': {'x': gen_building.location[0], 'y': gen_building.location[1]},
+    #         'hp': gen_building.health_points,
+    #         'max_hp': gen_building.max_health_points,
+    #         'alive': True
+    #     }
+
+    # Simulation parameters, the loop visits the fixed-step ticks in order
+    ticks = simulation_ticks()
+    tick = 0
+    simulation_time = 0
+    last_progress_time = 0
 
     # Main simulation loop
     try:
-        while simulation_time < max_simulation_duration:
-            # if simulation_time - last_simulation_time_output > 0.02*max_simulation_duration:
-            #     print(f"simulation_time: {simulation_time}")
-            #     last_simulation_time_output = simulation_time
+        while tick < len(ticks):
+            simulation_time = float(ticks[tick])
+            if progress_callback and simulation_time - last_progress_time >= PROGRESS_REPORT_INTERVAL:
+                progress_callback(simulation_time)
+                last_progress_time = simulation_time
+            if profiler:
+                tick_start = time.perf_counter()
             # Update troop positions
             for troop in troops:
                 if troop['alive'] and simulation_time >= troop['start_time']:
@@ -657,18 +798,18 @@ def simulate_attack_generalized(game_defensive_buildings: List[GameDefensiveBuil
                     path_length = path.length
                     t_pos = min((simulation_time - troop['start_time']) * troop['speed'] / path_length, 1)
                     troop['t_pos'] = t_pos  # Store t_pos in troop dictionary
-                    idx = int(t_pos * (len(path.points) - 1))
-                    troop['pos'] = (path.points[idx].x, path.points[idx].y)
+                    idx = int(t_pos * (len(path.x) - 1))
+                    troop['pos'] = (float(path.x[idx]), float(path.y[idx]))
             
                     if 'started' not in troop:
                         troop['started'] = True
-                        troop_events.append(TroopEvent(
+                        troop_events.record(
                             timestamp=simulation_time,
                             troop_id=troop['id'],
                             attack_unit_id=troop['attack_unit_id'],
                             path_id=troop['path_id'],
                             event_type='start'
-                        ))
+                        )
 
                     # Check if troop has reached its target length along the path
                     if not troop.get('no_target'):
@@ -677,24 +818,24 @@ def simulate_attack_generalized(game_defensive_buildings: List[GameDefensiveBuil
                                 # Target is alive, proceed as before
                                 troop['alive'] = False
                                 troop['target_reached'] = True
-                                troop_events.append(TroopEvent(
+                                troop_events.record(
                                     timestamp=simulation_time,
                                     troop_id=troop['id'],
                                     attack_unit_id=troop['attack_unit_id'],
                                     path_id=troop['path_id'],
                                     event_type='reach_target'
-                                ))
+                                )
 
                                 # Apply damage to the target
                                 ### THIS IS WHERE TO ALSO APPLY DAMAGE TO GENERATIVE BUILDINGS AND CITIES... OR ACTUALLY JUST ACCUMULATE TROOPS AT THE CITIES.
                                 ### THIS IS ALSO WHERE TO INCREMENT WHEN TROOPS REACH THE END OF THE CITY FOR THE OUTPUT FUNCTION.
                         
-                                apply_damage_to_target(troop, troop['target'], simulation_time, troops_at_end,
-                                                    buildings_data, generative_building_events, city_events, turrets, turret_events)
+                                apply_damage(troop, troop['target'], simulation_time, troops_at_end,
+                                             buildings_data, generative_building_events, city_events, turrets, turret_events)
                                 break  # Exit the while loop
                             else:
                                 # Target is destroyed, select a new target
-                                new_target = select_target(troop['target_priorities'], turrets, buildings_data)
+                                new_target = retarget(troop['target_priorities'], turrets, buildings_data, rng)
                                 if new_target:
                                     troop['target'] = new_target
                                     if t_pos >= troop['target']['target_length']:
@@ -711,25 +852,25 @@ def simulate_attack_generalized(game_defensive_buildings: List[GameDefensiveBuil
                         # Troop has no target, check if it has reached the end of the path
                         if t_pos >= 1:
                             troop['alive'] = False
-                            troop_events.append(TroopEvent(
+                            troop_events.record(
                                 timestamp=simulation_time,
                                 troop_id=troop['id'],
                                 attack_unit_id=troop['attack_unit_id'],
                                 path_id=troop['path_id'],
                                 event_type='reached_end_of_path'
-                            ))
+                            )
                             continue
 
+            if profiler:
+                turrets_start = time.perf_counter()
             # Update turrets
             for turret_id, turret in turrets.items():
                 if not turret['alive']:
                     continue
                 turret_pos = (turret['position']['x'], turret['position']['y'])
-                turret_range = turret['stats']['range']
 
                 # Identify troops within turret range
-                troops_in_range = [troop for troop in troops if troop['alive'] and troop['pos'] and
-                                   distance(troop['pos'], turret_pos) <= turret_range]
+                troops_in_range = troops_in_range_of(turret_id, troops_by_path)
                 
                 
                 if troops_in_range:
@@ -740,23 +881,23 @@ def simulate_attack_generalized(game_defensive_buildings: List[GameDefensiveBuil
                         new_turret_angle = calculate_angle(turret_pos, closest_troop['pos'])
                         if new_turret_angle != turret['angle']:
                             turret['angle'] = new_turret_angle
-                            turret_events.append(TurretEvent(
+                            turret_events.record(
                                 timestamp=simulation_time,
                                 turret_id=turret['id'],
                                 defensive_building_id=turret['defensive_building_id'],
                                 event_type='rotate',
                                 angle=turret['angle']
-                            ))
+                            )
 
                         # Turret firing logic
                         if (simulation_time - turret['last_fire_time']) >= (1 / turret['stats']['firerate']):
                             turret['last_fire_time'] = simulation_time
-                            turret_events.append(TurretEvent(
+                            turret_events.record(
                                 timestamp=simulation_time,
                                 turret_id=turret['id'],
                                 defensive_building_id=turret['defensive_building_id'],
                                 event_type='fire'
-                            ))
+                            )
 
                             # Find troops within the firing cone
                             target_troops = []
@@ -768,127 +909,185 @@ def simulate_attack_generalized(game_defensive_buildings: List[GameDefensiveBuil
 
                             # Apply damage
                             for troop in target_troops:
-                                if random.random() < turret['stats']['accuracy']:
+                                if rng.random() < turret['stats']['accuracy']:
                                     troop['hp'] -= turret['stats']['damage']
-                                    troop_events.append(TroopEvent(
+                                    troop_events.record(
                                         timestamp=simulation_time,
                                         troop_id=troop['id'],
                                         attack_unit_id=troop['attack_unit_id'],
                                         path_id=troop['path_id'],
                                         event_type='damage',
                                         data={'damage': turret['stats']['damage'], 'remaining_hp': troop['hp']}
-                                    ))
+                                    )
                                     if troop['hp'] <= 0:
                                         troop['alive'] = False
-                                        troop_events.append(TroopEvent(
+                                        troop_events.record(
                                             timestamp=simulation_time,
                                             troop_id=troop['id'],
                                             attack_unit_id=troop['attack_unit_id'],
                                             path_id=troop['path_id'],
                                             event_type='death'
-                                        ))
+                                        )
                     else:
                         # Gunner turret targets single troop
                         closest_troop = max(troops_in_range, key=lambda t: t['t_pos'])
                         new_turret_angle = calculate_angle(turret_pos, closest_troop['pos'])
                         if new_turret_angle != turret['angle']:
                             turret['angle'] = new_turret_angle
-                            turret_events.append(TurretEvent(
+                            turret_events.record(
                                 timestamp=simulation_time,
                                 turret_id=turret['id'],
                                 defensive_building_id=turret['defensive_building_id'],
                                 event_type='rotate',
                                 angle=turret['angle']
-                            ))
+                            )
 
                         # Turret firing logic
                         if (simulation_time - turret['last_fire_time']) >= (1 / turret['stats']['firerate']):
                             turret['last_fire_time'] = simulation_time
-                            turret_events.append(TurretEvent(
+                            turret_events.record(
                                 timestamp=simulation_time,
                                 turret_id=turret['id'],
                                 defensive_building_id=turret['defensive_building_id'],
                                 event_type='fire'
-                            ))
+                            )
 
                             # Apply damage to the closest troop
-                            if random.random() < turret['stats']['accuracy']:
+                            if rng.random() < turret['stats']['accuracy']:
                                 closest_troop['hp'] -= turret['stats']['damage']
-                                troop_events.append(TroopEvent(
+                                troop_events.record(
                                     timestamp=simulation_time,
                                     troop_id=closest_troop['id'],
                                     attack_unit_id=closest_troop['attack_unit_id'],
                                     path_id=closest_troop['path_id'],
                                     event_type='damage',
                                     data={'damage': turret['stats']['damage'], 'remaining_hp': closest_troop['hp']}
-                                ))
+                                )
                                 if closest_troop['hp'] <= 0:
                                     closest_troop['alive'] = False
-                                    troop_events.append(TroopEvent(
+                                    troop_events.record(
                                         timestamp=simulation_time,
                                         troop_id=closest_troop['id'],
                                         attack_unit_id=closest_troop['attack_unit_id'],
                                         path_id=closest_troop['path_id'],
                                         event_type='death'
-                                    ))
+                                    )
                 else:
                     # No troops in range
                     pass
 
+            if profiler:
+                tick_end = time.perf_counter()
+                profiler.add('troop_movement', turrets_start - tick_start)
+                profiler.add('turrets', tick_end - turrets_start)
+                profiler.add('tick', tick_end - tick_start)
+
             # Check for simulation end conditions
             if all(not troop['alive'] or troop['target_reached'] for troop in troops):
                 break
 
             # Increment simulation time
-            simulation_time += simulation_step
+            if fast_forward:
+                tick = skip_ticks(tick, ticks, troops, turrets, paths_data, range_index, troop_events)
+            else:
+                tick += 1
     except SimulationEndException:
         pass  # Simulation ends when city is captured
 
-    # Prepare turret info for output
-    turret_info = []
-    for turret in turrets.values():
-        turret_info.append({
-            'id': turret['id'],
-            'defensive_building_id': turret['defensive_building_id'],
-            'in_game_picture': turret['in_game_picture'],
-            'position': turret['position'],
-            'stats': turret['stats'],
-            'hp': turret['hp'],
-            'max_hp': turret['max_hp'],
-        })
-
-    # Prepare troop info for output
-    troop_info = []
-    for attack_unit in attack_unit_types:
-        troop_info.append({
-            'id': attack_unit.id,
-            'type': attack_unit.type,
-            'in_game_picture': attack_unit.in_game_picture,
-            'health_points': attack_unit.health_points,
-            'damage': attack_unit.damage,
-            'speed': attack_unit.speed,
-            'accuracy': attack_unit.accuracy,
-            'is_air': attack_unit.is_air,
-        })
-
     # Create SimulationData object
-    simulation_data = SimulationDataGeneralized(
-        turret_info=turret_info,
-        troop_info=troop_info,
-        troops_at_end=troops_at_end,
-        buildings_data=buildings_data,
-        troop_events=troop_events,
-        turret_events=turret_events,
-        generative_building_events=generative_building_events,
-        city_events=city_events
-    )
+    simulation_data = build_simulation_data_generalized(turrets, attack_unit_types, troops_at_end, buildings_data,
+                                                        troop_events, turret_events, generative_building_events,
+                                                        city_events, seed, profiler.to_profile() if profiler else None)
 
     print(f"Simulation finished at: {simulation_time}")
 
 
     return simulation_data
 
-def select_target(target_priorities, turrets, buildings_data):
+def first_tick_reaching(reached: Callable[[int], bool], lo: int, hi: int) -> int:
+    """Returns the first tick in [lo, hi) for which the monotonic predicate reached is true, hi if none."""
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if reached(mid):
+            hi = mid
+        else:
+            lo = mid + 1
+    return lo
+
+def next_interaction_tick(tick: int,
+                          ticks: np.ndarray,
+                          troops: List[Dict[str, Any]],
+                          turrets: Dict[int, Dict[str, Any]],
+                          paths_data: Dict[int, SmoothedPath],
+                          range_index: TurretRangeIndex,
+                          troop_events) -> int:
+    """
+    Returns the next tick the simulation loop has to process after the given one, recording the 'start' events
+    of the troops spawning on the ticks skipped in between.
+
+    While no alive troop is inside the range of a living turret, the troops only move: nothing happens until a
+    troop reaches its target (or the end of its path) or enters the range of a living turret. Both are found
+    per troop by bisecting the ticks with the exact position update of the loop, so the skipped ticks are ones
+    the fixed-step loop would spend without emitting events or drawing random numbers.
+    """
+    turret_alive = np.array([turret['alive'] for turret in turrets.values()], dtype=bool)
+    next_in_range = range_index.next_point_in_range(turret_alive)
+    active = [troop for troop in troops if troop['alive']]
+
+    # A troop inside a living turret's range may be targeted on the next tick
+    for troop in active:
+        if 'started' in troop:
+            slot = range_index.path_slots[troop['path_id']]
+            point_idx = int(troop['t_pos'] * (range_index.num_points - 1))
+            if next_in_range[slot, point_idx] == point_idx:
+                return tick + 1
+
+    next_tick = len(ticks)
+    spawns = []
+    for troop in active:
+        if 'started' in troop:
+            first = tick + 1
+        else:
+            # First tick at which simulation_time >= start_time
+            first = int(np.searchsorted(ticks, troop['start_time'], side='left'))
+            if first >= len(ticks):
+                continue
+            spawns.append((first, troop))
+        if first >= next_tick:
+            continue
+
+        path = paths_data[troop['path_id']]
+        path_length = path.length
+        num_points = len(path.x)
+
+        def t_pos_at(k: int) -> float:
+            return min((float(ticks[k]) - troop['start_time']) * troop['speed'] / path_length, 1)
+
+        # Arrival at the target, or at the end of the path for troops without target
+        target_length = 1 if troop.get('no_target') else troop['target']['target_length']
+        next_tick = first_tick_reaching(lambda k: t_pos_at(k) >= target_length, first, next_tick)
+
+        # Entry into the range of a living turret
+        entry_point = next_in_range[range_index.path_slots[troop['path_id']], int(t_pos_at(first) * (num_points - 1))]
+        if entry_point < num_points:
+            next_tick = first_tick_reaching(lambda k: int(t_pos_at(k) * (num_points - 1)) >= entry_point,
+                                            first, next_tick)
+
+    # Spawns on the skipped ticks, in tick order then troop order like the loop records them
+    for spawn_tick, troop in sorted(spawns, key=lambda spawn: spawn[0]):
+        if spawn_tick >= next_tick:
+            break
+        troop['started'] = True
+        troop_events.record(
+            timestamp=float(ticks[spawn_tick]),
+            troop_id=troop['id'],
+            attack_unit_id=troop['attack_unit_id'],
+            path_id=troop['path_id'],
+            event_type='start'
+        )
+    return next_tick
+
+def select_target(target_priorities, turrets, buildings_data, rng: np.random.Generator):
     """
     Selects a target based on the given priorities and alive status.
 
@@ -896,6 +1095,7 @@ def select_target(target_priorities, turrets, buildings_data):
     - target_priorities: List of target dictionaries with 'priority', 'type', 'target_id', 'target_length'.
     - turrets: Dictionary of turrets with their alive status.
     - buildings_data: Dictionary containing data of cities, defensive buildings, and generative buildings.
+    - rng: Random generator of the simulation run.
 
     Returns:
     - Selected target dictionary, or None if no targets are alive.
@@ -919,7 +1119,7 @@ def select_target(target_priorities, turrets, buildings_data):
         tp['cumulative_priority'] = cumulative_priority
 
     # Randomly select a target based on normalized priorities
-    rand_value = random.random()
+    rand_value = rng.random()
     for tp in alive_targets:
         if rand_value <= tp['cumulative_priority']:
             return tp
@@ -952,10 +1152,10 @@ def apply_damage_to_target(troop, target, timestamp, troops_at_end, buildings_da
     - troop: Troop dictionary.
     - target: Target dictionary.
     - timestamp: Current simulation time.
-    - generative_building_events: List to store generative building events.
-    - city_events: List to store city events.
+    - generative_building_events: Event log of the generative building events.
+    - city_events: Event log of the city events.
     - turrets: Dictionary of turrets.
-    - turret_events: List to store turret events.
+    - turret_events: Event log of the turret events.
     """
     target_type = target['type']
     target_id = target['target_id']
@@ -990,42 +1190,42 @@ def apply_damage_to_target(troop, target, timestamp, troops_at_end, buildings_da
         turret = turrets.get(target_id)
         if turret and turret['alive']:
             turret['hp'] -= damage
-            turret_events.append(TurretEvent(
+            turret_events.record(
                 timestamp=timestamp,
                 turret_id=turret['id'],
                 defensive_building_id=turret['defensive_building_id'],
                 event_type='damage',
                 data={'damage': damage, 'remaining_hp': turret['hp']}
-            ))
+            )
             if turret['hp'] <= 0:
                 turret['hp'] = 0
                 turret['alive'] = False
-                turret_events.append(TurretEvent(
+                turret_events.record(
                     timestamp=timestamp,
                     turret_id=turret['id'],
                     defensive_building_id=turret['defensive_building_id'],
                     event_type='destroyed'
-                ))
+                )
     elif target_type == 3:
         # Target is a generative building
         building = buildings_data['generative_buildings'].get(str(target_id))
         if building:
             building['hp'] = str(float(building['hp']) - damage)
-            generative_building_events.append(GenerativeBuildingEvent(
+            generative_building_events.record(
                 timestamp=timestamp,
                 building_id=target_id,
                 generative_building_id=building['generative_building_id'],
                 event_type='damage',
                 data={'damage': damage, 'remaining_hp': building['hp']}
-            ))
+            )
             if float(building['hp']) <= 0:
                 building['hp'] = '0'
-                generative_building_events.append(GenerativeBuildingEvent(
+                generative_building_events.record(
                     timestamp=timestamp,
                     building_id=target_id,
                     generative_building_id=building['generative_building_id'],
                     event_type='destroyed'
-                ))
+                )
     else:
         # Unknown target type
         pass
@@ -1036,48 +1236,9 @@ def distance(p1, p2):
 def calculate_angle(p1, p2):
     return np.degrees(np.arctan2(p2[1] - p1[1], p2[0] - p1[0]))
 
-def find_closest_point_on_path(target_pos, path_points):
-    min_distance = float('inf')
-    closest_idx = 0
-    for idx, point in enumerate(path_points):
-        distance_to_point = distance((point["x"], point["y"]), target_pos)
-        if distance_to_point < min_distance:
-            min_distance = distance_to_point
-            closest_idx = idx
-    # Calculate the normalized position along the path
-    target_length = closest_idx / (len(path_points))
-    return target_length
-
 class SimulationEndException(Exception):
     pass
 
-if __name__ == '__main__':
-    import time
-
-    distances_by_building_slot = {}
-    # Path to the JSON file
-    map_json_file_path = os.path.join('assets', 'maps', f'map1.json')
-    target_lengths_json_file_path = os.path.join('assets', 'maps', f'target_lengths1.json')
-
-    start = time.time()
-
-
-    # Load the JSON data
-    with open(map_json_file_path, 'r') as f:
-        map_data = json.load(f)
-    
-    for territory_id, territory_dict in map_data["continents"]["1"]["continent_territories"].items():
-        for building_slot_id, building_slot_dict in territory_dict["building_slots"].items():
-            if "targeting_path_ids" in building_slot_dict:
-                distances_by_building_slot[building_slot_id] = {}
-                for targeting_path_id in building_slot_dict["targeting_path_ids"]:
-                    distances_by_building_slot[building_slot_id][targeting_path_id] = find_closest_point_on_path(building_slot_dict["location"], territory_dict["paths"][str(targeting_path_id)]["points"])
-            # end = time.time()
-            # print(f"#{building_slot_id}, time: {end - start}s.")
-    
-    end = time.time()
-    print(f"\n\nCalculation time: {end - start}s.")
-
-    # Write the dictionary to a JSON file
-    with open(target_lengths_json_file_path, 'w') as json_file:
-        json.dump(distances_by_building_slot, json_file, indent=2)
\ No newline at end of file
+def resolve_seed(seed: Optional[int] = None) -> int:
+    """Returns the given simulation seed, or a fresh random one so that every run can be replayed."""
+    return secrets.randbits(32) if seed is None else seed
@@ -0,0 +1,51 @@
+import numpy as np
+from typing import Optional
+from fastapi import HTTPException
+from pydantic import BaseModel
+
+try:
+    import msgpack
+except ImportError:  # MessagePack responses are only served when msgpack is installed
+    msgpack = None
+
+# Response format -> (event format of the simulation, media type)
+RESPONSE_FORMATS = {
+    'json': ('objects', 'application/json'),
+    'columnar': ('columnar', 'application/vnd.conqueria.columnar+json'),
+    'msgpack': ('columnar', 'application/msgpack'),
+}
+MSGPACK_MEDIA_TYPES = ('application/msgpack', 'application/x-msgpack')
+
+
+def negotiate_response_format(response_format: Optional[str] = None, accept: Optional[str] = None) -> str:
+    """
+    Returns the response format of a simulation request: the format query parameter if given, otherwise the
+    format named by the Accept header, JSON event objects by default.
+    """
+    if response_format is not None:
+        if response_format not in RESPONSE_FORMATS:
+            raise HTTPException(status_code=400, detail=f"Unknown response format '{response_format}', "
+                                                        f"expected one of {', '.join(RESPONSE_FORMATS)}.")
+    elif accept and any(media_type in accept for media_type in MSGPACK_MEDIA_TYPES):
+        response_format = 'msgpack'
+    elif accept and RESPONSE_FORMATS['columnar'][1] in accept:
+        response_format = 'columnar'
+    else:
+        response_format = 'json'
+
+    if response_format == 'msgpack' and msgpack is None:
+        raise HTTPException(status_code=406, detail="MessagePack responses require the msgpack package.")
+    return response_format
+
+
+def _msgpack_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Cannot serialize {type(value).__name__} to MessagePack.")
+
+
+def encode_simulation_data(simulation_data: BaseModel, response_format: str) -> bytes:
+    """Serializes a simulation result in the given response format."""
+    if response_format == 'msgpack':
+        return msgpack.packb(simulation_data.dict(), use_bin_type=True, default=_msgpack_default)
+    return simulation_data.json().encode('utf-8')
@@ -0,0 +1,25 @@
+from functools import partial
+from fastapi import HTTPException
+from ..simulation_scenarios.controllers import simulate_attack_generalized
+from ..simulation_scenarios.vectorized import simulate_attack_vectorized
+from ..simulation_scenarios.event_driven import simulate_attack_event_driven
+
+# Version of the simulation rules, bump it whenever a change alters simulation results so that cached
+# results of previous versions are no longer served
+SIMULATION_ENGINE_VERSION = 3
+
+# Interchangeable implementations of the generalized attack simulation
+SIMULATION_ENGINES = {
+    'dict': simulate_attack_generalized,
+    'dict_fast_forward': partial(simulate_attack_generalized, fast_forward=True),
+    'vectorized': simulate_attack_vectorized,
+    'event_driven': simulate_attack_event_driven,
+}
+
+
+def get_simulation_engine(engine: str):
+    """Returns the attack simulation function registered under the given engine name."""
+    if engine not in SIMULATION_ENGINES:
+        raise HTTPException(status_code=400, detail=f"Unknown simulation engine '{engine}'. "
+                                                    f"Available engines: {', '.join(SIMULATION_ENGINES)}")
+    return SIMULATION_ENGINES[engine]
@@ -0,0 +1,96 @@
+import numpy as np
+from typing import List, Dict, Any, Optional, Type
+from pydantic import BaseModel
+from ..simulation_scenarios.schemas import EventColumns
+
+EVENT_FORMATS = ('objects', 'columnar', 'none')
+
+
+class EventList(list):
+    """Event log recording every event as an instance of its event model, the default output format."""
+
+    def __init__(self, event_model: Type[BaseModel]):
+        super().__init__()
+        self.event_model = event_model
+
+    def record(self, **fields):
+        self.append(self.event_model(**fields))
+
+
+class DiscardedEvents(EventList):
+    """Event log that drops every event, for runs where only the final simulation state is needed."""
+
+    def record(self, **fields):
+        pass
+
+    def append(self, event):
+        pass
+
+
+class ColumnarEvents:
+    """
+    Event log storing the events as parallel columns, without building an event model per event.
+
+    Every field of the event model other than timestamp, event_type and data gets its own column, event types
+    are stored as codes into the list of event types in first-seen order, and every key of the events' data
+    dictionaries gets its own column, None for the events that do not have it.
+    """
+
+    def __init__(self, event_model: Type[BaseModel]):
+        self.event_model = event_model
+        self.timestamps: List[float] = []
+        self.event_type_codes: Dict[str, int] = {}
+        self.event_types: List[int] = []
+        self.columns: Dict[str, List[Any]] = {name: [] for name in event_model.__fields__
+                                              if name not in ('timestamp', 'event_type', 'data')}
+        self.data: List[Optional[Dict[str, Any]]] = []
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def record(self, timestamp: float, event_type: str, data: Optional[Dict[str, Any]] = None, **fields):
+        self.timestamps.append(timestamp)
+        code = self.event_type_codes.get(event_type)
+        if code is None:
+            code = self.event_type_codes[event_type] = len(self.event_type_codes)
+        self.event_types.append(code)
+        for name, column in self.columns.items():
+            column.append(fields.get(name))
+        self.data.append(data)
+
+    def to_event_columns(self, timestamp_step: float) -> EventColumns:
+        """
+        Returns the recorded events as EventColumns.
+
+        Timestamps are encoded as the deltas between consecutive events in whole timestamp steps, the first one
+        from 0, so the timestamp of an event is the running sum of the deltas times timestamp_step.
+        """
+        ticks = np.rint(np.asarray(self.timestamps, dtype=np.float64) / timestamp_step).astype(np.int64)
+        data_keys = dict.fromkeys(key for data in self.data if data for key in data)
+        return EventColumns(
+            count=len(self),
+            event_types=list(self.event_type_codes),
+            timestamp_deltas=np.diff(ticks, prepend=0).tolist(),
+            event_type=self.event_types,
+            columns={name: [float(value) if isinstance(value, np.floating) else value for value in column]
+                     for name, column in self.columns.items()},
+            data={key: [data.get(key) if data else None for data in self.data] for key in data_keys}
+        )
+
+
+def new_event_log(event_model: Type[BaseModel], event_format: str = 'objects'):
+    """
+    Returns an empty event log for the given event model and format.
+
+    Parameters:
+    - event_model: Event model class, e.g. TroopEvent.
+    - event_format: 'objects' records event models, 'columnar' records parallel columns and 'none' drops
+      every event.
+    """
+    if event_format == 'objects':
+        return EventList(event_model)
+    if event_format == 'columnar':
+        return ColumnarEvents(event_model)
+    if event_format == 'none':
+        return DiscardedEvents(event_model)
+    raise ValueError(f"Unknown event format '{event_format}', expected one of {', '.join(EVENT_FORMATS)}.")
@@ -0,0 +1,197 @@
+import asyncio
+import multiprocessing
+import os
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import AsyncIterator, Callable, Dict, Any, Optional, Tuple
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+from ..simulation_scenarios.engines import SIMULATION_ENGINES
+from ..simulation_scenarios.encoding import RESPONSE_FORMATS, encode_simulation_data
+
+STREAM_QUEUE_SIZE = 64  # Items a streaming job may put ahead of the consumer
+STREAM_POLL_INTERVAL = 0.1  # Seconds between the checks of a streaming job while it puts no items
+
+
+class SimulationJobError(Exception):
+    """
+    Picklable stand-in for an HTTPException raised by a job in a worker process, e.g. an invalid attack target.
+    HTTPException itself cannot be unpickled by the parent process, which would break the pool.
+    """
+
+    def __init__(self, status_code: int, detail: Any):
+        super().__init__(status_code, detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def run_job(fn: Callable, args: tuple, kwargs: Dict[str, Any]):
+    """Runs a job in a worker process, raising its HTTPExceptions as SimulationJobErrors."""
+    try:
+        return fn(*args, **kwargs)
+    except HTTPException as error:
+        raise SimulationJobError(error.status_code, error.detail) from None
+
+
+class SimulationExecutor:
+    """
+    Process pool running the CPU-bound simulations away from the event loop and the request threadpool.
+
+    At most max_workers jobs run at once and at most max_queued more wait for a worker; submissions beyond that
+    are rejected with 503 and a Retry-After header instead of piling up. A job that does not finish within its
+    timeout is answered with 504. A job that has not started yet is cancelled on timeout, but a running one
+    cannot be interrupted in its worker process. It keeps its slot until it finishes, so the pool is never
+    oversubscribed. HTTPExceptions raised by jobs are answered as they are, and a pool broken by a crashed worker
+    is replaced. Streaming jobs hand their items to the calling process through queues of a manager process.
+    """
+
+    def __init__(self,
+                 max_workers: Optional[int] = None,
+                 max_queued: int = 16,
+                 timeout: Optional[float] = 120,
+                 retry_after: int = 5):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_queued = max_queued
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self._slots = threading.BoundedSemaphore(self.max_workers + max_queued)
+        self._pool_lock = threading.Lock()
+        self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+        self._manager = None
+
+    def _replace_broken_pool(self, pool: ProcessPoolExecutor):
+        """Replaces a broken pool, unless another job already did. Its pending jobs fail and release their slots."""
+        with self._pool_lock:
+            if self._pool is pool:
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def _submit(self, fn: Callable, args: tuple, kwargs: Dict[str, Any]):
+        """Submits a job, to a new pool if the current one is broken. Returns the pool and the future."""
+        pool = self._pool
+        try:
+            return pool, pool.submit(run_job, fn, args, kwargs)
+        except BrokenProcessPool:
+            self._replace_broken_pool(pool)
+            pool = self._pool
+            return pool, pool.submit(run_job, fn, args, kwargs)
+
+    async def run(self, fn: Callable, *args, timeout: Optional[float] = None, **kwargs):
+        """
+        Runs fn(*args, **kwargs) in a worker process and returns its result.
+
+        fn and its arguments must be picklable, i.e. fn must be a module-level function.
+        """
+        if not self._slots.acquire(blocking=False):
+            raise HTTPException(status_code=503, detail="The simulation queue is full, try again later.",
+                                headers={'Retry-After': str(self.retry_after)})
+        try:
+            pool, future = self._submit(fn, args, kwargs)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout or self.timeout)
+        except asyncio.TimeoutError:
+            raise HTTPException(status_code=504, detail="The simulation did not finish in time.")
+        except SimulationJobError as error:
+            raise HTTPException(status_code=error.status_code, detail=error.detail)
+        except BrokenProcessPool:
+            self._replace_broken_pool(pool)
+            raise HTTPException(status_code=500, detail="The simulation worker crashed.")
+
+    def _queue(self, maxsize: int):
+        """Returns a new queue shared with the worker processes, starting the manager process on first use."""
+        with self._pool_lock:
+            if self._manager is None:
+                self._manager = multiprocessing.Manager()
+            return self._manager.Queue(maxsize)
+
+    async def stream(self, fn: Callable, *args, timeout: Optional[float] = None) -> AsyncIterator:
+        """
+        Runs fn(*args, items) in a worker process like run, yielding the items it puts on the items queue as they
+        come. The queue is bounded, so fn should put with a timeout to give up when the consumer went away. Errors
+        of the job, including 503 and 504, are raised once the items it put before are yielded.
+        """
+        items = await run_in_threadpool(self._queue, STREAM_QUEUE_SIZE)
+        job = asyncio.ensure_future(self.run(fn, *args, items, timeout=timeout))
+        job.add_done_callback(lambda job: job.cancelled() or job.exception())  # Errors of abandoned streams
+        try:
+            while not job.done():
+                try:
+                    yield await run_in_threadpool(items.get, True, STREAM_POLL_INTERVAL)
+                except queue.Empty:
+                    pass
+            # The job put all its items before finishing
+            while True:
+                try:
+                    yield await run_in_threadpool(items.get_nowait)
+                except queue.Empty:
+                    break
+            job.result()
+        finally:
+            job.cancel()
+
+    def shutdown(self):
+        with self._pool_lock:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            if self._manager is not None:
+                self._manager.shutdown()
+
+
+def simulate_attack_job(engine: str, simulation_input: Dict[str, Any], response_format: str = 'json') -> bytes:
+    """
+    Runs an attack simulation in a worker process and returns the encoded response, so that the serialization
+    is done by the worker too.
+
+    Parameters:
+    - engine: Name of the simulation engine, see SIMULATION_ENGINES.
+    - simulation_input: Keyword arguments of the simulation function (game_defensive_buildings, attacks,
+      attack_unit_types, buildings_data, map_id, seed).
+    - response_format: Response format, see RESPONSE_FORMATS.
+    """
+    event_format = RESPONSE_FORMATS[response_format][0]
+    simulation_data = SIMULATION_ENGINES[engine](**simulation_input, event_format=event_format)
+    return encode_simulation_data(simulation_data, response_format)
+
+
+def simulate_attack_profiled_job(engine: str, simulation_input: Dict[str, Any],
+                                 response_format: str = 'json') -> Tuple[bytes, Dict[str, Any]]:
+    """
+    Runs a profiled attack simulation in a worker process, see simulate_attack_job. Returns the encoded response
+    and its profile section, so that the calling process can export it as metrics.
+    """
+    event_format = RESPONSE_FORMATS[response_format][0]
+    simulation_data = SIMULATION_ENGINES[engine](**simulation_input, event_format=event_format, profile=True)
+    return encode_simulation_data(simulation_data, response_format), simulation_data.profile.dict()
+
+
+_simulation_executor: Optional[SimulationExecutor] = None
+_simulation_executor_lock = threading.Lock()
+
+
+def get_simulation_executor() -> SimulationExecutor:
+    """Returns the simulation executor of the process, configured from the settings on first use."""
+    global _simulation_executor
+    with _simulation_executor_lock:
+        if _simulation_executor is None:
+            from app.config import settings
+            _simulation_executor = SimulationExecutor(
+                max_workers=settings.SIMULATION_WORKERS or None,
+                max_queued=settings.SIMULATION_MAX_QUEUED_JOBS,
+                timeout=settings.SIMULATION_JOB_TIMEOUT_SECONDS,
+                retry_after=settings.SIMULATION_RETRY_AFTER_SECONDS
+            )
+        return _simulation_executor
+
+
+def shutdown_simulation_executor():
+    global _simulation_executor
+    with _simulation_executor_lock:
+        if _simulation_executor is not None:
+            _simulation_executor.shutdown()
+            _simulation_executor = None
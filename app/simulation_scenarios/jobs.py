@@ -0,0 +1,187 @@
+import gzip
+import json
+import multiprocessing
+import threading
+import time
+import uuid
+from typing import Dict, Any, Optional
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+from ..common.redis_client import InMemoryRedis
+from ..simulation_scenarios.schemas import SimulationJob, SimulationDataGeneralized
+from ..simulation_scenarios.controllers import MAX_SIMULATION_DURATION
+from ..simulation_scenarios.engines import SIMULATION_ENGINES
+from ..simulation_scenarios.executor import get_simulation_executor
+
+
+class SimulationJobStore:
+    """
+    TTL store of the asynchronous simulation jobs.
+
+    Every job is a small JSON status record (status, progress, error) polled by the clients, and its result is
+    stored apart as gzip-compressed JSON once done. Both expire ttl seconds after their last update. Jobs always
+    run in the simulation worker processes. With a Redis client the store is shared by all processes, so the jobs
+    report to it from the workers; with the in-process stand-in, the workers report their progress through a
+    multiprocessing manager queue drained into the store by a background thread, and return their result. At
+    most max_active jobs may be queued or running in the process at once.
+    """
+
+    def __init__(self, redis_client=None, ttl: int = 3600, max_active: int = 32, key_prefix: str = 'simulation_job:'):
+        self.redis_client = redis_client if redis_client is not None else InMemoryRedis()
+        self.shared = not isinstance(self.redis_client, InMemoryRedis)
+        self.ttl = ttl
+        self.max_active = max_active
+        self.key_prefix = key_prefix
+        self._lock = threading.Lock()
+        self._update_lock = threading.Lock()
+        self._active = 0
+        self._manager = None
+        self._progress_queue = None
+
+    def create(self, engine: str) -> SimulationJob:
+        """Registers a new queued job, or raises 503 when too many jobs are active."""
+        with self._lock:
+            if self._active >= self.max_active:
+                raise HTTPException(status_code=503, detail="Too many simulation jobs are running, try again later.")
+            self._active += 1
+        job = SimulationJob(job_id=uuid.uuid4().hex, status='queued', engine=engine, progress=0,
+                            created_at=time.time())
+        self._write(job.dict(exclude={'result'}))
+        return job
+
+    def release(self):
+        """Marks one job of this process as no longer active."""
+        with self._lock:
+            self._active -= 1
+
+    def _write(self, record: Dict[str, Any]):
+        self.redis_client.set(self.key_prefix + record['job_id'], json.dumps(record), ex=self.ttl)
+
+    def _read(self, job_id: str) -> Optional[Dict[str, Any]]:
+        value = self.redis_client.get(self.key_prefix + job_id)
+        return json.loads(value) if value is not None else None
+
+    def update(self, job_id: str, **fields):
+        with self._update_lock:
+            record = self._read(job_id)
+            if record is not None:
+                record.update(fields)
+                self._write(record)
+
+    def report_progress(self, job_id: str, progress: float):
+        """Marks a job running with the given progress, unless it already finished."""
+        with self._update_lock:
+            record = self._read(job_id)
+            if record is not None and record['status'] in ('queued', 'running'):
+                record.update(status='running', progress=progress)
+                self._write(record)
+
+    def progress_queue(self):
+        """
+        Returns the queue of (job ID, progress) reports of the worker processes for a store that is not shared,
+        starting the manager process holding it and the thread draining it on first use.
+        """
+        with self._lock:
+            if self._progress_queue is None:
+                self._manager = multiprocessing.Manager()
+                self._progress_queue = self._manager.Queue()
+                threading.Thread(target=self._drain_progress, args=(self._progress_queue,),
+                                 name='simulation-job-progress', daemon=True).start()
+            return self._progress_queue
+
+    def _drain_progress(self, queue):
+        while True:
+            try:
+                job_id, progress = queue.get()
+            except (EOFError, OSError):  # The manager process shut down
+                return
+            self.report_progress(job_id, progress)
+
+    def set_result(self, job_id: str, result: SimulationDataGeneralized):
+        self.redis_client.set(self.key_prefix + job_id + ':result',
+                              gzip.compress(result.json().encode('utf-8'), mtime=0), ex=self.ttl)
+        self.update(job_id, status='done', progress=1)
+
+    def get(self, job_id: str) -> Optional[SimulationJob]:
+        """Returns a job with its result once done, or None for unknown or expired jobs."""
+        record = self._read(job_id)
+        if record is None:
+            return None
+        if record['status'] == 'done':
+            result = self.redis_client.get(self.key_prefix + job_id + ':result')
+            if result is None:
+                return None
+            record['result'] = json.loads(gzip.decompress(result))
+        return SimulationJob(**record)
+
+
+def run_simulation_job(job_id: str, engine: str, simulation_input: Dict[str, Any],
+                       progress_queue=None) -> Optional[SimulationDataGeneralized]:
+    """
+    Runs the simulation of a job in a simulation worker process.
+
+    Without a progress queue the job store is shared, and the progress, then the result or error, are recorded in
+    it. Otherwise the progress is reported through the queue and the result returned, errors being raised as
+    HTTPExceptions.
+    """
+    store = get_simulation_job_store() if progress_queue is None else None
+    if store is not None:
+        store.update(job_id, status='running')
+    else:
+        progress_queue.put((job_id, 0))
+
+    def report_progress(simulation_time: float):
+        progress = simulation_time / MAX_SIMULATION_DURATION
+        if store is not None:
+            store.update(job_id, progress=progress)
+        else:
+            progress_queue.put((job_id, progress))
+
+    try:
+        result = SIMULATION_ENGINES[engine](**simulation_input, progress_callback=report_progress)
+    except Exception as e:
+        if store is None:
+            raise HTTPException(status_code=500, detail=f"{type(e).__name__}: {e}") from None
+        store.update(job_id, status='failed', error=f"{type(e).__name__}: {e}")
+        return None
+    if store is None:
+        return result
+    store.set_result(job_id, result)
+    return None
+
+
+async def execute_simulation_job(job_id: str, engine: str, simulation_input: Dict[str, Any]):
+    """Background task running a created job to completion."""
+    from app.config import settings
+    store = get_simulation_job_store()
+    try:
+        progress_queue = None if store.shared else await run_in_threadpool(store.progress_queue)
+        result = await get_simulation_executor().run(run_simulation_job, job_id, engine, simulation_input,
+                                                     progress_queue, timeout=settings.SIMULATION_JOB_MAX_SECONDS)
+        if result is not None:
+            await run_in_threadpool(store.set_result, job_id, result)
+    except HTTPException as e:
+        store.update(job_id, status='failed', error=e.detail)
+    except Exception:
+        store.update(job_id, status='failed', error="The simulation job failed.")
+    finally:
+        store.release()
+
+
+_simulation_job_store: Optional[SimulationJobStore] = None
+_simulation_job_store_lock = threading.Lock()
+
+
+def get_simulation_job_store() -> SimulationJobStore:
+    """Returns the job store of the process, configured from the settings on first use."""
+    global _simulation_job_store
+    with _simulation_job_store_lock:
+        if _simulation_job_store is None:
+            from app.config import settings
+            from app.common.redis_client import get_redis_client
+            _simulation_job_store = SimulationJobStore(
+                redis_client=get_redis_client() if settings.SIMULATION_JOBS_USE_REDIS else None,
+                ttl=settings.SIMULATION_JOB_TTL_SECONDS,
+                max_active=settings.SIMULATION_JOB_MAX_ACTIVE
+            )
+        return _simulation_job_store
@@ -0,0 +1,154 @@
+import numpy as np
+from typing import List, Dict, Optional, Tuple
+from ..simulation_scenarios.schemas import OutpostTroopType, OutpostTroopOutcome, OutpostBattleResult
+from ..simulation_scenarios.controllers import resolve_seed
+
+# Battles still undecided after this many seconds, volleys or troop updates (the troops of both teams scanned by
+# every volley) are decided by the troops left
+OUTPOST_BATTLE_MAX_DURATION = 3600
+OUTPOST_BATTLE_MAX_VOLLEYS = 20_000
+OUTPOST_BATTLE_MAX_TROOP_UPDATES = 100_000_000
+OUTPOST_BATTLE_MAX_SIMULATED_TROOPS = 100_000  # Larger teams are always scaled down, see scale_troops
+
+
+def scale_troops(teams: List[Dict[int, OutpostTroopType]],
+                 max_simulated_troops: Optional[int] = None) -> Tuple[List[Dict[int, OutpostTroopType]], float]:
+    """
+    Level of detail of the battle: scales all teams down by the same factor, so that the largest one has at most
+    max_simulated_troops troops. Every simulated troop then stands for scale_factor real troops, with scale_factor
+    times their hp and damage.
+
+    Returns:
+    - The scaled teams and the scale factor, 1 when no scaling is needed.
+    """
+    largest_troop_count = max(sum(troop.count for troop in team.values()) for team in teams)
+    if max_simulated_troops is None or largest_troop_count <= max_simulated_troops:
+        return teams, 1.0
+
+    scale_factor = largest_troop_count / max_simulated_troops
+    scaled_teams = [{
+        troop_type_id: OutpostTroopType(
+            count=max(1, int(troop.count / scale_factor)) if troop.count else 0,
+            damage=troop.damage * scale_factor,
+            hp=troop.hp * scale_factor,
+            accuracy=troop.accuracy,
+            firerate=troop.firerate
+        )
+        for troop_type_id, troop in team.items()
+    } for team in teams]
+    return scaled_teams, scale_factor
+
+
+class OutpostTeam:
+    """
+    Struct-of-arrays state of a team: the hp, the troop type and the current target of every troop, with the
+    troops of each troop type stored contiguously between offsets[k] and offsets[k + 1].
+    """
+
+    def __init__(self, troop_types: Dict[int, OutpostTroopType]):
+        self.type_ids = list(troop_types)
+        troops = list(troop_types.values())
+        counts = [troop.count for troop in troops]
+        self.counts = np.array(counts, dtype=np.int64)
+        self.offsets = np.concatenate(([0], np.cumsum(counts))).astype(np.int64)
+        self.hp = np.repeat(np.array([troop.hp for troop in troops], dtype=np.float64), counts)
+        self.type_index = np.repeat(np.arange(len(troops), dtype=np.int64), counts)
+        self.target = np.full(self.hp.size, -1, dtype=np.int64)  # Index into the enemy team, -1 if none
+        self.damage = np.array([troop.damage for troop in troops], dtype=np.float64)
+        self.accuracy = np.array([troop.accuracy for troop in troops], dtype=np.float64)
+        self.interval = np.array([1 / troop.firerate for troop in troops], dtype=np.float64)
+
+    def alive_count(self) -> int:
+        return int(np.count_nonzero(self.hp > 0))
+
+    def alive_by_type(self) -> np.ndarray:
+        return np.bincount(self.type_index[self.hp > 0], minlength=len(self.type_ids))
+
+    def fire_volley(self, k: int, enemy: 'OutpostTeam', rng: np.random.Generator):
+        """
+        Resolves one volley of the troops of type k: every living troop without a living target picks one at
+        random among the living enemies, then all shots are rolled and their damage applied at once.
+        """
+        shooters = np.flatnonzero(self.hp[self.offsets[k]:self.offsets[k + 1]] > 0) + self.offsets[k]
+        enemy_alive = np.flatnonzero(enemy.hp > 0)
+        if shooters.size == 0 or enemy_alive.size == 0:
+            return
+
+        targets = self.target[shooters]
+        retarget = (targets < 0) | (enemy.hp[targets] <= 0)
+        targets[retarget] = enemy_alive[rng.integers(enemy_alive.size, size=int(np.count_nonzero(retarget)))]
+        self.target[shooters] = targets
+
+        hits = rng.random(shooters.size) < self.accuracy[k]
+        enemy.hp -= np.bincount(targets[hits], minlength=enemy.hp.size) * self.damage[k]
+        np.maximum(enemy.hp, 0, out=enemy.hp)
+
+
+def simulate_outpost_battle(team_a: Dict[int, OutpostTroopType],
+                            team_b: Dict[int, OutpostTroopType],
+                            max_simulated_troops: Optional[int] = None,
+                            seed: Optional[int] = None) -> OutpostBattleResult:
+    """
+    Simulates a battle between the troops of two teams at an outpost until one team is wiped out.
+
+    Every troop type fires a volley every 1 / firerate seconds starting at 0, team A's volleys before team B's
+    when they fall at the same time, so troops killed by an earlier volley never fire.
+
+    Parameters:
+    - team_a: Troop types of team A, indexed by troop type ID.
+    - team_b: Troop types of team B, indexed by troop type ID.
+    - max_simulated_troops: Level of detail, see scale_troops. All troops are simulated if None, up to
+      OUTPOST_BATTLE_MAX_SIMULATED_TROOPS.
+    - seed: Seed of the battle's random generator, drawn at random if None and echoed in the output.
+
+    Returns:
+    - OutpostBattleResult with the winning team and the surviving troops of every troop type.
+    """
+    seed = resolve_seed(seed)
+    rng = np.random.default_rng(seed)
+    max_simulated_troops = min(max_simulated_troops or OUTPOST_BATTLE_MAX_SIMULATED_TROOPS,
+                               OUTPOST_BATTLE_MAX_SIMULATED_TROOPS)
+    (scaled_a, scaled_b), scale_factor = scale_troops([team_a, team_b], max_simulated_troops)
+    teams = [OutpostTeam(scaled_a), OutpostTeam(scaled_b)]
+    troop_updates_per_volley = teams[0].hp.size + teams[1].hp.size
+
+    # Volley schedule of every (team, troop type), the n-th volley of a type falls at n * interval
+    volley_types = [(team_index, k) for team_index, team in enumerate(teams) for k in range(len(team.type_ids))]
+    intervals = np.array([teams[team_index].interval[k] for team_index, k in volley_types], dtype=np.float64)
+    volley_counts = np.zeros(len(volley_types), dtype=np.int64)
+
+    battle_time = 0.0
+    volleys = 0
+    while teams[0].alive_count() and teams[1].alive_count():
+        next_volley_times = volley_counts * intervals
+        battle_time = float(next_volley_times.min())
+        if (battle_time > OUTPOST_BATTLE_MAX_DURATION or volleys >= OUTPOST_BATTLE_MAX_VOLLEYS
+                or volleys * troop_updates_per_volley >= OUTPOST_BATTLE_MAX_TROOP_UPDATES):
+            break
+        for v in np.flatnonzero(next_volley_times == battle_time):
+            team_index, k = volley_types[v]
+            teams[team_index].fire_volley(k, teams[1 - team_index], rng)
+            volley_counts[v] += 1
+            volleys += 1
+
+    def team_outcome(team_input: Dict[int, OutpostTroopType], team: OutpostTeam) -> Dict[int, OutpostTroopOutcome]:
+        alive_by_type = team.alive_by_type()
+        return {
+            troop_type_id: OutpostTroopOutcome(
+                initial_troops=team_input[troop_type_id].count,
+                surviving_troops=min(team_input[troop_type_id].count, round(int(alive) * scale_factor)),
+                survival_rate=100 * int(alive) / int(count) if count else 0.0
+            )
+            for troop_type_id, alive, count in zip(team.type_ids, alive_by_type, team.counts)
+        }
+
+    alive_a, alive_b = teams[0].alive_count(), teams[1].alive_count()
+    return OutpostBattleResult(
+        winning_team='A' if alive_a > alive_b else 'B' if alive_b > alive_a else None,
+        duration=battle_time,
+        volleys=volleys,
+        scale_factor=scale_factor,
+        seed=seed,
+        team_a=team_outcome(team_a, teams[0]),
+        team_b=team_outcome(team_b, teams[1])
+    )
@@ -0,0 +1,199 @@
+import numpy as np
+from scipy.interpolate import CubicSpline
+import math
+import json
+import os
+import threading
+from dataclasses import dataclass
+from typing import List, Dict, Optional
+from ..simulation_scenarios.schemas import PathData, PathPoint
+from ..map.assets import MAPS_DIRECTORY, map_json_path, map_bundle_path, load_map_bundle, iter_map_territories
+
+
+ARC_LENGTH_OVERSAMPLING = 8  # Spline samples per output point used to measure the arc length
+
+
+@dataclass(frozen=True)
+class SmoothedPath:
+    """
+    Compact representation of a smoothed path: one NumPy array per coordinate.
+
+    The points are evenly spaced along the path, so point index i / (n - 1) is also the fraction of the path
+    length travelled, and troops moving at a constant speed cover the same distance per tick on curves and
+    straights. The engines place a troop at the point int(t_pos * (n - 1)) it has reached.
+    """
+    path_id: int
+    x: np.ndarray
+    y: np.ndarray
+    angle: np.ndarray  # Heading towards the next point, in degrees
+    cumulative_length: np.ndarray  # Distance travelled along the path at every point, starting at 0
+
+    @property
+    def length(self) -> float:
+        return float(self.cumulative_length[-1])
+
+    def to_path_data(self) -> PathData:
+        points = [PathPoint(x=x, y=y, angle=angle)
+                  for x, y, angle in zip(self.x.tolist(), self.y.tolist(), self.angle.tolist())]
+        return PathData(path_id=self.path_id, length=self.length, points=points)
+
+
+def smooth_path(path_id: int, control_points: np.ndarray, num_points: int) -> SmoothedPath:
+    """
+    Interpolates the control points of a path with cubic splines and samples it at points evenly spaced in
+    arc length.
+
+    The splines are sampled densely in their parameter first, then the points are placed at equal distances
+    along that polyline with one batched interpolation of its cumulative length.
+
+    Parameters:
+    - path_id: Identifier for the path.
+    - control_points: Array of shape (n, 2) with the (x, y) points defining the path.
+    - num_points: Number of data points to generate along the path.
+
+    Returns:
+    - SmoothedPath with read-only arrays.
+    """
+    t = np.linspace(0, 1, len(control_points))
+    spline_x = CubicSpline(t, control_points[:, 0])
+    spline_y = CubicSpline(t, control_points[:, 1])
+
+    # Points uniform in the spline parameter bunch up where the path bends, resample them by distance
+    t_dense = np.linspace(0, 1, (num_points - 1) * ARC_LENGTH_OVERSAMPLING + 1)
+    x_dense = spline_x(t_dense)
+    y_dense = spline_y(t_dense)
+    dense_length = np.concatenate(([0.0], np.cumsum(np.hypot(np.diff(x_dense), np.diff(y_dense)))))
+    target_length = np.linspace(0, dense_length[-1], num_points)
+    x_smooth = np.interp(target_length, dense_length, x_dense)
+    y_smooth = np.interp(target_length, dense_length, y_dense)
+
+    # Angles and segment lengths between consecutive points, computed once per cache entry with the same
+    # scalar math as calculate_path_length so the cached values match the uncached ones exactly
+    dx = np.diff(x_smooth).tolist()
+    dy = np.diff(y_smooth).tolist()
+    angles = [math.degrees(math.atan2(y, x)) for x, y in zip(dx, dy)]
+    angle = np.array(angles + angles[-1:])  # The last point keeps the angle of the previous one
+    cumulative_length = np.cumsum([0.0] + [math.hypot(x, y) for x, y in zip(dx, dy)])
+
+    for array in (x_smooth, y_smooth, angle, cumulative_length):
+        array.setflags(write=False)
+    return SmoothedPath(path_id=path_id, x=x_smooth, y=y_smooth, angle=angle, cumulative_length=cumulative_length)
+
+
+class MapPathCache:
+    """
+    Process-wide cache of smoothed map paths, keyed by (map_id, path_id, num_points), and of the targeting
+    tables of the maps.
+
+    Each map is loaded once per worker process, from its memory-mapped bundle when it has been compiled and
+    from its JSON file otherwise. Every lookup checks the source file's modification time, and all entries of
+    a map are dropped when that file changes.
+    """
+
+    def __init__(self, maps_directory: str = MAPS_DIRECTORY):
+        self.maps_directory = maps_directory
+        self._lock = threading.Lock()
+        self._control_points: Dict[int, Dict[int, np.ndarray]] = {}
+        self._sources: Dict[int, tuple] = {}
+        self._paths: Dict[tuple, SmoothedPath] = {}
+        self._slots: Dict[int, tuple] = {}
+        self._targeting: Dict[int, 'MapTargetingTable'] = {}
+
+    def map_file_path(self, map_id: int) -> str:
+        """Returns the file the map paths are loaded from: the compiled bundle if present, the JSON otherwise."""
+        bundle_path = map_bundle_path(map_id, self.maps_directory)
+        return bundle_path if os.path.exists(bundle_path) else map_json_path(map_id, self.maps_directory)
+
+    def _load_map(self, map_id: int, file_path: str) -> tuple:
+        """Returns the raw path points, the building slots and the stored targeting table arrays of a map."""
+        if file_path.endswith('.bundle'):
+            bundle = load_map_bundle(map_id, self.maps_directory)
+            control_points = {path_id: bundle.path_points(path_id)[:, :2] for path_id in bundle.path_ids}
+            stored_targeting = {name: array for name, array in bundle.arrays.items() if name.startswith('table_')}
+            return (control_points, bundle.arrays['slot_ids'], bundle.arrays['slot_locations'],
+                    stored_targeting or None)
+
+        with open(file_path, 'r') as f:
+            map_data = json.load(f)
+
+        control_points, slot_ids, slot_locations = {}, [], []
+        for _, _, territory_info in iter_map_territories(map_data.get('continents', {})):
+            for path_id_str, path_info in territory_info.get('paths', {}).items():
+                control_points[int(path_id_str)] = np.array([[point['x'], point['y']] for point in path_info['points']],
+                                                            dtype=np.float64)
+            for slot_id, slot_info in territory_info.get('building_slots', {}).items():
+                slot_ids.append(int(slot_id))
+                slot_locations.append(slot_info['location'])
+        return control_points, np.array(slot_ids), np.array(slot_locations, dtype=np.float64).reshape(-1, 2), None
+
+    def _map_control_points(self, map_id: int) -> Dict[int, np.ndarray]:
+        """Returns the raw path points of a map, reloading the map if its file changed. Requires the lock."""
+        file_path = self.map_file_path(map_id)
+        source = (file_path, os.path.getmtime(file_path))
+        if self._sources.get(map_id) != source:
+            control_points, slot_ids, slot_locations, stored_targeting = self._load_map(map_id, file_path)
+            self._control_points[map_id] = control_points
+            self._slots[map_id] = (slot_ids, slot_locations, stored_targeting)
+            self._sources[map_id] = source
+            self._paths = {key: path for key, path in self._paths.items() if key[0] != map_id}
+            self._targeting.pop(map_id, None)
+        return self._control_points[map_id]
+
+    def get_paths(self, map_id: int, path_ids: Optional[List[int]] = None,
+                  num_points: int = 1000) -> Dict[int, SmoothedPath]:
+        """
+        Returns the smoothed paths of a map indexed by path_id. Unknown path IDs are skipped and all paths of
+        the map are returned when path_ids is None.
+        """
+        with self._lock:
+            control_points = self._map_control_points(map_id)
+            if path_ids is None:
+                path_ids = sorted(control_points)
+
+            paths = {}
+            for path_id in path_ids:
+                if path_id not in control_points:
+                    continue
+                key = (map_id, path_id, num_points)
+                if key not in self._paths:
+                    self._paths[key] = smooth_path(path_id, control_points[path_id], num_points)
+                paths[path_id] = self._paths[key]
+            return paths
+
+    def get_targeting(self, map_id: int) -> 'MapTargetingTable':
+        """
+        Returns the targeting table of a map, see MapTargetingTable. It is read from the compiled bundle when
+        stored there, and computed from the smoothed paths once per map load otherwise.
+        """
+        from ..simulation_scenarios.targeting import MapTargetingTable, TARGETING_NUM_POINTS, compute_targeting_table
+        paths = self.get_paths(map_id, num_points=TARGETING_NUM_POINTS)
+        with self._lock:
+            self._map_control_points(map_id)
+            if map_id not in self._targeting:
+                slot_ids, slot_locations, stored_targeting = self._slots[map_id]
+                if stored_targeting is not None:
+                    self._targeting[map_id] = MapTargetingTable.from_arrays(slot_ids, slot_locations, stored_targeting)
+                else:
+                    self._targeting[map_id] = compute_targeting_table(slot_ids, slot_locations, paths)
+            return self._targeting[map_id]
+
+    def clear(self):
+        with self._lock:
+            self._control_points.clear()
+            self._sources.clear()
+            self._paths.clear()
+            self._slots.clear()
+            self._targeting.clear()
+
+
+map_path_cache = MapPathCache()
+
+
+def get_map_paths(map_id: int, path_ids: Optional[List[int]] = None, num_points: int = 1000) -> Dict[int, SmoothedPath]:
+    """Returns the cached smoothed paths of a map indexed by path_id."""
+    return map_path_cache.get_paths(map_id, path_ids, num_points)
+
+
+def get_map_targeting(map_id: int) -> 'MapTargetingTable':
+    """Returns the cached targeting table of a map."""
+    return map_path_cache.get_targeting(map_id)
@@ -0,0 +1,154 @@
+import gzip
+import hashlib
+import json
+import threading
+import redis
+from collections import OrderedDict
+from typing import Callable, Dict, Any, Optional
+from fastapi import Response
+from ..simulation_scenarios.engines import SIMULATION_ENGINE_VERSION
+
+
+def simulation_cache_key(request_data: Dict[str, Any], engine_version: int = SIMULATION_ENGINE_VERSION) -> str:
+    """
+    Returns the content address of a simulation request: the SHA-256 of its canonical JSON (sorted keys, no
+    whitespace), which includes the engine and the seed, together with the engine version.
+    """
+    canonical = json.dumps({'engine_version': engine_version, 'request': request_data},
+                           sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class SimulationResultCache:
+    """
+    Two-tier cache of serialized simulation results.
+
+    Entries are the gzip-compressed serialized response, so cached results are sent as they are. The first tier
+    is an in-process LRU bounded by entry count and total size, the optional second tier is a Redis client shared
+    by all workers, whose hits are promoted to the first tier.
+    """
+
+    def __init__(self,
+                 max_entries: int = 256,
+                 max_bytes: int = 64 * 1024 * 1024,
+                 redis_client=None,
+                 redis_ttl: int = 3600,
+                 key_prefix: str = 'simulation_result:'):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.redis_client = redis_client
+        self.redis_ttl = redis_ttl
+        self.key_prefix = key_prefix
+        self._lock = threading.Lock()
+        self._entries: OrderedDict = OrderedDict()
+        self._size = 0
+        self.hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+        self.redis_errors = 0
+
+    def _store_local(self, key: str, value: bytes):
+        """Adds an entry to the LRU tier, evicting the least recently used ones. Requires the lock."""
+        if len(value) > self.max_bytes:
+            return
+        if key in self._entries:
+            self._size -= len(self._entries.pop(key))
+        self._entries[key] = value
+        self._size += len(value)
+        while len(self._entries) > self.max_entries or self._size > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._size -= len(evicted)
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Returns the compressed entry of a key, or None on a miss in both tiers."""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+
+        if self.redis_client is not None:
+            try:
+                value = self.redis_client.get(self.key_prefix + key)
+            except redis.RedisError:
+                value = None
+                with self._lock:
+                    self.redis_errors += 1
+            if value is not None:
+                with self._lock:
+                    self._store_local(key, value)
+                    self.hits += 1
+                    self.redis_hits += 1
+                return value
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key: str, value: bytes):
+        with self._lock:
+            self._store_local(key, value)
+        if self.redis_client is not None:
+            try:
+                self.redis_client.set(self.key_prefix + key, value, ex=self.redis_ttl)
+            except redis.RedisError:
+                with self._lock:
+                    self.redis_errors += 1
+
+    def store(self, key: str, serialized: bytes) -> bytes:
+        """Compresses and caches a serialized result; returns the compressed entry."""
+        value = gzip.compress(serialized, mtime=0)
+        self.set(key, value)
+        return value
+
+    def get_or_compute(self, key: str, compute: Callable[[], bytes]) -> bytes:
+        """Returns the compressed entry of a key, running compute and caching its serialized result on a miss."""
+        value = self.get(key)
+        if value is None:
+            value = self.store(key, compute())
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'redis_hits': self.redis_hits,
+                'misses': self.misses,
+                'redis_errors': self.redis_errors,
+                'entries': len(self._entries),
+                'bytes': self._size,
+            }
+
+
+def compressed_response(body: bytes, accept_encoding: Optional[str], media_type: str = 'application/json') -> Response:
+    """Sends a gzip-compressed body as it is when the client accepts gzip, decompressed otherwise."""
+    if accept_encoding and 'gzip' in accept_encoding:
+        return Response(content=body, media_type=media_type,
+                        headers={'Content-Encoding': 'gzip', 'Vary': 'Accept, Accept-Encoding'})
+    return Response(content=gzip.decompress(body), media_type=media_type, headers={'Vary': 'Accept, Accept-Encoding'})
+
+
+_simulation_result_cache: Optional[SimulationResultCache] = None
+_simulation_result_cache_lock = threading.Lock()
+
+
+def get_simulation_result_cache() -> SimulationResultCache:
+    """Returns the result cache of the process, configured from the settings on first use."""
+    global _simulation_result_cache
+    with _simulation_result_cache_lock:
+        if _simulation_result_cache is None:
+            from app.config import settings
+            from app.common.redis_client import get_redis_client
+            _simulation_result_cache = SimulationResultCache(
+                max_entries=settings.SIMULATION_CACHE_MAX_ENTRIES,
+                max_bytes=settings.SIMULATION_CACHE_MAX_BYTES,
+                redis_client=get_redis_client() if settings.SIMULATION_CACHE_USE_REDIS else None,
+                redis_ttl=settings.SIMULATION_CACHE_TTL_SECONDS
+            )
+        return _simulation_result_cache
@@ -1,18 +1,52 @@
-from fastapi import APIRouter, Query, HTTPException
+from fastapi import APIRouter, Query, HTTPException, Header, Response, BackgroundTasks
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse, PlainTextResponse
 from app.simulation_scenarios.controllers import (
-  simulate_attack_generalized,
   simulate_flamethrower_scenario,
   simulate_gunner_scenario,
   get_path_data,
   get_map_paths_data
 )
-from app.simulation_scenarios.schemas import SimulationData, PathData, MapData, SimulationDataGeneralized
+from app.simulation_scenarios.engines import get_simulation_engine
+from app.simulation_scenarios.batch import simulate_attack_batch, validate_batch
+from app.simulation_scenarios.executor import (
+  get_simulation_executor,
+  simulate_attack_job,
+  simulate_attack_profiled_job
+)
+from app.simulation_scenarios.profiling import simulation_metrics
+from app.simulation_scenarios.jobs import get_simulation_job_store, execute_simulation_job
+from app.simulation_scenarios.outpost_battle import simulate_outpost_battle
+from app.simulation_scenarios.streaming import (
+  DEFAULT_STREAM_WINDOW,
+  stream_attack_job
+)
+from app.simulation_scenarios.result_cache import (
+  get_simulation_result_cache,
+  simulation_cache_key,
+  compressed_response
+)
+from app.simulation_scenarios.encoding import (
+  RESPONSE_FORMATS,
+  negotiate_response_format
+)
+from app.simulation_scenarios.schemas import (
+  SimulationData,
+  PathData,
+  MapData,
+  SimulationDataGeneralized,
+  SimulationBatchResult,
+  SimulationJob,
+  OutpostBattleRequest,
+  OutpostBattleResult,
+  SimulationProfile
+)
 from app.authentication.jwt import oauth2_scheme, verify_user_access
 from app.game_defensive_building.schemas import GameDefensiveBuildingBase
 from app.game_generative_building.schemas import GameGenerativeBuildingBase
 from app.attack_unit.schemas import AttackUnitSimResponse
-from typing import List, Dict, Any
-from pydantic import BaseModel
+from typing import List, Dict, Any, Optional
+from pydantic import BaseModel, Field
 
 router = APIRouter(tags=["Simulation Scenarios"])
 
@@ -23,36 +57,141 @@ class MapIdRequest(BaseModel):
     attack_unit_types: List[AttackUnitSimResponse]
     buildings_data: Dict[str, Dict[int, Dict[str, Any]]]
     map_id: int
+    engine: str = "dict"  # "dict", "dict_fast_forward", "vectorized" or "event_driven"
+    seed: Optional[int] = None  # Random if not given, the response echoes it
+
+def get_simulation_input(request: MapIdRequest) -> Dict[str, Any]:
+    return {
+        'game_defensive_buildings': request.game_defensive_buildings,
+        # 'game_generative_buildings': request.game_generative_buildings,
+        'attacks': request.attacks,
+        'attack_unit_types': request.attack_unit_types,
+        'buildings_data': request.buildings_data,
+        'map_id': request.map_id,
+    }
 
 @router.post("/simulate/attack_generalized", response_model=SimulationDataGeneralized)
-def simulate_attack_endpoint(
-    request: MapIdRequest
+async def simulate_attack_endpoint(
+    request: MapIdRequest,
+    response_format: Optional[str] = Query(None, alias="format"),  # "json", "columnar" or "msgpack"
+    accept: Optional[str] = Header(None),
+    accept_encoding: Optional[str] = Header(None),
+    profile: bool = Query(False)  # Per-phase timings in the response, needs SIMULATION_PROFILING_ENABLED
 ):
-    simulation_data = simulate_attack_generalized(
-        game_defensive_buildings=request.game_defensive_buildings,
-        # game_generative_buildings=request.game_generative_buildings,
-        attacks=request.attacks,
-        attack_unit_types=request.attack_unit_types,
-        buildings_data=request.buildings_data,
-        map_id=request.map_id
-    )
-    return simulation_data
+    get_simulation_engine(request.engine)
+    response_format = negotiate_response_format(response_format, accept)
+    media_type = RESPONSE_FORMATS[response_format][1]
+    simulation_input = {**get_simulation_input(request), 'seed': request.seed}
+
+    # Profiles measure this very run, so profiled requests never use the result cache
+    if profile:
+        from app.config import settings
+        if not settings.SIMULATION_PROFILING_ENABLED:
+            raise HTTPException(status_code=403, detail="Simulation profiling is disabled.")
+        body, simulation_profile = await get_simulation_executor().run(
+            simulate_attack_profiled_job, request.engine, simulation_input, response_format)
+        simulation_metrics.record(request.engine, SimulationProfile(**simulation_profile))
+        return Response(content=body, media_type=media_type)
+
+    # Unseeded runs draw a fresh seed, so only seeded requests have a reusable result
+    if request.seed is None:
+        body = await get_simulation_executor().run(simulate_attack_job, request.engine, simulation_input,
+                                                   response_format)
+        return Response(content=body, media_type=media_type)
+
+    # The cache makes blocking Redis calls and (de)compresses large bodies, so it runs on the threadpool
+    cache = get_simulation_result_cache()
+    cache_key = simulation_cache_key({**request.dict(), 'format': response_format})
+    body = await run_in_threadpool(cache.get, cache_key)
+    if body is None:
+        body = await run_in_threadpool(cache.store, cache_key, await get_simulation_executor().run(
+            simulate_attack_job, request.engine, simulation_input, response_format))
+    return await run_in_threadpool(compressed_response, body, accept_encoding, media_type)
+
+@router.post("/simulate/attack_generalized/stream")
+async def simulate_attack_stream_endpoint(
+    request: MapIdRequest,
+    window: float = Query(DEFAULT_STREAM_WINDOW, gt=0)  # Simulation seconds of events per NDJSON record
+):
+    get_simulation_engine(request.engine)
+    executor = get_simulation_executor()
+    simulation_input = {**get_simulation_input(request), 'seed': request.seed}
+    records = executor.stream(stream_attack_job, request.engine, simulation_input, window, executor.timeout)
+    # Wait for the header before streaming, so that invalid or rejected requests still get an error status
+    header = await records.__anext__()
+
+    async def ndjson():
+        yield header
+        async for record in records:
+            yield record
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+@router.post("/simulate/jobs", response_model=SimulationJob, status_code=202)
+def create_simulation_job_endpoint(
+    request: MapIdRequest,
+    background_tasks: BackgroundTasks
+):
+    get_simulation_engine(request.engine)
+    job = get_simulation_job_store().create(request.engine)
+    background_tasks.add_task(execute_simulation_job, job.job_id, request.engine,
+                              {**get_simulation_input(request), 'seed': request.seed})
+    return job
+
+@router.get("/simulate/jobs/{job_id}", response_model=SimulationJob)
+def get_simulation_job_endpoint(job_id: str):
+    job = get_simulation_job_store().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Simulation job {job_id} not found.")
+    return job
+
+@router.get("/simulate/cache/stats")
+def get_simulation_cache_stats():
+    return get_simulation_result_cache().stats()
+
+@router.get("/simulate/metrics", response_class=PlainTextResponse)
+def get_simulation_metrics():
+    # Totals of the profiled runs of this process, in the Prometheus text format
+    return simulation_metrics.render()
+
+class SimulationBatchRequest(MapIdRequest):
+    runs: int = 100  # Replica i runs with seed + i
+    max_workers: Optional[int] = Field(None, gt=0)  # Capped by settings.SIMULATION_BATCH_WORKERS
+
+@router.post("/simulate/attack_generalized/batch", response_model=SimulationBatchResult)
+async def simulate_attack_batch_endpoint(
+    request: SimulationBatchRequest
+):
+    from app.config import settings
+    validate_batch(request.engine, request.runs)
+    # The batch runs inside a worker of the bounded simulation pool, its own processes come on top of them
+    max_workers = min(request.max_workers or settings.SIMULATION_BATCH_WORKERS, settings.SIMULATION_BATCH_WORKERS)
+    return await get_simulation_executor().run(simulate_attack_batch, request.engine, get_simulation_input(request),
+                                               request.runs, request.seed, max_workers)
+
+@router.post("/simulate/outpost_battle", response_model=OutpostBattleResult)
+async def simulate_outpost_battle_endpoint(
+    request: OutpostBattleRequest
+):
+    return await get_simulation_executor().run(simulate_outpost_battle, request.team_a, request.team_b,
+                                               request.max_simulated_troops, request.seed)
 
 @router.get("/simulate/flamethrower", response_model=SimulationData)
-def get_flamethrower_simulation():
-    simulation_data = simulate_flamethrower_scenario()
+async def get_flamethrower_simulation(seed: Optional[int] = None):
+    simulation_data = await get_simulation_executor().run(simulate_flamethrower_scenario, seed)
     return simulation_data
 
 @router.get("/simulate/gunner", response_model=SimulationData)
-def simulate_gunner_endpoint():
-    simulation_data = simulate_gunner_scenario()
+async def simulate_gunner_endpoint(seed: Optional[int] = None):
+    simulation_data = await get_simulation_executor().run(simulate_gunner_scenario, seed)
     return simulation_data
 
 @router.get("/simulate/maps/{map_id}", response_model=MapData)
-def get_map_paths_endpoint(map_id: int, path_ids: List[int], num_points: int = Query(100, gt=1)):
+def get_map_paths_endpoint(map_id: int, path_ids: Optional[List[int]] = Query(None), num_points: int = Query(100, gt=1)):
     try:
-        map_data = get_map_paths_data(map_id, num_points)
-        return map_data
+        paths_data = get_map_paths_data(map_id, path_ids, num_points)
+        return MapData(map_id=map_id, paths=list(paths_data.values()))
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail=f"Map with ID {map_id} not found.")
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
 
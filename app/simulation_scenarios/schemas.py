@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Dict, Any, Optional
 
 class TroopEvent(BaseModel):
@@ -15,7 +15,7 @@ class TurretEvent(BaseModel):
     turret_id: int
     defensive_building_id: int
     event_type: str  # 'rotate', 'fire', 'damage', 'destroyed'
-    angle: float = None  # For 'rotate' event
+    angle: Optional[float] = None  # For 'rotate' event
     data: Optional[Dict[str, Any]] = None
     # target_troop_id: int = None  # For 'fire' event
 
@@ -44,6 +44,7 @@ class SimulationData(BaseModel):
     troops_at_end: int
     troop_events: List[TroopEvent]
     turret_events: List[TurretEvent]
+    seed: Optional[int] = None  # Seed of the run's random generator, to replay it
 
 class PathPoint(BaseModel):
     x: float
@@ -65,6 +66,18 @@ class CityEvent(BaseModel):
     event_type: str  # 'damage', 'captured'
     data: Optional[Dict[str, Any]] = None
 
+class PhaseProfile(BaseModel):
+    seconds: float  # Cumulative wall time, nested phases included
+    calls: int
+
+class SimulationProfile(BaseModel):
+    total_seconds: float
+    ticks: int  # Ticks processed, skipped ticks excluded
+    range_queries: int
+    target_selections: int  # Target re-selections after a target was destroyed
+    events: Dict[str, int]  # Events recorded per event log
+    phases: Dict[str, PhaseProfile]
+
 class SimulationDataGeneralized(BaseModel):
     turret_info: Optional[List[Dict[str, Any]]] = []  # List of turret data
     troop_info: List[Dict[str, Any]]   # List of troop types
@@ -74,3 +87,118 @@ class SimulationDataGeneralized(BaseModel):
     turret_events: Optional[List[TurretEvent]] = []
     generative_building_events: Optional[List[GenerativeBuildingEvent]] = []
     city_events: Optional[List[CityEvent]] = []
+    seed: Optional[int] = None  # Seed of the run's random generator, to replay it
+    profile: Optional[SimulationProfile] = None  # Only for profiled runs
+
+class EventColumns(BaseModel):
+    count: int
+    event_types: List[str]  # The event_type column holds indices into this list
+    timestamp_deltas: List[int]  # In timestamp steps, from the previous event (from 0 for the first one)
+    event_type: List[int]
+    columns: Dict[str, List[Any]]  # One column per event field, e.g. troop_id, path_id
+    data: Dict[str, List[Any]]  # One column per data key, None where an event does not have it
+
+class SimulationDataColumnar(BaseModel):
+    turret_info: Optional[List[Dict[str, Any]]] = []
+    troop_info: List[Dict[str, Any]]
+    troops_at_end: Dict
+    buildings_data: Optional[Dict] = {}
+    timestamp_step: float
+    troop_events: EventColumns
+    turret_events: EventColumns
+    generative_building_events: EventColumns
+    city_events: EventColumns
+    seed: Optional[int] = None
+    profile: Optional[SimulationProfile] = None
+
+class SimulationStreamHeader(BaseModel):
+    type: str = 'header'
+    seed: int
+    window: float  # Duration of the event windows in simulation seconds
+    turret_info: List[Dict[str, Any]]  # Turrets at the start of the simulation
+    troop_info: List[Dict[str, Any]]
+
+class SimulationEventWindow(BaseModel):
+    type: str = 'events'
+    start: float  # Window covering the events with start <= timestamp < end
+    end: float
+    troop_events: List[TroopEvent] = []
+    turret_events: List[TurretEvent] = []
+    generative_building_events: List[GenerativeBuildingEvent] = []
+    city_events: List[CityEvent] = []
+
+class SimulationStreamSummary(BaseModel):
+    type: str = 'summary'
+    seed: int
+    simulation_time: float
+    turret_info: List[Dict[str, Any]]  # Turrets at the end of the simulation
+    troops_at_end: Dict
+    buildings_data: Optional[Dict] = {}
+    event_counts: Dict[str, int]
+
+class SimulationJob(BaseModel):
+    job_id: str
+    status: str  # 'queued', 'running', 'done' or 'failed'
+    engine: str
+    progress: float  # Simulation time / max simulation duration, 1 once done
+    created_at: float
+    error: Optional[str] = None
+    result: Optional[SimulationDataGeneralized] = None  # Set once done
+
+class DistributionSummary(BaseModel):
+    mean: float
+    std: float
+    min: float
+    max: float
+    p5: float
+    p25: float
+    p50: float
+    p75: float
+    p95: float
+
+class TurretOutcome(BaseModel):
+    defensive_building_id: int
+    survival_probability: float
+    hp: DistributionSummary
+
+class GenerativeBuildingOutcome(BaseModel):
+    destroyed_probability: float
+    hp: DistributionSummary
+
+class SimulationBatchResult(BaseModel):
+    engine: str
+    runs: int
+    seed: int  # Replica i runs with seed + i
+    troops_at_end: Dict[str, Dict[str, DistributionSummary]]  # territory_id -> attack_unit_id -> troops
+    turrets: Dict[int, TurretOutcome]
+    generative_buildings: Dict[str, GenerativeBuildingOutcome]
+
+OUTPOST_MAX_TROOP_COUNT = 10_000_000
+OUTPOST_MAX_FIRERATE = 10
+
+class OutpostTroopType(BaseModel):
+    count: int = Field(ge=0, le=OUTPOST_MAX_TROOP_COUNT)
+    damage: float = Field(ge=0)
+    hp: float = Field(gt=0)
+    accuracy: float = Field(ge=0, le=1)  # Probability to hit
+    firerate: float = Field(gt=0, le=OUTPOST_MAX_FIRERATE)  # Volleys per second
+
+class OutpostBattleRequest(BaseModel):
+    team_a: Dict[int, OutpostTroopType]  # Troop type ID -> troops
+    team_b: Dict[int, OutpostTroopType]
+    max_simulated_troops: Optional[int] = Field(default=None, gt=0)  # Level of detail, all troops if not given
+    seed: Optional[int] = None  # Random if not given, the response echoes it
+
+class OutpostTroopOutcome(BaseModel):
+    initial_troops: int
+    surviving_troops: int
+    survival_rate: float  # Percentage of the simulated troops left
+
+class OutpostBattleResult(BaseModel):
+    winning_team: Optional[str]  # 'A', 'B', or None on a draw
+    duration: float  # Battle time in seconds
+    volleys: int
+    scale_factor: float  # Real troops per simulated troop
+    seed: int
+    team_a: Dict[int, OutpostTroopOutcome]
+    team_b: Dict[int, OutpostTroopOutcome]
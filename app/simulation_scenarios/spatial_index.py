@@ -0,0 +1,89 @@
+import heapq
+import numpy as np
+from bisect import bisect_right
+from typing import List, Dict, Any, Tuple
+from ..simulation_scenarios.path_cache import SmoothedPath
+
+
+class TurretRangeIndex:
+    """
+    Precomputed turret range lookups for path-bound troops.
+
+    Troops only ever stand on the points of their smoothed path, so whether a troop is inside a turret's range
+    only depends on its path and its point index. The index evaluates the range circle of every turret against
+    every path point once, with the same distance formula as the tick update, and stores:
+    - point_in_range: boolean table of shape (n_paths, n_points, n_turrets), rows in sorted path_id order and
+      columns in the iteration order of the turrets dictionary.
+    - intervals: for every turret and every path crossing its range, the [start, end) point index intervals
+      where the path lies inside the range circle.
+    A range query is then an interval check on the troop's t_pos, restricted to the paths crossing the range.
+    """
+
+    def __init__(self, turrets: Dict[int, Dict[str, Any]], paths_data: Dict[int, SmoothedPath]):
+        self.turret_ids = list(turrets)
+        self.path_ids = sorted(paths_data)
+        self.path_slots = {path_id: slot for slot, path_id in enumerate(self.path_ids)}
+
+        path_x = np.array([paths_data[path_id].x for path_id in self.path_ids]).reshape(len(self.path_ids), -1)
+        path_y = np.array([paths_data[path_id].y for path_id in self.path_ids]).reshape(len(self.path_ids), -1)
+        self.num_points = path_x.shape[1]
+
+        turret_list = list(turrets.values())
+        turret_x = np.array([turret['position']['x'] for turret in turret_list], dtype=np.float64)
+        turret_y = np.array([turret['position']['y'] for turret in turret_list], dtype=np.float64)
+        turret_range = np.array([turret['stats']['range'] for turret in turret_list], dtype=np.float64)
+        self.point_in_range = np.hypot(path_x[:, :, np.newaxis] - turret_x,
+                                       path_y[:, :, np.newaxis] - turret_y) <= turret_range
+
+        self.intervals: Dict[int, Dict[int, Tuple[List[int], List[int]]]] = {}
+        for k, turret_id in enumerate(self.turret_ids):
+            self.intervals[turret_id] = {}
+            for slot, path_id in enumerate(self.path_ids):
+                edges = np.diff(np.concatenate(([0], self.point_in_range[slot, :, k].astype(np.int8), [0])))
+                starts = np.flatnonzero(edges == 1)
+                if starts.size:
+                    self.intervals[turret_id][path_id] = (starts.tolist(), np.flatnonzero(edges == -1).tolist())
+
+    def next_point_in_range(self, turret_alive: np.ndarray) -> np.ndarray:
+        """
+        Returns, for every path row and point, the first point at or after it that is inside the range of a
+        living turret, num_points where there is none. turret_alive follows the column order of point_in_range.
+        The table has one extra sentinel column, so it can be looked up at point index + 1.
+        """
+        in_any_range = (self.point_in_range & turret_alive).any(axis=2)
+        indices = np.where(in_any_range, np.arange(self.num_points), self.num_points)
+        next_in_range = np.minimum.accumulate(indices[:, ::-1], axis=1)[:, ::-1]
+        sentinel = np.full((next_in_range.shape[0], 1), self.num_points)
+        return np.hstack([next_in_range, sentinel])
+
+    def t_intervals(self, turret_id: int, path_id: int) -> List[Tuple[float, float]]:
+        """Returns the [start, end) t_pos intervals where a path lies inside the range of a turret."""
+        starts, ends = self.intervals[turret_id].get(path_id, ([], []))
+        return [(start / (self.num_points - 1), end / (self.num_points - 1)) for start, end in zip(starts, ends)]
+
+    def contains(self, turret_id: int, path_id: int, t_pos: float) -> bool:
+        """Returns whether a troop at t_pos on the given path is inside the range of the turret."""
+        intervals = self.intervals[turret_id].get(path_id)
+        if intervals is None:
+            return False
+        starts, ends = intervals
+        point_idx = int(t_pos * (self.num_points - 1))
+        i = bisect_right(starts, point_idx) - 1
+        return i >= 0 and point_idx < ends[i]
+
+    def troops_in_range(self, turret_id: int, troops_by_path: Dict[int, List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """
+        Returns the alive, started troops inside the range of a turret.
+
+        Only the troops walking the paths that cross the range are visited. troops_by_path holds the troops of
+        every path in troop list order, and the result keeps that order across paths (troop IDs follow it).
+        """
+        in_range = []
+        for path_id in self.intervals[turret_id]:
+            path_troops = [troop for troop in troops_by_path.get(path_id, ())
+                           if troop['alive'] and troop['pos'] and self.contains(turret_id, path_id, troop['t_pos'])]
+            if path_troops:
+                in_range.append(path_troops)
+        if len(in_range) == 1:
+            return in_range[0]
+        return list(heapq.merge(*in_range, key=lambda troop: troop['id']))
@@ -0,0 +1,98 @@
+from typing import List, Dict, Any, Iterator
+from pydantic import BaseModel
+from ..simulation_scenarios.schemas import SimulationStreamHeader, SimulationEventWindow, SimulationStreamSummary
+from ..simulation_scenarios.controllers import build_turret_info, build_troop_info
+from ..simulation_scenarios.vectorized import VectorizedAttackSimulation, prepare_attack_simulation
+from ..simulation_scenarios.event_driven import EventDrivenAttackSimulation
+from ..attack_unit.schemas import AttackUnitSimResponse
+
+DEFAULT_STREAM_WINDOW = 5.0  # Simulation seconds of events per streamed record
+EVENT_LOGS = ('troop_events', 'turret_events', 'generative_building_events', 'city_events')
+
+# Step-wise simulation classes by engine name. The dict engine runs as a single loop, its requests are streamed
+# by the vectorized engine, which produces the same events, and by the event-driven one when fast-forwarding.
+STREAMING_SIMULATIONS = {
+    'dict': VectorizedAttackSimulation,
+    'dict_fast_forward': EventDrivenAttackSimulation,
+    'vectorized': VectorizedAttackSimulation,
+    'event_driven': EventDrivenAttackSimulation,
+}
+
+
+def ndjson_record(record: BaseModel) -> bytes:
+    return (record.json() + '\n').encode('utf-8')
+
+
+def stream_attack_simulation(simulation: VectorizedAttackSimulation,
+                             attack_unit_types: List[AttackUnitSimResponse],
+                             seed: int,
+                             window: float = DEFAULT_STREAM_WINDOW) -> Iterator[bytes]:
+    """
+    Runs a prepared attack simulation and yields its output as NDJSON records while it runs.
+
+    The stream starts with a SimulationStreamHeader, continues with one SimulationEventWindow per time window
+    that has events, and is closed by a SimulationStreamSummary with the final state. The simulation's event
+    logs are drained after every step, so only the events of the current window are held in memory.
+
+    Parameters:
+    - simulation: Simulation returned by prepare_attack_simulation, recording event objects.
+    - attack_unit_types: List of AttackUnitSimResponse objects.
+    - seed: Seed of the simulation, echoed in the header and the summary.
+    - window: Duration of the event windows in simulation seconds.
+    """
+    yield ndjson_record(SimulationStreamHeader(
+        seed=seed,
+        window=window,
+        turret_info=build_turret_info(simulation.turrets),
+        troop_info=build_troop_info(attack_unit_types)
+    ))
+
+    event_counts: Dict[str, int] = dict.fromkeys(EVENT_LOGS, 0)
+    pending: Dict[str, list] = {name: [] for name in EVENT_LOGS}
+    pending_window = 0
+    simulation_time = 0
+    for simulation_time in simulation.iter_steps():
+        step_window = int(simulation_time // window)
+        if step_window != pending_window and any(pending.values()):
+            yield ndjson_record(SimulationEventWindow(start=pending_window * window,
+                                                      end=(pending_window + 1) * window, **pending))
+            pending = {name: [] for name in EVENT_LOGS}
+        pending_window = step_window
+
+        for name in EVENT_LOGS:
+            event_log = getattr(simulation, name)
+            if event_log:
+                pending[name].extend(event_log)
+                event_counts[name] += len(event_log)
+                event_log.clear()
+
+    if any(pending.values()):
+        yield ndjson_record(SimulationEventWindow(start=pending_window * window,
+                                                  end=(pending_window + 1) * window, **pending))
+
+    yield ndjson_record(SimulationStreamSummary(
+        seed=seed,
+        simulation_time=simulation_time,
+        turret_info=build_turret_info(simulation.turrets),
+        troops_at_end=simulation.troops_at_end,
+        buildings_data=simulation.buildings_data,
+        event_counts=event_counts
+    ))
+
+
+def stream_attack_job(engine: str, simulation_input: Dict[str, Any], window: float, put_timeout: float, records):
+    """
+    Runs an attack simulation in a worker process, putting its NDJSON records, see stream_attack_simulation, on
+    the records queue. Gives up when the consumer takes no record for put_timeout seconds.
+
+    Parameters:
+    - engine: Name of the simulation engine, see STREAMING_SIMULATIONS.
+    - simulation_input: Keyword arguments of prepare_attack_simulation (game_defensive_buildings, attacks,
+      attack_unit_types, buildings_data, map_id, seed).
+    - window: Duration of the event windows in simulation seconds.
+    - put_timeout: Seconds to wait for room in the records queue.
+    - records: Queue shared with the calling process, see SimulationExecutor.stream.
+    """
+    simulation, seed = prepare_attack_simulation(STREAMING_SIMULATIONS[engine], **simulation_input)
+    for record in stream_attack_simulation(simulation, simulation_input['attack_unit_types'], seed, window):
+        records.put(record, timeout=put_timeout)
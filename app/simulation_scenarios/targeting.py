@@ -0,0 +1,143 @@
+import numpy as np
+from dataclasses import dataclass
+from typing import List, Dict, Optional, Sequence
+from ..simulation_scenarios.path_cache import SmoothedPath, smooth_path
+
+TURRET_RANGE_MODIFIER = 100  # Map units per turret range level
+TURRET_RANGE_LEVELS = tuple(range(1, 11))  # Every range level a turret can reach
+TARGETING_NUM_POINTS = 1000  # Points of the smoothed paths walked by the simulated troops
+
+
+@dataclass(frozen=True)
+class MapTargetingTable:
+    """
+    Precomputed geometry between the building slots and the paths of a map, rows in slot order and columns in
+    sorted path_id order. Path positions are t_pos values, fractions of the path length as walked by the troops.
+    - closest_t: (n_slots, n_paths) position of the path point closest to the slot, where troops attacking a
+      building on the slot stop.
+    - line_of_fire: (n_slots, n_paths) distance from the slot to that point.
+    - entry_t, exit_t: (n_slots, n_paths, n_levels) first and last positions of the path inside the range of a
+      turret of every level of range_levels built on the slot, NaN when the path never enters it.
+    """
+    slot_ids: np.ndarray
+    slot_locations: np.ndarray
+    path_ids: np.ndarray
+    range_levels: np.ndarray
+    closest_t: np.ndarray
+    line_of_fire: np.ndarray
+    entry_t: np.ndarray
+    exit_t: np.ndarray
+
+    def __post_init__(self):
+        object.__setattr__(self, '_slot_rows', {(float(x), float(y)): row
+                                                for row, (x, y) in enumerate(self.slot_locations.tolist())})
+        object.__setattr__(self, '_path_columns', {int(path_id): column
+                                                   for column, path_id in enumerate(self.path_ids.tolist())})
+
+    def slot_row(self, location: Sequence[float]) -> Optional[int]:
+        """Returns the row of the building slot at a location, None if no slot of the map is there."""
+        return self._slot_rows.get((float(location[0]), float(location[1])))
+
+    def target_length(self, location: Sequence[float], path_id: int) -> Optional[float]:
+        """Returns the closest_t of a path for the building at a location, None for unknown slots or paths."""
+        row = self.slot_row(location)
+        column = self._path_columns.get(path_id)
+        if row is None or column is None:
+            return None
+        return float(self.closest_t[row, column])
+
+    def targeting_paths(self, location: Sequence[float], path_ids: Sequence[int]) -> Dict[int, float]:
+        """Returns the closest_t of the given paths for the building slot at a location, indexed by path_id."""
+        target_lengths = {path_id: self.target_length(location, path_id) for path_id in path_ids}
+        return {path_id: t for path_id, t in target_lengths.items() if t is not None}
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        """Returns the table arrays that are stored in a map bundle, see from_arrays."""
+        return {
+            'table_path_ids': self.path_ids,
+            'table_range_levels': self.range_levels,
+            'table_closest_t': self.closest_t,
+            'table_line_of_fire': self.line_of_fire,
+            'table_entry_t': self.entry_t,
+            'table_exit_t': self.exit_t,
+        }
+
+    @classmethod
+    def from_arrays(cls, slot_ids: np.ndarray, slot_locations: np.ndarray,
+                    arrays: Dict[str, np.ndarray]) -> 'MapTargetingTable':
+        return cls(
+            slot_ids=slot_ids,
+            slot_locations=slot_locations,
+            path_ids=arrays['table_path_ids'],
+            range_levels=arrays['table_range_levels'],
+            closest_t=arrays['table_closest_t'],
+            line_of_fire=arrays['table_line_of_fire'],
+            entry_t=arrays['table_entry_t'],
+            exit_t=arrays['table_exit_t'],
+        )
+
+
+def compute_targeting_table(slot_ids: Sequence[int],
+                            slot_locations: np.ndarray,
+                            paths: Dict[int, SmoothedPath],
+                            range_levels: Sequence[int] = TURRET_RANGE_LEVELS) -> MapTargetingTable:
+    """
+    Computes the targeting table of a map.
+
+    The distances between every slot and every point of a path, and their comparison with every range level,
+    are evaluated at once for all slots, so the only loop runs over the paths, which bounds the memory to one
+    (n_slots, n_points, n_levels) mask at a time.
+
+    Parameters:
+    - slot_ids: IDs of the building slots of the map.
+    - slot_locations: Array of shape (n_slots, 2) with the (x, y) locations of the slots.
+    - paths: Smoothed paths of the map indexed by path_id, all sampled with the same number of points.
+    - range_levels: Turret range levels, in units of TURRET_RANGE_MODIFIER.
+
+    Returns:
+    - MapTargetingTable with read-only arrays.
+    """
+    slot_locations = np.asarray(slot_locations, dtype=np.float64).reshape(-1, 2)
+    path_ids = sorted(paths)
+    ranges = np.asarray(range_levels, dtype=np.float64) * TURRET_RANGE_MODIFIER
+    n_slots, n_paths, n_levels = len(slot_locations), len(path_ids), len(ranges)
+
+    closest_t = np.zeros((n_slots, n_paths))
+    line_of_fire = np.zeros((n_slots, n_paths))
+    entry_t = np.full((n_slots, n_paths, n_levels), np.nan)
+    exit_t = np.full((n_slots, n_paths, n_levels), np.nan)
+    for column, path_id in enumerate(path_ids):
+        path = paths[path_id]
+        last_point = len(path.x) - 1
+        distances = np.hypot(path.x - slot_locations[:, 0:1], path.y - slot_locations[:, 1:2])
+        closest_point = distances.argmin(axis=1)
+        closest_t[:, column] = closest_point / last_point
+        line_of_fire[:, column] = distances[np.arange(n_slots), closest_point]
+
+        in_range = distances[:, :, np.newaxis] <= ranges
+        enters = in_range.any(axis=1)
+        first_point = in_range.argmax(axis=1)
+        last_in_range = last_point - in_range[:, ::-1, :].argmax(axis=1)
+        entry_t[:, column, :] = np.where(enters, first_point / last_point, np.nan)
+        exit_t[:, column, :] = np.where(enters, last_in_range / last_point, np.nan)
+
+    table = MapTargetingTable(
+        slot_ids=np.asarray(slot_ids, dtype=np.int32),
+        slot_locations=slot_locations,
+        path_ids=np.array(path_ids, dtype=np.int32),
+        range_levels=np.asarray(range_levels, dtype=np.int32),
+        closest_t=closest_t,
+        line_of_fire=line_of_fire,
+        entry_t=entry_t,
+        exit_t=exit_t,
+    )
+    for array in (table.slot_ids, table.slot_locations, *table.arrays().values()):
+        array.setflags(write=False)
+    return table
+
+
+def compute_map_targeting_table(slot_ids: List[int], slot_locations: np.ndarray,
+                                control_points: Dict[int, np.ndarray]) -> MapTargetingTable:
+    """Smooths the paths of a map like the simulation does, then computes its targeting table."""
+    paths = {path_id: smooth_path(path_id, points, TARGETING_NUM_POINTS) for path_id, points in control_points.items()}
+    return compute_targeting_table(slot_ids, slot_locations, paths)
@@ -0,0 +1,350 @@
+import numpy as np
+from typing import List, Dict, Any, Optional, Iterator, Tuple, Callable
+from ..simulation_scenarios.schemas import (
+    SimulationDataGeneralized,
+    TroopEvent,
+    TurretEvent,
+    GenerativeBuildingEvent,
+    CityEvent,
+)
+from ..simulation_scenarios.path_cache import SmoothedPath, get_map_paths, get_map_targeting
+from ..simulation_scenarios.spatial_index import TurretRangeIndex
+from ..simulation_scenarios.events import new_event_log
+from ..simulation_scenarios.profiling import SimulationProfiler
+from ..simulation_scenarios.controllers import (
+    initialize_turrets,
+    initialize_troops,
+    build_simulation_data_generalized,
+    select_target,
+    is_target_alive,
+    apply_damage_to_target,
+    calculate_angle,
+    resolve_seed,
+    SimulationEndException,
+    SIMULATION_STEP,
+    MAX_SIMULATION_DURATION,
+    PROGRESS_REPORT_INTERVAL,
+)
+from ..game_defensive_building.schemas import GameDefensiveBuildingBase
+from ..attack_unit.schemas import AttackUnitSimResponse
+
+
+class VectorizedAttackSimulation:
+    """
+    Struct-of-arrays variant of the generalized attack simulation.
+
+    The per-troop hot state (t_pos, position, hp, speed, alive, path and target length) lives in NumPy
+    arrays, so a whole wave is moved in one vectorized step and the turret ranges of the whole wave are
+    looked up from the precomputed TurretRangeIndex. Everything that has an observable order (events, target
+    selection and accuracy rolls) is still processed troop by troop and turret by turret, in the same order
+    as the dict engine, so both engines produce the same events under the same seed.
+    """
+
+    # Looked up on the instance, so that a SimulationProfiler can time them
+    select_target = staticmethod(select_target)
+    apply_damage_to_target = staticmethod(apply_damage_to_target)
+
+    def __init__(self,
+                 turrets: Dict[int, Dict[str, Any]],
+                 troops: List[Dict[str, Any]],
+                 paths_data: Dict[int, SmoothedPath],
+                 buildings_data: Dict[str, Dict[int, Dict[str, Any]]],
+                 troops_at_end: Dict,
+                 rng: np.random.Generator,
+                 event_format: str = 'objects'):
+        self.turrets = turrets
+        self.troops = troops
+        self.buildings_data = buildings_data
+        self.troops_at_end = troops_at_end
+        self.rng = rng
+        self.troop_events: List[TroopEvent] = new_event_log(TroopEvent, event_format)
+        self.turret_events: List[TurretEvent] = new_event_log(TurretEvent, event_format)
+        self.generative_building_events: List[GenerativeBuildingEvent] = new_event_log(GenerativeBuildingEvent, event_format)
+        self.city_events: List[CityEvent] = new_event_log(CityEvent, event_format)
+
+        # Path tables, one row per path, and the precomputed turret ranges over them
+        self.range_index = TurretRangeIndex(turrets, paths_data)
+        path_ids = self.range_index.path_ids
+        path_slots = self.range_index.path_slots
+        self.path_x = np.array([paths_data[path_id].x for path_id in path_ids])
+        self.path_y = np.array([paths_data[path_id].y for path_id in path_ids])
+        self.num_points = self.path_x.shape[1] if path_ids else 0
+        self.point_in_range = self.range_index.point_in_range
+
+        # Troop state
+        n_troops = len(troops)
+        self.troop_id = np.array([troop['id'] for troop in troops], dtype=np.int64)
+        self.path_slot = np.array([path_slots[troop['path_id']] for troop in troops], dtype=np.int64)
+        self.path_length = np.array([paths_data[troop['path_id']].length for troop in troops], dtype=np.float64)
+        self.start_time = np.array([troop['start_time'] for troop in troops], dtype=np.float64)
+        self.speed = np.array([troop['speed'] for troop in troops], dtype=np.float64)
+        self.hp = np.array([troop['hp'] for troop in troops], dtype=np.int64)
+        self.alive = np.ones(n_troops, dtype=bool)
+        self.started = np.zeros(n_troops, dtype=bool)
+        self.target_reached = np.zeros(n_troops, dtype=bool)
+        self.no_target = np.array([troop['target'] is None for troop in troops], dtype=bool)
+        self.target_length = np.array([troop['target']['target_length'] if troop['target'] else np.inf
+                                       for troop in troops], dtype=np.float64)
+        self.t_pos = np.zeros(n_troops, dtype=np.float64)
+        self.point_idx = np.zeros(n_troops, dtype=np.int64)
+        self.pos_x = np.zeros(n_troops, dtype=np.float64)
+        self.pos_y = np.zeros(n_troops, dtype=np.float64)
+
+        # Turrets, in the iteration order of the turrets dictionary like the range table columns
+        self.turret_list = list(turrets.values())
+
+    def is_finished(self) -> bool:
+        return bool(np.all(~self.alive | self.target_reached))
+
+    def step(self, simulation_time: float):
+        """Advances the simulation state by one tick at the given simulation time."""
+        self._update_troops(simulation_time)
+        self._update_turrets(simulation_time)
+
+    def _update_troops(self, simulation_time: float):
+        active = np.flatnonzero(self.alive & (simulation_time >= self.start_time))
+        if active.size == 0:
+            return
+
+        # Move the whole wave at once
+        t_pos = np.minimum((simulation_time - self.start_time[active]) * self.speed[active] / self.path_length[active], 1)
+        point_idx = (t_pos * (self.num_points - 1)).astype(np.int64)
+        self.t_pos[active] = t_pos
+        self.point_idx[active] = point_idx
+        self.pos_x[active] = self.path_x[self.path_slot[active], point_idx]
+        self.pos_y[active] = self.path_y[self.path_slot[active], point_idx]
+
+        # Only troops that start, reach their target or reach the end of the path emit events this tick
+        no_target = self.no_target[active]
+        pending = (~self.started[active]
+                   | (~no_target & (t_pos >= self.target_length[active]))
+                   | (no_target & (t_pos >= 1)))
+        for i in active[pending]:
+            self._resolve_troop(int(i), simulation_time)
+
+    def _resolve_troop(self, i: int, simulation_time: float):
+        troop = self.troops[i]
+        t_pos = self.t_pos[i]
+
+        if not self.started[i]:
+            self.started[i] = True
+            self.troop_events.record(
+                timestamp=simulation_time,
+                troop_id=troop['id'],
+                attack_unit_id=troop['attack_unit_id'],
+                path_id=troop['path_id'],
+                event_type='start'
+            )
+
+        if not self.no_target[i]:
+            while t_pos >= troop['target']['target_length']:
+                if is_target_alive(troop['target'], self.turrets, self.buildings_data):
+                    self.alive[i] = False
+                    self.target_reached[i] = True
+                    self.troop_events.record(
+                        timestamp=simulation_time,
+                        troop_id=troop['id'],
+                        attack_unit_id=troop['attack_unit_id'],
+                        path_id=troop['path_id'],
+                        event_type='reach_target'
+                    )
+                    self.apply_damage_to_target(troop, troop['target'], simulation_time, self.troops_at_end,
+                                                self.buildings_data, self.generative_building_events,
+                                                self.city_events, self.turrets, self.turret_events)
+                    break
+                else:
+                    # Target is destroyed, select a new target
+                    new_target = self.select_target(troop['target_priorities'], self.turrets, self.buildings_data,
+                                                    self.rng)
+                    if new_target:
+                        troop['target'] = new_target
+                        self.target_length[i] = new_target['target_length']
+                    else:
+                        # No targets left alive, troop continues moving
+                        self.no_target[i] = True
+                        break
+        elif t_pos >= 1:
+            self.alive[i] = False
+            self.troop_events.record(
+                timestamp=simulation_time,
+                troop_id=troop['id'],
+                attack_unit_id=troop['attack_unit_id'],
+                path_id=troop['path_id'],
+                event_type='reached_end_of_path'
+            )
+
+    def _update_turrets(self, simulation_time: float):
+        on_field = np.flatnonzero(self.alive & self.started)
+        if on_field.size == 0:
+            return
+
+        troop_in_range = self._troops_in_range(on_field)
+
+        for k, turret in enumerate(self.turret_list):
+            if not turret['alive']:
+                continue
+            # Troops killed by previous turrets in this tick are no longer targetable
+            in_range = on_field[troop_in_range[:, k] & self.alive[on_field]]
+            if in_range.size == 0:
+                continue
+
+            turret_pos = (turret['position']['x'], turret['position']['y'])
+            closest = int(in_range[np.argmax(self.t_pos[in_range])])
+            new_turret_angle = calculate_angle(turret_pos, (float(self.pos_x[closest]), float(self.pos_y[closest])))
+            if new_turret_angle != turret['angle']:
+                turret['angle'] = new_turret_angle
+                self.turret_events.record(
+                    timestamp=simulation_time,
+                    turret_id=turret['id'],
+                    defensive_building_id=turret['defensive_building_id'],
+                    event_type='rotate',
+                    angle=turret['angle']
+                )
+
+            if (simulation_time - turret['last_fire_time']) < (1 / turret['stats']['firerate']):
+                continue
+            turret['last_fire_time'] = simulation_time
+            self.turret_events.record(
+                timestamp=simulation_time,
+                turret_id=turret['id'],
+                defensive_building_id=turret['defensive_building_id'],
+                event_type='fire'
+            )
+
+            if turret['type'] == 'flamethrower':
+                # Flamethrower damages every troop within its cone
+                angles = np.degrees(np.arctan2(self.pos_y[in_range] - turret_pos[1], self.pos_x[in_range] - turret_pos[0]))
+                angle_diff = np.mod(angles - turret['angle'] + 180, 360) - 180
+                target_troops = in_range[np.abs(angle_diff) <= turret['stats']['cone_angle'] / 2]
+            else:
+                # Gunner turret damages the troop closest to its target
+                target_troops = (closest,)
+            self._apply_turret_damage(turret, target_troops, simulation_time)
+
+    def _troops_in_range(self, troops: np.ndarray) -> np.ndarray:
+        """Returns the troop-to-turret range table of the given troops, looked up from their path points."""
+        return self.point_in_range[self.path_slot[troops], self.point_idx[troops]]
+
+    def _apply_turret_damage(self, turret: Dict[str, Any], target_troops, simulation_time: float):
+        damage = turret['stats']['damage']
+        # One accuracy roll per target troop, drawn in one batch from the same stream as the dict engine's rolls
+        hits = self.rng.random(len(target_troops)) < turret['stats']['accuracy']
+        for i in np.asarray(target_troops)[hits]:
+            troop = self.troops[i]
+            self.hp[i] -= damage
+            self.troop_events.record(
+                timestamp=simulation_time,
+                troop_id=troop['id'],
+                attack_unit_id=troop['attack_unit_id'],
+                path_id=troop['path_id'],
+                event_type='damage',
+                data={'damage': damage, 'remaining_hp': int(self.hp[i])}
+            )
+            if self.hp[i] <= 0:
+                self.alive[i] = False
+                self.troop_events.record(
+                    timestamp=simulation_time,
+                    troop_id=troop['id'],
+                    attack_unit_id=troop['attack_unit_id'],
+                    path_id=troop['path_id'],
+                    event_type='death'
+                )
+
+    def iter_steps(self) -> Iterator[float]:
+        """Steps the simulation with the fixed time step until it finishes, yielding the time of every step."""
+        simulation_time = 0
+        try:
+            while simulation_time < MAX_SIMULATION_DURATION:
+                self.step(simulation_time)
+                yield simulation_time
+                if self.is_finished():
+                    break
+                simulation_time += SIMULATION_STEP
+        except SimulationEndException:
+            pass  # Simulation ends when city is captured
+
+    def run(self, progress_callback: Optional[Callable[[float], None]] = None) -> float:
+        """
+        Runs the simulation to the end; returns the time of the last step. progress_callback is called with the
+        simulation time about every PROGRESS_REPORT_INTERVAL simulated seconds.
+        """
+        simulation_time = 0
+        last_progress_time = 0
+        for simulation_time in self.iter_steps():
+            if progress_callback and simulation_time - last_progress_time >= PROGRESS_REPORT_INTERVAL:
+                progress_callback(simulation_time)
+                last_progress_time = simulation_time
+        return simulation_time
+
+
+def prepare_attack_simulation(simulation_class,
+                              game_defensive_buildings: List[GameDefensiveBuildingBase],
+                              attacks: List[Dict[str, Any]],
+                              attack_unit_types: List[AttackUnitSimResponse],
+                              buildings_data: Dict[str, Dict[int, Dict[str, Any]]],
+                              map_id: int,
+                              seed: Optional[int] = None,
+                              event_format: str = 'objects') -> Tuple[VectorizedAttackSimulation, int]:
+    """
+    Initializes the attack state and returns it as an instance of the given VectorizedAttackSimulation class,
+    ready to run, together with the resolved seed.
+    """
+    path_ids = {attack['path_id'] for attack in attacks}
+    paths_data = get_map_paths(map_id, list(path_ids), num_points=1000)
+
+    seed = resolve_seed(seed)
+    rng = np.random.default_rng(seed)
+    turrets = initialize_turrets(game_defensive_buildings)
+    troops, troops_at_end = initialize_troops(attacks, attack_unit_types, buildings_data, turrets, rng,
+                                              get_map_targeting(map_id))
+    return simulation_class(turrets, troops, paths_data, buildings_data, troops_at_end, rng, event_format), seed
+
+
+def run_attack_simulation(simulation_class,
+                          game_defensive_buildings: List[GameDefensiveBuildingBase],
+                          attacks: List[Dict[str, Any]],
+                          attack_unit_types: List[AttackUnitSimResponse],
+                          buildings_data: Dict[str, Dict[int, Dict[str, Any]]],
+                          map_id: int,
+                          seed: Optional[int] = None,
+                          event_format: str = 'objects',
+                          progress_callback: Optional[Callable[[float], None]] = None,
+                          profile: bool = False) -> SimulationDataGeneralized:
+    """
+    Initializes the attack state, runs it with the given VectorizedAttackSimulation class and builds the output.
+    With profile, the phases of the instance are timed and returned in the profile section of the output.
+    """
+    simulation, seed = prepare_attack_simulation(simulation_class, game_defensive_buildings, attacks,
+                                                 attack_unit_types, buildings_data, map_id, seed, event_format)
+    profiler = SimulationProfiler() if profile else None
+    if profiler:
+        profiler.instrument_simulation(simulation)
+    simulation.run(progress_callback)
+
+    simulation_data = build_simulation_data_generalized(simulation.turrets, attack_unit_types,
+                                                        simulation.troops_at_end, buildings_data,
+                                                        simulation.troop_events, simulation.turret_events,
+                                                        simulation.generative_building_events,
+                                                        simulation.city_events, seed,
+                                                        profiler.to_profile() if profiler else None)
+
+    return simulation_data
+
+
+def simulate_attack_vectorized(game_defensive_buildings: List[GameDefensiveBuildingBase],
+                               attacks: List[Dict[str, Any]],
+                               attack_unit_types: List[AttackUnitSimResponse],
+                               buildings_data: Dict[str, Dict[int, Dict[str, Any]]],
+                               map_id: int,
+                               seed: Optional[int] = None,
+                               event_format: str = 'objects',
+                               progress_callback: Optional[Callable[[float], None]] = None,
+                               profile: bool = False) -> SimulationDataGeneralized:
+    """
+    Simulates the attack scenario with the struct-of-arrays troop engine.
+
+    Takes the same parameters and returns the same SimulationDataGeneralized as simulate_attack_generalized.
+    """
+    return run_attack_simulation(VectorizedAttackSimulation, game_defensive_buildings, attacks, attack_unit_types,
+                                 buildings_data, map_id, seed, event_format, progress_callback, profile)
+
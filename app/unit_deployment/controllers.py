@@ -0,0 +1,147 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update, func, literal, union_all, and_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from fastapi import HTTPException, status
+from typing import Optional, List
+from app.unit_deployment.models import UnitDeployment, CITY_LOCATION, OUTPOST_LOCATION
+from app.unit_deployment.schemas import PlayerUnitTotals, TerritoryUnitTotals
+from app.game_city.models import GameCity
+from app.game_outpost.models import GameOutpost
+from app.game_territory.models import GameTerritory
+from app.attack_unit.models import AttackUnit
+from app.player.models import Player
+
+deployments = UnitDeployment.__table__
+
+
+def unit_deployment_location(city_id: Optional[int], outpost_id: Optional[int]):
+    """Return the location type, model, ID and not-found message of a location given as a city or an outpost."""
+    if city_id and outpost_id:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Properly specify the location of units")
+    if city_id:
+        return CITY_LOCATION, GameCity, city_id, "City not found"
+    if outpost_id:
+        return OUTPOST_LOCATION, GameOutpost, outpost_id, "Outpost not found"
+    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid unit deployment location")
+
+
+def location_game_id(location_type: str, location_id: int):
+    """SELECT of the game ID of a city or outpost, which outposts take from their first territory."""
+    if location_type == CITY_LOCATION:
+        cities = GameCity.__table__
+        return select(cities.c.game_id).where(cities.c.id == location_id)
+    outposts, territories = GameOutpost.__table__, GameTerritory.__table__
+    return (select(territories.c.game_id)
+            .select_from(outposts.join(territories, territories.c.id == outposts.c.territory1_id))
+            .where(outposts.c.id == location_id))
+
+
+def unit_count_update(location_type: str, location_id: int, player_id: int, attack_unit_id: int, count_delta: int):
+    """
+    Single statement adding count_delta to the unit count of a player and attack unit at a location, RETURNING
+    the new count.
+
+    Negative deltas UPDATE the existing row and match nothing when the count would become negative. Other
+    deltas upsert the row, inserting it for the game of the location, so they match nothing when the location
+    does not exist.
+    """
+    if count_delta < 0:
+        return (update(deployments)
+                .where(deployments.c.location_type == location_type,
+                       deployments.c.location_id == location_id,
+                       deployments.c.player_id == player_id,
+                       deployments.c.attack_unit_id == attack_unit_id,
+                       deployments.c.count + count_delta >= 0)
+                .values(count=deployments.c.count + count_delta)
+                .returning(deployments.c.count))
+
+    game_id = location_game_id(location_type, location_id)
+    row = game_id.add_columns(literal(location_type), literal(location_id), literal(player_id),
+                              literal(attack_unit_id), literal(count_delta))
+    statement = pg_insert(deployments).from_select(
+        ['game_id', 'location_type', 'location_id', 'player_id', 'attack_unit_id', 'count'], row)
+    return (statement
+            .on_conflict_do_update(constraint="uq_unit_deployments_key",
+                                   set_={'count': deployments.c.count + statement.excluded.count})
+            .returning(deployments.c.count))
+
+
+async def update_unit_count(
+    city_id: int = None,
+    outpost_id: int = None,
+    player_id: int = None,
+    attack_unit_id: int = None,
+    count_delta: int = 0,
+    db: AsyncSession = None
+) -> int:
+    """
+    Atomically add count_delta to the unit count of a player and attack unit at a location (city or outpost).
+
+    The unit_deployments row is changed by a single statement which never lets the count become negative, so
+    concurrent deployments cannot overdraw a location. Nothing is committed, the caller commits, e.g. both
+    sides of a redeployment at once.
+
+    Returns the new unit count.
+    """
+    location_type, model, location_id, not_found = unit_deployment_location(city_id, outpost_id)
+    result = await db.execute(unit_count_update(location_type, location_id, player_id, attack_unit_id, count_delta))
+    new_count = result.scalar_one_or_none()
+    if new_count is None:
+        if await db.get(model, location_id) is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=not_found)
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Insufficient units at source")
+    return new_count
+
+
+def army_power(game_id):
+    """Sum of the unit counts weighted by the cost of their attack units, for the deployments of a game."""
+    attack_units = AttackUnit.__table__
+    return (select(func.coalesce(func.sum(deployments.c.count * attack_units.c.cost), 0))
+            .select_from(deployments.join(attack_units, attack_units.c.id == deployments.c.attack_unit_id))
+            .where(deployments.c.game_id == game_id))
+
+
+async def get_player_unit_totals(game_id: int, db: AsyncSession) -> List[PlayerUnitTotals]:
+    """Total number of units and army power of every player with deployed units in a game, in one query."""
+    attack_units = AttackUnit.__table__
+    statement = (select(deployments.c.player_id,
+                        func.sum(deployments.c.count).label('units'),
+                        func.sum(deployments.c.count * attack_units.c.cost).label('army_power_index'))
+                 .select_from(deployments.join(attack_units, attack_units.c.id == deployments.c.attack_unit_id))
+                 .where(deployments.c.game_id == game_id)
+                 .group_by(deployments.c.player_id)
+                 .order_by(deployments.c.player_id))
+    result = await db.execute(statement)
+    return [PlayerUnitTotals(**row) for row in result.mappings().all()]
+
+
+async def get_territory_unit_totals(game_id: int, db: AsyncSession) -> List[TerritoryUnitTotals]:
+    """
+    Total number of units of every player per territory of a game, in one query. Units in a city count for its
+    territory, units in an outpost count for both territories it connects.
+    """
+    cities, outposts = GameCity.__table__, GameOutpost.__table__
+    locations = union_all(
+        select(literal(CITY_LOCATION).label('location_type'), cities.c.id.label('location_id'),
+               cities.c.territory_id),
+        select(literal(OUTPOST_LOCATION), outposts.c.id, outposts.c.territory1_id),
+        select(literal(OUTPOST_LOCATION), outposts.c.id, outposts.c.territory2_id),
+    ).subquery()
+    statement = (select(locations.c.territory_id, deployments.c.player_id,
+                        func.sum(deployments.c.count).label('units'))
+                 .select_from(deployments.join(locations, and_(
+                     locations.c.location_type == deployments.c.location_type,
+                     locations.c.location_id == deployments.c.location_id)))
+                 .where(deployments.c.game_id == game_id, locations.c.territory_id.is_not(None))
+                 .group_by(locations.c.territory_id, deployments.c.player_id)
+                 .order_by(locations.c.territory_id, deployments.c.player_id))
+    result = await db.execute(statement)
+    return [TerritoryUnitTotals(**row) for row in result.mappings().all()]
+
+
+async def update_army_power_indexes(game_id: int, db: AsyncSession):
+    """Recompute the army_power_index of every player of a game from its deployments with one UPDATE."""
+    players = Player.__table__
+    power = army_power(game_id).where(deployments.c.player_id == players.c.id).scalar_subquery()
+    await db.execute(update(players).where(players.c.game_id == game_id).values(army_power_index=power))
+    await db.commit()
@@ -0,0 +1,47 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, Index, CheckConstraint, UniqueConstraint, select, func, cast
+from sqlalchemy.dialects.postgresql import JSONB
+from app.db.base_class import Base
+
+CITY_LOCATION = "city"
+OUTPOST_LOCATION = "outpost"
+
+class UnitDeployment(Base):
+    __tablename__ = "unit_deployments"
+
+    id = Column(Integer, primary_key=True, index=True)
+    game_id = Column(Integer, ForeignKey("games.id"), nullable=False)
+    location_type = Column(String, nullable=False)  # CITY_LOCATION or OUTPOST_LOCATION
+    location_id = Column(Integer, nullable=False)  # ID of the game city or game outpost
+    player_id = Column(Integer, ForeignKey("players.id"), nullable=False)
+    attack_unit_id = Column(Integer, ForeignKey("attack_units.id"), nullable=False)
+    count = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        UniqueConstraint("game_id", "location_type", "location_id", "player_id", "attack_unit_id",
+                         name="uq_unit_deployments_key"),
+        CheckConstraint("count >= 0", name="ck_unit_deployments_count"),
+        Index("ix_unit_deployments_location", "location_type", "location_id"),
+        Index("ix_unit_deployments_game_player", "game_id", "player_id"),
+    )
+
+
+def location_unit_deployment(location_type: str, location_id):
+    """
+    Correlated scalar subquery building the unit deployment of a location from its unit_deployments rows, in
+    the {player_id: {attack_unit_id: count}} shape of the former unit_deployment JSON columns.
+
+    Mapped as the unit_deployment column_property of GameCity and GameOutpost, it is the read-only view keeping
+    their controllers and response schemas working. Counts are changed with update_unit_count.
+    """
+    deployments = UnitDeployment.__table__
+    player_units = (
+        select(deployments.c.player_id, func.jsonb_object_agg(deployments.c.attack_unit_id,
+                                                              deployments.c.count).label("units"))
+        .where(deployments.c.location_type == location_type, deployments.c.location_id == location_id)
+        .group_by(deployments.c.player_id)
+        .correlate_except(deployments)
+        .subquery()
+    )
+    return (select(func.coalesce(func.jsonb_object_agg(player_units.c.player_id, player_units.c.units),
+                                 cast("{}", JSONB)))
+            .scalar_subquery())
@@ -0,0 +1,27 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.unit_deployment import controllers as deployment_ctrl
+from app.unit_deployment.schemas import PlayerUnitTotals, TerritoryUnitTotals
+from app.db.session import get_db
+from app.authentication.jwt import get_current_identity
+from app.authentication.identity_cache import Identity
+from app.game.controllers import verify_host_access
+from typing import List
+
+router = APIRouter(prefix="/unit-deployments", tags=["Unit Deployments"])
+
+@router.get("/{game_id}/players", response_model=List[PlayerUnitTotals])
+async def get_player_unit_totals(game_id: int, db: AsyncSession = Depends(get_db), identity: Identity = Depends(get_current_identity)):
+    return await deployment_ctrl.get_player_unit_totals(game_id, db)
+
+@router.get("/{game_id}/territories", response_model=List[TerritoryUnitTotals])
+async def get_territory_unit_totals(game_id: int, db: AsyncSession = Depends(get_db), identity: Identity = Depends(get_current_identity)):
+    return await deployment_ctrl.get_territory_unit_totals(game_id, db)
+
+@router.patch("/{game_id}/army-power")
+async def update_army_power_indexes(game_id: int, db: AsyncSession = Depends(get_db), identity: Identity = Depends(get_current_identity)):
+    # Only the game host or an admin may recompute the indexes of a game
+    if not identity.is_admin:
+        await verify_host_access(identity.user_id, game_id, db)
+    await deployment_ctrl.update_army_power_indexes(game_id, db)
+    return {"detail": "Army power indexes updated."}
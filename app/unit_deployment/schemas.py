@@ -0,0 +1,11 @@
+from pydantic import BaseModel
+
+class PlayerUnitTotals(BaseModel):
+    player_id: int
+    units: int
+    army_power_index: int
+
+class TerritoryUnitTotals(BaseModel):
+    territory_id: int
+    player_id: int
+    units: int
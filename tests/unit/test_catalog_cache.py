@@ -0,0 +1,98 @@
+import asyncio
+import threading
+import pytest
+from types import SimpleNamespace
+from app.attack_unit import controllers as attack_unit_controllers
+from app.common import catalog_cache
+from app.common.catalog_cache import CatalogCache, ATTACK_UNITS_CATALOG, HEROES_CATALOG
+from app.common.redis_client import InMemoryRedis
+
+
+def test_invalidated_catalogs_are_reloaded_by_every_worker():
+    shared_redis = InMemoryRedis()
+    first_worker = CatalogCache(redis_client=shared_redis, version_check_interval=0)
+    second_worker = CatalogCache(redis_client=shared_redis, version_check_interval=0)
+
+    async def load(value):
+        return value
+
+    assert asyncio.run(first_worker.get_or_load(HEROES_CATALOG, 'list', lambda: load([1]))) == [1]
+    assert asyncio.run(second_worker.get_or_load(HEROES_CATALOG, 'list', lambda: pytest.fail("loaded twice"))) == [1]
+    assert second_worker.stats()['redis_hits'] == 1
+
+    asyncio.run(first_worker.invalidate(HEROES_CATALOG))
+    assert first_worker.stats()['entries'] == 0
+    assert asyncio.run(second_worker.get_or_load(HEROES_CATALOG, 'list', lambda: load([1, 2]))) == [1, 2]
+    assert asyncio.run(first_worker.get_or_load(HEROES_CATALOG, 'list', lambda: pytest.fail("stale"))) == [1, 2]
+
+    # Other catalogs keep their version
+    assert asyncio.run(first_worker.version(ATTACK_UNITS_CATALOG)) == 0
+
+
+def test_redis_calls_run_off_the_event_loop():
+    class RecordingRedis(InMemoryRedis):
+        """Records the threads of the Redis calls."""
+
+        def __init__(self):
+            super().__init__()
+            self.threads = set()
+
+        def get(self, key):
+            self.threads.add(threading.current_thread())
+            return super().get(key)
+
+        def set(self, key, value, ex=None):
+            self.threads.add(threading.current_thread())
+            return super().set(key, value, ex=ex)
+
+        def incr(self, key):
+            self.threads.add(threading.current_thread())
+            return super().incr(key)
+
+    redis_client = RecordingRedis()
+    cache = CatalogCache(redis_client=redis_client, version_check_interval=0)
+
+    async def load_and_invalidate():
+        async def load():
+            return [1]
+        await cache.get_or_load(HEROES_CATALOG, 'list', load)
+        await cache.invalidate(HEROES_CATALOG)
+
+    asyncio.run(load_and_invalidate())
+    assert redis_client.threads and threading.current_thread() not in redis_client.threads
+
+
+def test_catalog_reads_skip_the_database_until_an_admin_change(monkeypatch):
+    monkeypatch.setattr(catalog_cache, '_catalog_cache', CatalogCache())
+
+    async def verify_admin_access(token, db):
+        return None
+    monkeypatch.setattr(attack_unit_controllers, 'verify_admin_access', verify_admin_access)
+
+    unit = SimpleNamespace(__table__=SimpleNamespace(columns=[SimpleNamespace(key='id'), SimpleNamespace(key='name')]),
+                           id=4, name='Tank')
+
+    class Session:
+        queries = 0
+
+        async def execute(self, statement):
+            self.queries += 1
+            return SimpleNamespace(scalars=lambda: SimpleNamespace(all=lambda: [unit]))
+
+        async def get(self, model, id):
+            return unit
+
+        async def commit(self):
+            pass
+
+        async def refresh(self, instance):
+            pass
+
+    db = Session()
+    for _ in range(3):
+        assert asyncio.run(attack_unit_controllers.list_attack_units(db)) == [{'id': 4, 'name': 'Tank'}]
+    assert db.queries == 1
+
+    asyncio.run(attack_unit_controllers.update_attack_unit('token', db, 4, {'name': 'Heavy Tank'}))
+    assert asyncio.run(attack_unit_controllers.list_attack_units(db)) == [{'id': 4, 'name': 'Heavy Tank'}]
+    assert db.queries == 2
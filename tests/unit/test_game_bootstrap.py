@@ -0,0 +1,73 @@
+import asyncio
+import copy
+import json
+from sqlalchemy.dialects import postgresql
+from app.common import controllers as common_controllers
+from app.game.templates import MapGameTemplateCache, build_map_game_template
+from app.game_territory.controllers import create_game_territories
+from app.building_slot.controllers import create_building_slots_for_game
+from app.map.assets import map_json_path, get_map_territories
+from app.simulation_scenarios.path_cache import get_map_targeting
+
+
+def inserted_rows(statement) -> list:
+    return [{getattr(column, 'key', column): value for column, value in row.items()}
+            for row in statement._multi_values[0]]
+
+
+class RecordingSession:
+    """Records the executed statements, returning sequential IDs for the RETURNING clauses."""
+
+    def __init__(self):
+        self.statements = []
+
+    async def execute(self, statement):
+        self.statements.append(statement)
+        compiled = statement.compile(dialect=postgresql.dialect())
+        rows = inserted_rows(statement)
+        returned = [(row['territory_id'], 100 + i) for i, row in enumerate(rows)] if compiled.returning else []
+
+        class Result:
+            def all(self):
+                return returned
+        return Result()
+
+
+def test_map_game_templates_are_cached_until_the_map_changes():
+    with open(map_json_path(1), 'r') as f:
+        continents = json.load(f)['continents']
+    cache = MapGameTemplateCache()
+    template = cache.get(1, continents)
+
+    assert cache.get(1, copy.deepcopy(continents)) is template
+    assert template == build_map_game_template(1, get_map_territories(1, continents), get_map_targeting(1))
+    slot = template.building_slots[0][0]
+    assert slot['targeting_paths'] == get_map_targeting(1).targeting_paths(slot['location'], [1])
+
+    first_territory = next(iter(next(iter(continents.values()))['continent_territories'].values()))
+    first_territory['name'] = 'Renamed'
+    assert cache.get(1, continents).territories[0]['name'] == 'Renamed'
+
+
+def test_game_rows_are_inserted_with_one_statement_per_table(monkeypatch):
+    template = build_map_game_template(1, get_map_territories(1), get_map_targeting(1))
+    db = RecordingSession()
+
+    async def bootstrap():
+        game_territory_ids = await create_game_territories(7, template, db)
+        await create_building_slots_for_game(db, game_territory_ids, template)
+        return game_territory_ids
+
+    game_territory_ids = asyncio.run(bootstrap())
+    assert [statement.table.name for statement in db.statements] == ['game_territories', 'game_cities',
+                                                                     'building_slots']
+    assert len(game_territory_ids) == len(template.territories)
+    slots = inserted_rows(db.statements[2])
+    assert len(slots) == sum(len(territory_slots) for territory_slots in template.building_slots)
+    assert {slot['territory_id'] for slot in slots} == set(game_territory_ids.values())
+
+    # Statements stay under the parameter limit of the driver
+    monkeypatch.setattr(common_controllers, 'MAX_STATEMENT_PARAMETERS', 100)
+    db.statements.clear()
+    asyncio.run(create_building_slots_for_game(db, game_territory_ids, template))
+    assert len(db.statements) == -(-len(slots) // 33)
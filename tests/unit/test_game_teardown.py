@@ -0,0 +1,37 @@
+import asyncio
+from types import SimpleNamespace
+from app.game.controllers import end_game
+
+
+class RecordingSession:
+    """Records the tables written by the executed statements, with a game loaded by get."""
+
+    def __init__(self, game):
+        self.game = game
+        self.statements = []
+        self.commits = 0
+
+    async def get(self, model, game_id):
+        return self.game
+
+    async def execute(self, statement):
+        self.statements.append(statement.table.name)
+        return SimpleNamespace(scalar_one=lambda: 11)
+
+    async def commit(self):
+        self.commits += 1
+
+
+def test_end_game_deletes_the_game_rows_with_set_based_statements():
+    db = RecordingSession(SimpleNamespace(replayable=False, finished_at=None, game_log_id=None))
+    asyncio.run(end_game(3, db, archive=True))
+
+    assert db.statements == ['game_logs', 'building_slots', 'unit_deployments', 'game_defensive_buildings', 'game_generative_buildings',
+                             'game_outposts', 'game_cities', 'game_territories']
+    assert db.game.game_log_id == 11 and db.game.finished_at is not None
+    assert db.commits == 1
+
+    # Replayable games keep their territories and everything on them
+    db = RecordingSession(SimpleNamespace(replayable=True, finished_at=None, game_log_id=None))
+    asyncio.run(end_game(3, db))
+    assert db.statements == ['building_slots']
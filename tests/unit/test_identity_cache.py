@@ -0,0 +1,78 @@
+import asyncio
+import time
+import pytest
+from types import SimpleNamespace
+from fastapi import FastAPI, Depends, HTTPException
+from fastapi.testclient import TestClient
+from app.authentication import jwt as authentication_jwt
+from app.authentication.identity_cache import Identity, IdentityCache
+from app.authentication.jwt import create_access_token, create_password_reset_token, get_identity, \
+    get_admin_identity
+from app.db.session import get_db
+
+
+class UserSession:
+    """Answers the user queries with the given user row, counting them."""
+
+    def __init__(self, user):
+        self.user = user
+        self.queries = 0
+
+    async def execute(self, statement):
+        self.queries += 1
+        return SimpleNamespace(first=lambda: self.user)
+
+
+def test_identity_cache_is_bounded_expires_and_evicts_users():
+    cache = IdentityCache(max_entries=2, ttl=30)
+    cache.set('a', Identity(user_id=1, is_admin=False, is_active=True))
+    cache.set('b', Identity(user_id=1, is_admin=False, is_active=True))
+    cache.set('c', Identity(user_id=2, is_admin=True, is_active=True))
+    assert cache.get('a') is None and cache.stats()['entries'] == 2
+
+    cache.evict_user(1)
+    assert cache.get('b') is None and cache.get('c').is_admin
+
+    # Entries never outlive their token
+    cache.set('d', Identity(user_id=3, is_admin=False, is_active=True), token_expires_at=time.time() - 1)
+    assert cache.get('d') is None
+
+
+def test_verified_tokens_skip_the_user_query(monkeypatch):
+    monkeypatch.setattr(authentication_jwt, 'identity_cache', IdentityCache())
+    db = UserSession(SimpleNamespace(id=7, is_admin=False, is_active=True))
+    token = create_access_token({"sub": "player@example.com"})
+
+    for _ in range(3):
+        assert asyncio.run(get_identity(token, db)) == Identity(user_id=7, is_admin=False, is_active=True)
+    assert db.queries == 1
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(get_identity(create_password_reset_token("player@example.com"), db))
+    assert error.value.status_code == 401
+
+    authentication_jwt.identity_cache.evict_user(7)
+    db.user = SimpleNamespace(id=7, is_admin=False, is_active=False)
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(get_identity(token, db))
+    assert error.value.status_code == 403
+
+
+def test_admin_identity_dependency(monkeypatch):
+    monkeypatch.setattr(authentication_jwt, 'identity_cache', IdentityCache())
+    db = UserSession(SimpleNamespace(id=1, is_admin=False, is_active=True))
+    app = FastAPI()
+    app.dependency_overrides[get_db] = lambda: db
+
+    @app.get('/admin')
+    async def admin(identity: Identity = Depends(get_admin_identity)):
+        return {'user_id': identity.user_id}
+
+    client = TestClient(app)
+    headers = {'Authorization': f'Bearer {create_access_token({"sub": "admin@example.com"})}'}
+    assert client.get('/admin', headers=headers).status_code == 403
+
+    authentication_jwt.identity_cache.evict_user(1)
+    db.user = SimpleNamespace(id=1, is_admin=True, is_active=True)
+    assert client.get('/admin', headers=headers).json() == {'user_id': 1}
+    assert client.get('/admin').status_code == 401
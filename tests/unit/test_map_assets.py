@@ -0,0 +1,84 @@
+import json
+import os
+import shutil
+import numpy as np
+import pytest
+from app.map.assets import (
+    MapBundle,
+    compile_map_bundle,
+    load_map_bundle,
+    map_territories_from_json,
+    get_map_territories,
+)
+from app.simulation_scenarios.path_cache import MapPathCache
+from app.simulation_scenarios.targeting import compute_targeting_table
+
+MAP_JSON_PATH = os.path.join('assets', 'maps', 'map1.json')
+
+
+@pytest.fixture
+def map_json():
+    with open(MAP_JSON_PATH, 'r') as f:
+        return json.load(f)
+
+
+@pytest.fixture
+def compiled_map(tmp_path):
+    shutil.copy(MAP_JSON_PATH, tmp_path / 'map1.json')
+    compile_map_bundle(str(tmp_path / 'map1.json'))
+    return tmp_path
+
+
+def test_bundle_matches_map_json(compiled_map, map_json):
+    bundle = MapBundle(str(compiled_map / 'map1.bundle'))
+
+    assert bundle.map_territories() == map_territories_from_json(map_json['continents'])
+    assert bundle.map_info['width'] == map_json['width']
+    assert bundle.arrays['path_points'].dtype == np.float64
+    assert not bundle.arrays['path_points'].flags.writeable
+
+    for territory in map_json['continents']['1']['continent_territories'].values():
+        for path_id, path_info in territory['paths'].items():
+            expected = np.array([[point['x'], point['y'], point['angle']] for point in path_info['points']])
+            np.testing.assert_array_equal(bundle.path_points(int(path_id)), expected)
+
+
+def test_map_loaders_prefer_the_bundle_and_fall_back_to_json(compiled_map, map_json):
+    cache = MapPathCache(str(compiled_map))
+    from_bundle = cache.get_paths(1, [1], num_points=100)[1]
+    assert cache.map_file_path(1).endswith('.bundle')
+    assert load_map_bundle(1, str(compiled_map)) is load_map_bundle(1, str(compiled_map))
+
+    os.remove(compiled_map / 'map1.bundle')
+    assert load_map_bundle(1, str(compiled_map)) is None
+    from_json = cache.get_paths(1, [1], num_points=100)[1]
+    assert from_json is not from_bundle
+    # Both sources give the same paths, so seeded results do not depend on the bundle
+    np.testing.assert_array_equal(from_bundle.x, from_json.x)
+    np.testing.assert_array_equal(from_bundle.y, from_json.y)
+
+
+def test_bundle_stores_the_targeting_table_of_its_paths(compiled_map):
+    cache = MapPathCache(str(compiled_map))
+    from_bundle = cache.get_targeting(1)
+    assert not from_bundle.closest_t.flags.writeable
+
+    bundle = load_map_bundle(1, str(compiled_map))
+    computed = compute_targeting_table(bundle.arrays['slot_ids'], bundle.arrays['slot_locations'],
+                                       cache.get_paths(1, num_points=1000))
+    for name, array in computed.arrays().items():
+        np.testing.assert_array_equal(bundle.arrays[name], array)
+
+    os.remove(compiled_map / 'map1.bundle')
+    from_json = cache.get_targeting(1)
+    assert from_json is not from_bundle
+    np.testing.assert_array_equal(from_json.closest_t, from_bundle.closest_t)
+
+
+def test_get_map_territories_falls_back_to_the_continents_json(map_json):
+    territories = get_map_territories(1, map_json['continents'])
+
+    assert [territory['id'] for territory in territories] == [1, 2, 3, 4, 5]
+    assert territories[0]['adjacent_territories'] == [2, 4, 5]
+    assert territories[0]['building_slots'][1] == {'id': 2, 'location': [500, 425],
+                                                   'targeting_path_ids': {1: 0.674, 3: 0.936}}
@@ -0,0 +1,82 @@
+import time
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.simulation_scenarios.outpost_battle import simulate_outpost_battle, OUTPOST_BATTLE_MAX_VOLLEYS, \
+    OUTPOST_BATTLE_MAX_SIMULATED_TROOPS
+from app.simulation_scenarios.schemas import OutpostTroopType
+from app.simulation_scenarios.routes import router
+
+
+def make_teams(count_a: int, count_b: int):
+    team_a = {1: OutpostTroopType(count=count_a, damage=10, hp=100, accuracy=0.7, firerate=1),
+              2: OutpostTroopType(count=count_a // 5, damage=40, hp=60, accuracy=0.5, firerate=0.5)}
+    team_b = {3: OutpostTroopType(count=count_b, damage=12, hp=110, accuracy=0.65, firerate=1.2)}
+    return team_a, team_b
+
+
+def test_outpost_battle_is_reproducible_and_won_by_the_stronger_team():
+    team_a, team_b = make_teams(10000, 8000)
+    start = time.perf_counter()
+    result = simulate_outpost_battle(team_a, team_b, seed=5)
+    assert time.perf_counter() - start < 1
+
+    assert result == simulate_outpost_battle(team_a, team_b, seed=5)
+    assert result.winning_team == 'A'
+    assert sum(outcome.surviving_troops for outcome in result.team_b.values()) == 0
+    assert 0 < result.team_a[1].surviving_troops < result.team_a[1].initial_troops
+    assert result.scale_factor == 1
+
+    weak_a, _ = make_teams(100, 8000)
+    assert simulate_outpost_battle(weak_a, team_b, seed=5).winning_team == 'B'
+
+
+def test_outpost_battle_scales_down_large_teams():
+    team_a, team_b = make_teams(50000, 50000)
+    full = simulate_outpost_battle(team_a, team_b, seed=8)
+    scaled = simulate_outpost_battle(team_a, team_b, max_simulated_troops=1000, seed=8)
+
+    assert scaled.scale_factor == 60
+    assert scaled.winning_team == full.winning_team
+    assert scaled.team_a[1].initial_troops == 50000
+    assert abs(scaled.team_a[1].survival_rate - full.team_a[1].survival_rate) < 5
+
+
+def test_outpost_battle_endpoint():
+    app = FastAPI()
+    app.include_router(router)
+    client = TestClient(app)
+    team_a, team_b = make_teams(200, 150)
+    request = {'team_a': {k: v.dict() for k, v in team_a.items()},
+               'team_b': {k: v.dict() for k, v in team_b.items()}, 'seed': 3}
+
+    response = client.post('/simulate/outpost_battle', json=request)
+    assert response.status_code == 200
+    assert response.json()['winning_team'] == simulate_outpost_battle(team_a, team_b, seed=3).winning_team
+    request['team_a'][1]['accuracy'] = 2
+    assert client.post('/simulate/outpost_battle', json=request).status_code == 422
+    request['team_a'][1].update(accuracy=0.5, firerate=50)
+    assert client.post('/simulate/outpost_battle', json=request).status_code == 422
+    request['team_a'][1].update(firerate=1, count=10 ** 9)
+    assert client.post('/simulate/outpost_battle', json=request).status_code == 422
+
+
+def test_outpost_battles_are_bounded():
+    # Troops that never hit stop after the maximum number of volleys
+    team = {1: OutpostTroopType(count=10, damage=1, hp=10, accuracy=0, firerate=10)}
+    result = simulate_outpost_battle(team, {2: team[1]}, seed=1)
+    assert result.volleys == OUTPOST_BATTLE_MAX_VOLLEYS and result.winning_team is None
+
+    # Large teams are always scaled down
+    team = {1: OutpostTroopType(count=10 ** 7, damage=1, hp=10, accuracy=0, firerate=1)}
+    result = simulate_outpost_battle(team, {2: team[1]}, seed=1)
+    assert result.scale_factor == 10 ** 7 / OUTPOST_BATTLE_MAX_SIMULATED_TROOPS
+
+
+def test_outpost_battle_counts_the_survivors_of_empty_troop_types():
+    team_a, team_b = make_teams(1000, 600)
+    empty = OutpostTroopType(count=0, damage=10, hp=100, accuracy=0.5, firerate=1)
+    result = simulate_outpost_battle({4: empty, **team_a, 5: empty}, team_b, seed=2)
+
+    assert result.team_a[4].surviving_troops == result.team_a[5].surviving_troops == 0
+    expected = simulate_outpost_battle(team_a, team_b, seed=2)
+    assert [result.team_a[k] for k in team_a] == [expected.team_a[k] for k in team_a]
@@ -0,0 +1,107 @@
+import asyncio
+import threading
+import pytest
+from types import SimpleNamespace
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+from app.authentication import password_hashing
+from app.authentication.password_hashing import PasswordHasher, LoginRateLimiter
+from app.authentication.routes import router
+from app.db.session import get_db
+
+
+class BlockingContext:
+    """Stand-in for the bcrypt context whose hashes wait for release, recording the hashing threads."""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.threads = set()
+
+    def hash(self, password):
+        self.threads.add(threading.current_thread().name)
+        self.release.wait(5)
+        return 'hashed:' + password
+
+    def verify(self, password, hashed_password):
+        return hashed_password == 'hashed:' + password
+
+
+def test_password_hashing_is_bounded_and_runs_off_the_event_loop():
+    context = BlockingContext()
+    hasher = PasswordHasher(max_workers=1, max_queued=1, context=context)
+
+    async def burst():
+        first = asyncio.ensure_future(hasher.hash('a'))
+        second = asyncio.ensure_future(hasher.hash('b'))
+        await asyncio.sleep(0.05)
+        assert hasher.stats()['running'] == 1 and hasher.stats()['queued'] == 1
+        with pytest.raises(HTTPException) as error:
+            await hasher.hash('c')
+        assert error.value.status_code == 503 and 'Retry-After' in error.value.headers
+        context.release.set()
+        return await asyncio.gather(first, second)
+
+    assert asyncio.run(burst()) == ['hashed:a', 'hashed:b']
+    assert asyncio.run(hasher.verify('a', 'hashed:a'))
+    assert context.threads == {'password-hasher_0'}
+    assert {key: hasher.stats()[key] for key in ('queued', 'running', 'completed', 'rejected')} == \
+        {'queued': 0, 'running': 0, 'completed': 3, 'rejected': 1}
+    hasher.shutdown()
+
+
+def test_cancelled_password_checks_free_their_slots():
+    context = BlockingContext()
+    hasher = PasswordHasher(max_workers=1, max_queued=2, context=context)
+
+    async def cancel_queued():
+        running = asyncio.ensure_future(hasher.hash('a'))
+        queued = [asyncio.ensure_future(hasher.hash(password)) for password in 'bc']
+        await asyncio.sleep(0.05)
+        for task in queued:
+            task.cancel()
+        await asyncio.gather(*queued, return_exceptions=True)
+        context.release.set()
+        return await running
+
+    assert asyncio.run(cancel_queued()) == 'hashed:a'
+    assert hasher.stats()['queued'] == 0 and hasher.stats()['running'] == 0
+
+    # All the slots are free again
+    async def fill_the_queue():
+        return await asyncio.gather(*[hasher.verify('a', 'hashed:a') for _ in range(3)])
+    assert asyncio.run(fill_the_queue()) == [True] * 3
+    hasher.shutdown()
+
+
+def test_login_attempts_are_rate_limited_before_hashing(monkeypatch):
+    limiter = LoginRateLimiter(attempts=2, window=60)
+    monkeypatch.setattr(password_hashing, '_login_rate_limiter', limiter)
+
+    class NoUserSession:
+        async def execute(self, statement):
+            return SimpleNamespace(scalars=lambda: SimpleNamespace(first=lambda: None))
+
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_db] = lambda: NoUserSession()
+    client = TestClient(app)
+    credentials = {'email': 'player@example.com', 'password': 'secret'}
+
+    assert [client.post('/login', json=credentials).status_code for _ in range(2)] == [400, 400]
+    limited = client.post('/login', json={**credentials, 'email': 'other@example.com'})
+    assert limited.status_code == 429 and int(limited.headers['Retry-After']) == 30
+    assert limiter.limited == 1
+
+
+def test_rejected_login_attempts_take_no_tokens():
+    limiter = LoginRateLimiter(attempts=2, window=60)
+    limiter.check('address:1', 'email:target')
+    limiter.check('address:2', 'email:target')
+    for _ in range(3):
+        with pytest.raises(HTTPException):
+            limiter.check('address:1', 'email:target')
+
+    # The address still has the token the rejected attempts did not use
+    limiter.check('address:1', 'email:other')
+    with pytest.raises(HTTPException):
+        limiter.check('address:1', 'email:another')
@@ -0,0 +1,38 @@
+from app.simulation_scenarios.benchmark import (
+    BenchmarkCase,
+    benchmark_cases,
+    synthetic_map,
+    synthetic_attack,
+    run_case,
+    append_history,
+    load_history,
+    compare_runs,
+)
+from app.simulation_scenarios.path_cache import map_path_cache
+
+
+def test_synthetic_attacks_put_a_turret_on_every_slot():
+    map_data = synthetic_map(n_paths=3, n_slots=7)
+    attack = synthetic_attack(map_data, n_troops=10)
+
+    assert len(attack['game_defensive_buildings']) == 7
+    assert sorted(b.id for b in attack['game_defensive_buildings']) == list(attack['buildings_data']['defensive_buildings'])
+    assert sum(a['attack_units'][unit]['count'] for a in attack['attacks'] for unit in a['attack_units']) == 10
+    assert {case.engine for case in benchmark_cases('full') if case.kind == 'attack'} == {
+        'dict', 'dict_fast_forward', 'vectorized', 'event_driven'}
+
+
+def test_benchmark_cases_are_measured_and_appended_to_the_history(tmp_path):
+    maps_directory = map_path_cache.maps_directory
+    case = BenchmarkCase('troops=20/vectorized', 'attack', 'vectorized', {'troops': 20, 'turrets': 3, 'paths': 2})
+    measurement = run_case(case)
+
+    assert map_path_cache.maps_directory == maps_directory
+    assert measurement['status'] == 'ok' and measurement['events'] > 0
+    assert measurement['wall_time'] > 0 and measurement['alloc_peak_bytes'] > 0
+
+    history_path = str(tmp_path / 'history.json')
+    for wall_time in (2.0, 1.0):
+        append_history(history_path, {'results': [{'name': case.name, **measurement, 'wall_time': wall_time}]})
+    previous, current = load_history(history_path)
+    assert compare_runs(previous, current) == [f"{case.name:<32} 1.000s (0.50x of 2.000s)"]
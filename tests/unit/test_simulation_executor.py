@@ -0,0 +1,102 @@
+import asyncio
+import os
+import time
+import pytest
+from fastapi import HTTPException
+from app.simulation_scenarios.executor import SimulationExecutor
+
+
+def sleep_and_return(seconds: float, value):
+    time.sleep(seconds)
+    return value
+
+
+def test_executor_runs_jobs_and_rejects_them_when_the_queue_is_full():
+    executor = SimulationExecutor(max_workers=1, max_queued=1, timeout=30, retry_after=7)
+
+    async def submit_three():
+        jobs = [asyncio.ensure_future(executor.run(sleep_and_return, 0.5, i)) for i in range(3)]
+        return await asyncio.gather(*jobs, return_exceptions=True)
+
+    try:
+        first, second, rejected = asyncio.run(submit_three())
+        assert (first, second) == (0, 1)
+        assert isinstance(rejected, HTTPException)
+        assert rejected.status_code == 503
+        assert rejected.headers == {'Retry-After': '7'}
+        # The slots are released once the jobs are done
+        assert asyncio.run(executor.run(sleep_and_return, 0, 'done')) == 'done'
+    finally:
+        executor.shutdown()
+
+
+def test_executor_times_out_and_keeps_the_slot_until_the_job_finishes():
+    executor = SimulationExecutor(max_workers=1, max_queued=0, timeout=0.2)
+    try:
+        with pytest.raises(HTTPException) as exc_info:
+            asyncio.run(executor.run(sleep_and_return, 1, None))
+        assert exc_info.value.status_code == 504
+
+        # The timed out job still occupies the only worker
+        with pytest.raises(HTTPException) as exc_info:
+            asyncio.run(executor.run(sleep_and_return, 0, None))
+        assert exc_info.value.status_code == 503
+
+        time.sleep(1.2)
+        assert asyncio.run(executor.run(sleep_and_return, 0, 'done')) == 'done'
+    finally:
+        executor.shutdown()
+
+
+def reject_request(detail: str):
+    raise HTTPException(status_code=400, detail=detail)
+
+
+def test_executor_answers_http_errors_of_jobs_and_keeps_working():
+    executor = SimulationExecutor(max_workers=1, max_queued=0, timeout=30)
+    try:
+        with pytest.raises(HTTPException) as exc_info:
+            asyncio.run(executor.run(reject_request, "Target 3 is not on a building slot"))
+        assert (exc_info.value.status_code, exc_info.value.detail) == (400, "Target 3 is not on a building slot")
+        assert asyncio.run(executor.run(sleep_and_return, 0, 'done')) == 'done'
+
+        # A crashed worker breaks the pool, which is replaced for the next jobs
+        with pytest.raises(HTTPException) as exc_info:
+            asyncio.run(executor.run(os._exit, 1))
+        assert exc_info.value.status_code == 500
+        assert asyncio.run(executor.run(sleep_and_return, 0, 'done')) == 'done'
+    finally:
+        executor.shutdown()
+
+
+def put_items(count: int, detail, items):
+    for i in range(count):
+        items.put(i, timeout=5)
+    if detail:
+        raise HTTPException(status_code=400, detail=detail)
+
+
+def test_executor_streams_the_items_of_jobs():
+    executor = SimulationExecutor(max_workers=1, max_queued=0, timeout=30)
+
+    async def collect(count, detail=None):
+        return [item async for item in executor.stream(put_items, count, detail)]
+
+    async def stream_while_busy():
+        busy = asyncio.ensure_future(executor.run(sleep_and_return, 0.5, None))
+        await asyncio.sleep(0.05)
+        with pytest.raises(HTTPException) as exc_info:
+            await collect(1)
+        await busy
+        return exc_info.value
+
+    try:
+        # More items than the queue holds, so the job waits for the consumer
+        assert asyncio.run(collect(200)) == list(range(200))
+
+        with pytest.raises(HTTPException) as exc_info:
+            asyncio.run(collect(3, "Target 3 is not on a building slot"))
+        assert exc_info.value.status_code == 400
+        assert asyncio.run(stream_while_busy()).status_code == 503
+    finally:
+        executor.shutdown()
@@ -0,0 +1,102 @@
+import asyncio
+import copy
+import json
+import time
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+from app.simulation_scenarios import jobs
+from app.simulation_scenarios.jobs import SimulationJobStore
+from app.simulation_scenarios.controllers import simulate_attack_generalized, MAX_SIMULATION_DURATION
+from app.simulation_scenarios.vectorized import simulate_attack_vectorized
+from app.simulation_scenarios.event_driven import simulate_attack_event_driven
+from app.simulation_scenarios.routes import router
+from tests.unit.test_simulation_scenarios import load_sample_attack, set_target_length, SAMPLE_INPUTS_PATH
+
+
+def test_engines_report_progress_through_the_callback(monkeypatch):
+    # Troops whose target lies beyond the end of the path never finish, so the simulation runs to the cap
+    attack = load_sample_attack()
+    set_target_length(monkeypatch, attack, 1.5)
+    attack['game_defensive_buildings'][0].accuracy = 0
+
+    reports = {}
+    for simulate_attack in (simulate_attack_generalized, simulate_attack_vectorized, simulate_attack_event_driven):
+        reports[simulate_attack] = []
+        simulate_attack(**copy.deepcopy(attack), seed=3, progress_callback=reports[simulate_attack].append)
+
+    # The event-driven engine only reports from the ticks it processes, it skips the idle run to the cap
+    assert len(reports[simulate_attack_generalized]) > 10
+    assert reports[simulate_attack_vectorized] == reports[simulate_attack_generalized]
+    for progress in reports.values():
+        assert progress == sorted(progress)
+        assert all(0 < simulation_time < MAX_SIMULATION_DURATION for simulation_time in progress)
+
+
+def test_job_store_bounds_the_active_jobs():
+    store = SimulationJobStore(max_active=1)
+    job = store.create('dict')
+    with pytest.raises(HTTPException) as exc_info:
+        store.create('dict')
+    assert exc_info.value.status_code == 503
+
+    store.release()
+    store.update(job.job_id, status='failed', error='boom')
+    assert store.get(job.job_id).error == 'boom'
+    assert store.create('dict').status == 'queued'
+
+
+def test_worker_progress_reaches_the_store_until_the_job_finishes():
+    store = SimulationJobStore()
+    job, other = store.create('dict'), store.create('dict')
+    queue = store.progress_queue()
+
+    def wait_for_progress(job_id, progress):
+        deadline = time.monotonic() + 5
+        while store.get(job_id).progress != progress and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    queue.put((job.job_id, 0.25))
+    wait_for_progress(job.job_id, 0.25)
+    assert store.get(job.job_id).status == 'running'
+
+    # Reports arriving after the result are ignored
+    store.set_result(job.job_id, simulate_attack_generalized(**load_sample_attack(), seed=1))
+    queue.put((job.job_id, 0.5))
+    queue.put((other.job_id, 0.75))
+    wait_for_progress(other.job_id, 0.75)
+    assert store.get(job.job_id).status == 'done' and store.get(job.job_id).progress == 1
+    assert store.get('unknown') is None
+
+
+def test_jobs_fail_on_unexpected_errors(monkeypatch):
+    store = SimulationJobStore(max_active=1)
+    monkeypatch.setattr(jobs, '_simulation_job_store', store)
+
+    class CrashingExecutor:
+        async def run(self, fn, *args, timeout=None):
+            raise RuntimeError("worker lost")
+    monkeypatch.setattr(jobs, 'get_simulation_executor', lambda: CrashingExecutor())
+
+    job = store.create('dict')
+    asyncio.run(jobs.execute_simulation_job(job.job_id, 'dict', {}))
+    assert store.get(job.job_id).status == 'failed'
+    assert store.get(job.job_id).error == "The simulation job failed."
+    assert store.create('dict').status == 'queued'
+
+
+def test_job_endpoints_run_the_simulation_in_the_background(monkeypatch):
+    monkeypatch.setattr(jobs, '_simulation_job_store', SimulationJobStore())
+    app = FastAPI()
+    app.include_router(router)
+    client = TestClient(app)
+    with open(SAMPLE_INPUTS_PATH, 'r') as f:
+        request = {**json.load(f)['simulation_generalized'][0], 'map_id': 1, 'seed': 12}
+
+    created = client.post('/simulate/jobs', json=request)
+    assert created.status_code == 202
+    job = client.get(f"/simulate/jobs/{created.json()['job_id']}").json()
+
+    assert job['status'] == 'done' and job['progress'] == 1
+    assert job['result'] == json.loads(simulate_attack_generalized(**load_sample_attack(), seed=12).json())
+    assert client.get('/simulate/jobs/unknown').status_code == 404
@@ -0,0 +1,70 @@
+import gzip
+import json
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.common.redis_client import InMemoryRedis
+from app.simulation_scenarios import result_cache
+from app.simulation_scenarios.result_cache import SimulationResultCache, simulation_cache_key
+from app.simulation_scenarios.routes import router
+from app.simulation_scenarios.schemas import CityEvent
+
+SAMPLE_INPUTS_PATH = 'app/simulation_scenarios/sample_inputs.json'
+
+
+def test_cache_key_is_canonical_and_covers_seed_engine_and_version():
+    request = {'map_id': 1, 'engine': 'dict', 'seed': 5, 'attacks': [{'path_id': 1, 'territory_id': 2}]}
+    reordered = {'attacks': [{'territory_id': 2, 'path_id': 1}], 'seed': 5, 'engine': 'dict', 'map_id': 1}
+
+    assert simulation_cache_key(request) == simulation_cache_key(reordered)
+    assert simulation_cache_key(request) != simulation_cache_key({**request, 'seed': 6})
+    assert simulation_cache_key(request) != simulation_cache_key({**request, 'engine': 'vectorized'})
+    assert simulation_cache_key(request) != simulation_cache_key(request, engine_version=-1)
+
+
+def test_lru_tier_evicts_least_recently_used_entries_and_counts_hits():
+    cache = SimulationResultCache(max_entries=2)
+    cache.set('a', b'1')
+    cache.set('b', b'2')
+    assert cache.get('a') == b'1'
+    cache.set('c', b'3')
+
+    assert cache.get('b') is None
+    assert cache.get('c') == b'3'
+    assert cache.stats() == {'hits': 2, 'redis_hits': 0, 'misses': 1, 'redis_errors': 0, 'entries': 2, 'bytes': 2}
+
+
+def test_redis_tier_is_shared_between_workers():
+    shared_redis = InMemoryRedis()
+    first_worker = SimulationResultCache(redis_client=shared_redis)
+    second_worker = SimulationResultCache(redis_client=shared_redis)
+    event = CityEvent(timestamp=1.5, city_id=3, event_type='captured')
+
+    body = first_worker.get_or_compute('key', lambda: event.json().encode('utf-8'))
+    assert json.loads(gzip.decompress(body)) == event.dict()
+    assert second_worker.get_or_compute('key', lambda: pytest.fail("computed twice")) == body
+    assert second_worker.stats()['redis_hits'] == 1
+    assert second_worker.get('key') == body
+    assert second_worker.stats()['redis_hits'] == 1
+
+
+def test_attack_endpoint_serves_seeded_requests_from_the_cache(monkeypatch):
+    monkeypatch.setattr(result_cache, '_simulation_result_cache', SimulationResultCache())
+    app = FastAPI()
+    app.include_router(router)
+    client = TestClient(app)
+    with open(SAMPLE_INPUTS_PATH, 'r') as f:
+        request = {**json.load(f)['simulation_generalized'][0], 'map_id': 1, 'seed': 8}
+
+    first = client.post('/simulate/attack_generalized', json=request)
+    second = client.post('/simulate/attack_generalized', json=request, headers={'Accept-Encoding': 'identity'})
+
+    assert first.status_code == second.status_code == 200
+    assert first.headers['content-encoding'] == 'gzip'
+    assert first.json() == second.json()
+    assert first.json()['seed'] == 8
+    assert client.get('/simulate/cache/stats').json()['hits'] == 1
+
+    unseeded = client.post('/simulate/attack_generalized', json={**request, 'seed': None})
+    assert unseeded.json()['seed'] is not None
+    assert client.get('/simulate/cache/stats').json()['entries'] == 1
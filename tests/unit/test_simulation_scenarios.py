@@ -0,0 +1,352 @@
+import copy
+import json
+import os
+import random
+import numpy as np
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+from app.simulation_scenarios.controllers import (
+    simulate_attack_generalized,
+    simulate_flamethrower_scenario,
+    simulate_gunner_scenario,
+    distance,
+)
+from app.simulation_scenarios.vectorized import simulate_attack_vectorized
+from app.simulation_scenarios.event_driven import simulate_attack_event_driven
+from app.simulation_scenarios.path_cache import MapPathCache, smooth_path, get_map_targeting
+from app.simulation_scenarios.targeting import MapTargetingTable, compute_targeting_table
+from app.simulation_scenarios.spatial_index import TurretRangeIndex
+from app.simulation_scenarios.batch import simulate_attack_batch, run_replicas
+from app.simulation_scenarios import routes as simulation_routes
+from app.simulation_scenarios.routes import router
+from app.simulation_scenarios.engines import SIMULATION_ENGINES
+from app.simulation_scenarios.profiling import simulation_metrics
+from app.simulation_scenarios.schemas import PhaseProfile
+from app.config import settings
+from app.game_defensive_building.schemas import GameDefensiveBuildingBase
+from app.attack_unit.schemas import AttackUnitSimResponse
+
+SAMPLE_INPUTS_PATH = os.path.join('app', 'simulation_scenarios', 'sample_inputs.json')
+
+
+def load_sample_attack(troop_count_multiplier: int = 1) -> dict:
+    """Loads the generalized sample attack the same way the /simulate/attack_generalized route parses it."""
+    with open(SAMPLE_INPUTS_PATH, 'r') as f:
+        sample = json.load(f)['simulation_generalized'][0]
+
+    attacks = copy.deepcopy(sample['attacks'])
+    for attack in attacks:
+        for unit_info in attack['attack_units'].values():
+            unit_info['count'] *= troop_count_multiplier
+
+    return {
+        'game_defensive_buildings': [GameDefensiveBuildingBase(**b) for b in sample['game_defensive_buildings']],
+        'attacks': attacks,
+        'attack_unit_types': [AttackUnitSimResponse(**u) for u in sample['attack_unit_types']],
+        'buildings_data': {key: {int(k): v for k, v in data.items()} for key, data in sample['buildings_data'].items()},
+        'map_id': sample.get('map_id', 1),
+    }
+
+
+@pytest.mark.parametrize("simulate_attack", [simulate_attack_vectorized, simulate_attack_event_driven])
+@pytest.mark.parametrize("seed,troop_count_multiplier", [(0, 1), (7, 1), (42, 10)])
+def test_engine_matches_dict_engine(simulate_attack, seed, troop_count_multiplier):
+    expected = simulate_attack_generalized(**load_sample_attack(troop_count_multiplier), seed=seed)
+    actual = simulate_attack(**load_sample_attack(troop_count_multiplier), seed=seed)
+
+    assert actual.dict() == expected.dict()
+    assert actual.seed == seed
+
+
+def set_target_length(monkeypatch, attack: dict, target_length: float):
+    """Moves the position where troops stop to attack the first turret on path 1 of the sample attack."""
+    location = tuple(attack['game_defensive_buildings'][0].location)
+    target_length_of = MapTargetingTable.target_length
+
+    def patched_target_length(table, building_location, path_id):
+        if tuple(building_location) == location and path_id == 1:
+            return target_length
+        return target_length_of(table, building_location, path_id)
+
+    monkeypatch.setattr(MapTargetingTable, 'target_length', patched_target_length)
+
+
+def test_event_driven_engine_skips_idle_ticks_until_the_duration_cap(monkeypatch):
+    # Troops whose target lies beyond the end of the path never finish, so the fixed-step loop runs to the cap
+    attack = load_sample_attack()
+    set_target_length(monkeypatch, attack, 1.5)
+    attack['game_defensive_buildings'][0].accuracy = 0
+
+    expected = simulate_attack_generalized(**copy.deepcopy(attack), seed=3)
+    actual = simulate_attack_event_driven(**copy.deepcopy(attack), seed=3)
+
+    assert actual.dict() == expected.dict()
+
+
+@pytest.mark.parametrize("seed,troop_count_multiplier,target_length", [(0, 1, None), (7, 1, None), (42, 10, None),
+                                                                       (3, 1, 1.5), (5, 3, 0.2)])
+def test_fast_forward_matches_the_step_by_step_loop(monkeypatch, seed, troop_count_multiplier, target_length):
+    attack = load_sample_attack(troop_count_multiplier)
+    if target_length is not None:
+        set_target_length(monkeypatch, attack, target_length)
+
+    expected = simulate_attack_generalized(**copy.deepcopy(attack), seed=seed)
+    actual = simulate_attack_generalized(**copy.deepcopy(attack), seed=seed, fast_forward=True)
+
+    assert actual.dict() == expected.dict()
+
+
+@pytest.mark.parametrize("engine", ['dict', 'dict_fast_forward', 'vectorized', 'event_driven'])
+def test_profiled_runs_return_the_same_simulation_with_a_profile(engine):
+    expected = SIMULATION_ENGINES[engine](**load_sample_attack(), seed=4)
+    actual = SIMULATION_ENGINES[engine](**load_sample_attack(), seed=4, profile=True)
+
+    assert expected.profile is None
+    assert actual.dict(exclude={'profile'}) == expected.dict(exclude={'profile'})
+    profile = actual.profile
+    assert profile.events == {key: len(getattr(expected, key)) for key in
+                              ('troop_events', 'turret_events', 'generative_building_events', 'city_events')}
+    assert profile.ticks == profile.phases['tick'].calls > 0
+    assert profile.range_queries > 0
+    assert profile.target_selections == profile.phases.get('target_selection', PhaseProfile(seconds=0, calls=0)).calls
+    assert profile.phases['turrets'].seconds <= profile.phases['tick'].seconds <= profile.total_seconds
+
+
+def test_profiled_requests_are_exported_as_metrics(monkeypatch):
+    simulation_metrics.clear()
+    app = FastAPI()
+    app.include_router(router)
+    client = TestClient(app)
+    with open(SAMPLE_INPUTS_PATH, 'r') as f:
+        request = {**json.load(f)['simulation_generalized'][0], 'map_id': 1, 'seed': 4, 'engine': 'vectorized'}
+
+    monkeypatch.setattr(settings, 'SIMULATION_PROFILING_ENABLED', False)
+    assert client.post('/simulate/attack_generalized?profile=true', json=request).status_code == 403
+    monkeypatch.setattr(settings, 'SIMULATION_PROFILING_ENABLED', True)
+    response = client.post('/simulate/attack_generalized?profile=true', json=request)
+    assert response.status_code == 200
+    ticks = response.json()['profile']['ticks']
+
+    metrics = client.get('/simulate/metrics').text
+    assert 'conqueria_simulation_profiled_runs_total{engine="vectorized"} 1\n' in metrics
+    assert f'conqueria_simulation_ticks_total{{engine="vectorized"}} {ticks}\n' in metrics
+    assert 'conqueria_simulation_phase_seconds_total{engine="vectorized",phase="range_queries"}' in metrics
+
+
+def write_map(map_file, path_points):
+    map_data = {'continents': {'1': {'continent_territories': {'1': {'paths': {
+        '1': {'points': [{'x': x, 'y': y} for x, y in path_points]}
+    }}}}}}
+    with open(map_file, 'w') as f:
+        json.dump(map_data, f)
+
+
+def test_map_path_cache_reuses_paths_until_the_map_file_changes(tmp_path):
+    map_file = tmp_path / 'map1.json'
+    write_map(map_file, [(0, 0), (100, 0), (200, 0)])
+    cache = MapPathCache(str(tmp_path))
+
+    path = cache.get_paths(1, [1, 2], num_points=11)[1]
+    assert cache.get_paths(1, [1], num_points=11)[1] is path
+    assert cache.get_paths(1, [1], num_points=21)[1] is not path
+    assert path.length == pytest.approx(200)
+    assert path.cumulative_length[0] == 0
+    assert not path.x.flags.writeable
+
+    write_map(map_file, [(0, 0), (0, 150), (0, 300)])
+    os.utime(map_file, ns=(os.stat(map_file).st_atime_ns, os.stat(map_file).st_mtime_ns + 1_000_000_000))
+
+    reloaded = cache.get_paths(1, [1], num_points=11)[1]
+    assert reloaded is not path
+    assert reloaded.length == pytest.approx(300)
+
+
+def test_smoothed_path_points_are_evenly_spaced_in_arc_length():
+    # Control points bunched on the first half, so the spline parameter runs slower there
+    path = smooth_path(1, np.array([[0, 0], [100, 50], [150, 120], [1000, 400], [2000, 0]]), 200)
+
+    # Chords are only shorter than the arc they span where the path turns sharply
+    segment_lengths = np.diff(path.cumulative_length)
+    assert np.percentile(np.abs(segment_lengths / np.median(segment_lengths) - 1), 90) < 1e-3
+    assert segment_lengths.max() / segment_lengths.min() < 1.5
+
+
+
+def test_turret_range_index_matches_the_distance_check():
+    path = smooth_path(1, np.array([[0, 0], [500, 0], [1000, 0], [1500, 0]]), 1001)
+    turrets = {
+        7: {'position': {'x': 250, 'y': 100}, 'stats': {'range': 150}},
+        8: {'position': {'x': 1250, 'y': 0}, 'stats': {'range': 100}},
+        9: {'position': {'x': 750, 'y': 500}, 'stats': {'range': 100}},
+    }
+    index = TurretRangeIndex(turrets, {1: path})
+
+    assert index.intervals[9] == {}
+    (start, end), = index.t_intervals(8, 1)
+    assert start == pytest.approx(1150 / 1500, abs=2e-3) and end == pytest.approx(1350 / 1500, abs=2e-3)
+
+    troops = [{'id': i, 'alive': True, 't_pos': i / 1000, 'pos': (float(path.x[i]), float(path.y[i]))}
+              for i in range(0, 1001, 7)]
+    for turret_id, turret in turrets.items():
+        turret_pos = (turret['position']['x'], turret['position']['y'])
+        expected = [troop for troop in troops if distance(troop['pos'], turret_pos) <= turret['stats']['range']]
+        assert index.troops_in_range(turret_id, {1: troops}) == expected
+
+
+def test_targeting_table_matches_the_path_geometry():
+    path = smooth_path(1, np.array([[0, 0], [500, 0], [1000, 0], [1500, 0]]), 1001)
+    table = compute_targeting_table([4, 5], np.array([[300, 100], [1500, 450]]), {1: path}, range_levels=(1, 2, 5))
+
+    assert table.target_length((300, 100), 1) == pytest.approx(0.2, abs=1e-3)
+    assert table.target_length((300, 101), 1) is None and table.target_length((300, 100), 2) is None
+    np.testing.assert_allclose(table.line_of_fire[:, 0], [100, 450], atol=1e-6)
+    # Range 100 only touches the path, range 200 spans 300 +- sqrt(200^2 - 100^2) along it
+    np.testing.assert_allclose(table.entry_t[0, 0], [0.2, (300 - 3 ** 0.5 * 100) / 1500, 0], atol=1e-3)
+    np.testing.assert_allclose(table.exit_t[0, 0], [0.2, (300 + 3 ** 0.5 * 100) / 1500, (300 + 24 ** 0.5 * 100) / 1500],
+                               atol=1e-3)
+    assert np.isnan(table.entry_t[1, 0, :2]).all() and table.exit_t[1, 0, 2] == 1
+
+
+def test_simulation_looks_the_target_lengths_up_in_the_map_targeting_table():
+    attack = load_sample_attack()
+    expected = simulate_attack_generalized(**copy.deepcopy(attack), seed=4)
+
+    # Client-supplied target lengths are ignored, they are only echoed in the buildings data
+    attack['buildings_data']['defensive_buildings'][1]['targeting_path_ids']['1'] = 0.01
+    actual = simulate_attack_generalized(**copy.deepcopy(attack), seed=4)
+    assert actual.dict(exclude={'buildings_data'}) == expected.dict(exclude={'buildings_data'})
+
+    table = get_map_targeting(1)
+    assert table.target_length(attack['game_defensive_buildings'][0].location, 1) == pytest.approx(0.654, abs=1e-3)
+    attack['game_defensive_buildings'][0].location = [401, 687]
+    with pytest.raises(HTTPException) as exc_info:
+        simulate_attack_generalized(**attack, seed=4)
+    assert exc_info.value.status_code == 400
+
+
+def test_batch_replicas_are_seeded_and_independent_of_the_worker_count():
+    simulation_input = load_sample_attack()
+    in_process = simulate_attack_batch('vectorized', simulation_input, runs=6, seed=11, max_workers=1)
+    pooled = simulate_attack_batch('vectorized', simulation_input, runs=6, seed=11, max_workers=2)
+    assert pooled == in_process
+
+    expected = simulate_attack_generalized(**load_sample_attack(), seed=13)
+    replica, = run_replicas('dict', load_sample_attack(), [13])
+    assert replica['troops_at_end'] == expected.troops_at_end
+    assert in_process.runs == 6 and in_process.seed == 11
+    assert all(0 <= turret.survival_probability <= 1 for turret in in_process.turrets.values())
+
+
+def test_batch_endpoint_caps_the_worker_processes(monkeypatch):
+    submitted = []
+
+    class RecordingExecutor:
+        async def run(self, fn, *args):
+            submitted.append(args)
+            return fn(*args)
+
+    monkeypatch.setattr(simulation_routes, 'get_simulation_executor', lambda: RecordingExecutor())
+    monkeypatch.setattr(settings, 'SIMULATION_BATCH_WORKERS', 1)
+    app = FastAPI()
+    app.include_router(router)
+    client = TestClient(app)
+    with open(SAMPLE_INPUTS_PATH, 'r') as f:
+        request = {**json.load(f)['simulation_generalized'][0], 'map_id': 1, 'seed': 4, 'runs': 2}
+
+    assert client.post('/simulate/attack_generalized/batch', json={**request, 'max_workers': -1}).status_code == 422
+    response = client.post('/simulate/attack_generalized/batch', json={**request, 'max_workers': 1000})
+    assert response.status_code == 200 and response.json()['runs'] == 2
+    assert submitted[-1][-1] == 1
+
+
+def test_simulations_are_reproducible_and_isolated_from_the_global_random_state():
+    first = simulate_attack_generalized(**load_sample_attack(), seed=21)
+    random.seed(0)
+    random.random()
+    second = simulate_attack_generalized(**load_sample_attack(), seed=21)
+    assert second.dict() == first.dict()
+
+    unseeded = simulate_attack_generalized(**load_sample_attack())
+    assert unseeded.seed is not None
+    replayed = simulate_attack_generalized(**load_sample_attack(), seed=unseeded.seed)
+    assert replayed.dict() == unseeded.dict()
+
+    assert simulate_flamethrower_scenario(seed=4).dict() == simulate_flamethrower_scenario(seed=4).dict()
+    assert simulate_gunner_scenario(seed=4).dict() == simulate_gunner_scenario(seed=4).dict()
+
+
+def decode_event_columns(event_columns: dict, timestamp_step: float) -> list:
+    """Expands columnar events back into the event dictionaries of the default format."""
+    ticks = np.cumsum(event_columns['timestamp_deltas'])
+    events = []
+    for i in range(event_columns['count']):
+        data = {key: column[i] for key, column in event_columns['data'].items() if column[i] is not None}
+        events.append({
+            'timestamp': ticks[i] * timestamp_step,
+            'event_type': event_columns['event_types'][event_columns['event_type'][i]],
+            **{name: column[i] for name, column in event_columns['columns'].items()},
+            'data': data or None,
+        })
+    return events
+
+
+@pytest.mark.parametrize("simulate_attack",
+                         [simulate_attack_generalized, simulate_attack_vectorized, simulate_attack_event_driven])
+def test_columnar_events_decode_to_the_event_objects(simulate_attack):
+    objects = simulate_attack(**load_sample_attack(), seed=5).dict()
+    columnar = simulate_attack(**load_sample_attack(), seed=5, event_format='columnar').dict()
+
+    for key in ('turret_info', 'troop_info', 'troops_at_end', 'buildings_data', 'seed'):
+        assert columnar[key] == objects[key]
+    for key in ('troop_events', 'turret_events', 'generative_building_events', 'city_events'):
+        decoded = decode_event_columns(columnar[key], columnar['timestamp_step'])
+        assert len(decoded) == len(objects[key])
+        for decoded_event, event in zip(decoded, objects[key]):
+            assert decoded_event['timestamp'] == pytest.approx(event['timestamp'])
+            assert {**decoded_event, 'timestamp': None} == {**event, 'timestamp': None}
+
+
+def test_attack_endpoint_negotiates_the_columnar_formats():
+    msgpack = pytest.importorskip('msgpack')
+    app = FastAPI()
+    app.include_router(router)
+    client = TestClient(app)
+    with open(SAMPLE_INPUTS_PATH, 'r') as f:
+        request = {**json.load(f)['simulation_generalized'][0], 'map_id': 1}
+
+    columnar = client.post('/simulate/attack_generalized?format=columnar', json=request)
+    packed = client.post('/simulate/attack_generalized', json={**request, 'seed': columnar.json()['seed']},
+                         headers={'Accept': 'application/msgpack'})
+
+    assert columnar.headers['content-type'] == 'application/vnd.conqueria.columnar+json'
+    assert packed.headers['content-type'] == 'application/msgpack'
+    unpacked = msgpack.unpackb(packed.content, strict_map_key=False)
+    for key in ('troop_events', 'turret_events', 'generative_building_events', 'troops_at_end', 'seed'):
+        assert unpacked[key] == columnar.json()[key]
+    assert client.post('/simulate/attack_generalized?format=xml', json=request).status_code == 400
+
+
+@pytest.mark.parametrize("engine", ['dict', 'event_driven'])
+def test_attack_stream_windows_hold_the_events_of_the_full_simulation(engine):
+    app = FastAPI()
+    app.include_router(router)
+    client = TestClient(app)
+    with open(SAMPLE_INPUTS_PATH, 'r') as f:
+        request = {**json.load(f)['simulation_generalized'][0], 'map_id': 1, 'seed': 9, 'engine': engine}
+    expected = simulate_attack_generalized(**load_sample_attack(), seed=9).dict()
+
+    response = client.post('/simulate/attack_generalized/stream?window=2', json=request)
+    assert response.headers['content-type'] == 'application/x-ndjson'
+    header, *windows, summary = [json.loads(line) for line in response.text.splitlines()]
+
+    assert header['type'] == 'header' and header['seed'] == 9 and header['troop_info'] == expected['troop_info']
+    assert all(window['type'] == 'events' for window in windows)
+    for key in ('troop_events', 'turret_events', 'generative_building_events', 'city_events'):
+        events = [event for window in windows for event in window[key]]
+        assert events == expected[key]
+        assert summary['event_counts'][key] == len(expected[key])
+        assert all(window['start'] <= event['timestamp'] < window['end'] for window in windows for event in window[key])
+    assert summary['type'] == 'summary'
+    assert summary['troops_at_end'] == expected['troops_at_end']
+    assert summary['turret_info'] == expected['turret_info']
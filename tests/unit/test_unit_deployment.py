@@ -0,0 +1,98 @@
+import asyncio
+import pytest
+from types import SimpleNamespace
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+from app.authentication.identity_cache import Identity
+from app.authentication.jwt import get_current_identity
+from app.db.session import get_db
+from app.unit_deployment import routes as deployment_routes
+from app.unit_deployment.controllers import unit_count_update, update_unit_count, get_territory_unit_totals
+from app.unit_deployment.models import CITY_LOCATION, OUTPOST_LOCATION, location_unit_deployment
+from app.game_city.models import GameCity
+
+
+def compile_postgresql(statement) -> str:
+    return str(statement.compile(dialect=postgresql.dialect()))
+
+
+class RecordingSession:
+    """Records the executed statements, answering them with the given count, rows and get result."""
+
+    def __init__(self, new_count=None, location=None, rows=()):
+        self.statements = []
+        self.new_count = new_count
+        self.location = location
+        self.rows = rows
+
+    async def execute(self, statement):
+        self.statements.append(compile_postgresql(statement))
+        return SimpleNamespace(scalar_one_or_none=lambda: self.new_count,
+                               mappings=lambda: SimpleNamespace(all=lambda: list(self.rows)))
+
+    async def get(self, model, location_id):
+        return self.location
+
+
+def test_unit_counts_are_updated_in_a_single_guarded_statement():
+    decrement = compile_postgresql(unit_count_update(CITY_LOCATION, 5, 2, 7, -3))
+    assert decrement.startswith('UPDATE unit_deployments SET count=(unit_deployments.count + ')
+    assert '>= ' in decrement.split('WHERE')[1] and 'RETURNING' in decrement
+
+    # Increments insert the row for the game of the location, which outposts take from their territory
+    increment = compile_postgresql(unit_count_update(OUTPOST_LOCATION, 5, 2, 7, 3))
+    assert increment.startswith('INSERT INTO unit_deployments')
+    assert 'JOIN game_territories' in increment and 'ON CONFLICT ON CONSTRAINT uq_unit_deployments_key' in increment
+
+    db = RecordingSession(new_count=4)
+    assert asyncio.run(update_unit_count(city_id=5, player_id=2, attack_unit_id=7, count_delta=-3, db=db)) == 4
+    assert len(db.statements) == 1
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(update_unit_count(outpost_id=5, player_id=2, attack_unit_id=7, count_delta=-3,
+                                      db=RecordingSession(location=object())))
+    assert error.value.status_code == 400
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(update_unit_count(city_id=5, player_id=2, attack_unit_id=7, count_delta=1, db=RecordingSession()))
+    assert error.value.status_code == 404
+
+
+def test_deployments_are_read_and_aggregated_in_one_statement():
+    # The unit_deployment of cities and outposts is built from their rows by the database
+    cities = GameCity.__table__
+    view = compile_postgresql(select(cities.c.id, location_unit_deployment(CITY_LOCATION, cities.c.id)))
+    assert 'unit_deployments.location_id = game_cities.id' in view and view.count('jsonb_object_agg') == 2
+
+    db = RecordingSession(rows=[{'territory_id': 3, 'player_id': 2, 'units': 12}])
+    totals = asyncio.run(get_territory_unit_totals(9, db))
+    assert [total.units for total in totals] == [12]
+    assert len(db.statements) == 1 and 'GROUP BY' in db.statements[0]
+
+
+def test_only_the_host_or_an_admin_updates_the_army_power(monkeypatch):
+    updated = []
+
+    async def update_army_power_indexes(game_id, db):
+        updated.append(game_id)
+    monkeypatch.setattr(deployment_routes.deployment_ctrl, 'update_army_power_indexes', update_army_power_indexes)
+
+    class GameSession:
+        async def execute(self, statement):
+            return SimpleNamespace(scalar_one_or_none=lambda: SimpleNamespace(id=9, host_id=2))
+
+    identity = Identity(user_id=3, is_admin=False, is_active=True)
+    app = FastAPI()
+    app.include_router(deployment_routes.router)
+    app.dependency_overrides[get_db] = lambda: GameSession()
+    app.dependency_overrides[get_current_identity] = lambda: identity
+    client = TestClient(app)
+
+    assert client.patch('/unit-deployments/9/army-power').status_code == 403
+    assert updated == []
+    identity = Identity(user_id=2, is_admin=False, is_active=True)
+    assert client.patch('/unit-deployments/9/army-power').status_code == 200
+    identity = Identity(user_id=5, is_admin=True, is_active=True)
+    assert client.patch('/unit-deployments/9/army-power').status_code == 200
+    assert updated == [9, 9]